@@ -0,0 +1,477 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import ast
+import builtins
+import dataclasses as dc
+import enum
+import hashlib
+import inspect
+import linecache
+import logging
+import textwrap
+import types
+import zuspec.dataclasses as zdc
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple
+from .cache import WeakLruCache
+from .member_catalog import MemberCatalog
+from .reset_split import ResetSplit, ResetSplitter
+from .static_path import StaticPath
+from .visitor import _BindPathMock
+
+class FieldKind(enum.Enum):
+    Data = enum.auto()
+    Input = enum.auto()
+    Output = enum.auto()
+    Extern = enum.auto()
+    Exec = enum.auto()
+
+@dc.dataclass
+class PathRef(object):
+    """Static reference path from 'self', by field name and field index"""
+    names : Tuple[str, ...] = dc.field(default_factory=tuple)
+    indices : Tuple[int, ...] = dc.field(default_factory=tuple)
+    # Field of the first path element. Used to check that a path resolved
+    # for one class is still valid in a subclass
+    field : Optional[dc.Field] = dc.field(default=None, compare=False)
+
+@dc.dataclass
+class FieldInfo(object):
+    name : str = dc.field()
+    index : int = dc.field()
+    kind : FieldKind = dc.field()
+    type : Any = dc.field()
+    width : Optional[int] = dc.field(default=None)
+    field : Optional[dc.Field] = dc.field(default=None)
+
+    @property
+    def is_port(self) -> bool:
+        return self.kind in (FieldKind.Input, FieldKind.Output)
+
+    @property
+    def is_component(self) -> bool:
+        return isinstance(self.type, type) and issubclass(self.type, zdc.Component)
+
+@dc.dataclass
+class ExecInfo(object):
+    name : str = dc.field()
+    method : Callable = dc.field()
+    body : List[ast.stmt] = dc.field(default_factory=list)
+    file : Optional[str] = dc.field(default=None)
+    line : int = dc.field(default=-1)
+    _body_fp : Optional[bytes] = dc.field(
+        default=None, init=False, repr=False, compare=False)
+    _indent : Optional[int] = dc.field(
+        default=None, init=False, repr=False, compare=False)
+
+    @property
+    def indent(self) -> int:
+        """Indent of the method's source. The body AST is dedented, so this
+        is added to its column offsets to get source columns"""
+        if self._indent is None:
+            self._indent = 0
+            if self.file is not None and self.line > 0:
+                src = linecache.getline(self.file, self.line)
+                self._indent = len(src) - len(src.lstrip())
+        return self._indent
+
+    @property
+    def body_fingerprint(self) -> bytes:
+        """Digest of the body, ignoring source locations"""
+        if self._body_fp is None:
+            h = hashlib.blake2b(digest_size=16)
+            for s in self.body:
+                h.update(ast.dump(s, annotate_fields=False).encode())
+            self._body_fp = h.digest()
+        return self._body_fp
+
+@dc.dataclass
+class SyncInfo(ExecInfo):
+    clock : PathRef = dc.field(default_factory=PathRef)
+    reset : PathRef = dc.field(default_factory=PathRef)
+    # Reset/update blocks when the body is reset-guarded. None otherwise
+    reset_split : Optional[ResetSplit] = dc.field(default=None)
+
+@dc.dataclass
+class SyncDomain(object):
+    """Sync blocks of a component that share a clock and reset"""
+    clock : PathRef = dc.field()
+    reset : PathRef = dc.field()
+    syncs : List[SyncInfo] = dc.field(default_factory=list)
+
+@dc.dataclass
+class ComponentInfo(object):
+    """Backend-neutral description of a component class"""
+    name : str = dc.field()
+    fields : Tuple[FieldInfo, ...] = dc.field(default_factory=tuple)
+    syncs : List[SyncInfo] = dc.field(default_factory=list)
+    execs : List[ExecInfo] = dc.field(default_factory=list)
+    # Analyzer that produced this info. Sub-components are fingerprinted with it
+    _analyzer : Optional['Analyzer'] = dc.field(default=None, repr=False, compare=False)
+    _field_m : Optional[Dict[str, FieldInfo]] = dc.field(
+        default=None, init=False, repr=False, compare=False)
+    _fingerprint : Optional[str] = dc.field(
+        default=None, init=False, repr=False, compare=False)
+    _domains : Optional[Tuple[SyncDomain, ...]] = dc.field(
+        default=None, init=False, repr=False, compare=False)
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """
+        Digest of the component's structure: fields (name, kind, type,
+        default), sub-component fingerprints, and exec blocks (paths,
+        bodies, and the values of the global and closure names that the
+        bodies reference). The component name and source locations are
+        not included, so structurally-identical classes (eg produced by
+        a factory function) compare equal.
+
+        None when some referenced value can't be keyed by content (eg an
+        object or a function-local class), so the component can't be
+        safely shared with another
+        """
+        if self._fingerprint is None:
+            analyzer = self._analyzer if self._analyzer is not None else Analyzer.inst()
+            def _subFp(t):
+                return analyzer.analyze(t).fingerprint
+            keys = []
+            for f in self.fields:
+                keys.append("F%s:%s" % (f.name, f.kind.name))
+                keys.append(_typeKey(f, _subFp))
+                keys.append(_defaultKey(f, _subFp))
+            for s in self.syncs:
+                keys.append("S%s:%s:%s" % (s.name, s.clock.indices, s.reset.indices))
+                keys.append(_freeValuesKey(s, _subFp))
+            for e in self.execs:
+                keys.append("E%s" % e.name)
+                keys.append(_freeValuesKey(e, _subFp))
+            if any(k is None for k in keys):
+                self._fingerprint = ""
+            else:
+                h = hashlib.blake2b(digest_size=16)
+                for k in keys:
+                    h.update(k.encode())
+                    h.update(b";")
+                for e in self.syncs + self.execs:
+                    h.update(e.body_fingerprint)
+                self._fingerprint = h.hexdigest()
+        return self._fingerprint if self._fingerprint != "" else None
+
+    @property
+    def domains(self) -> Tuple[SyncDomain, ...]:
+        """
+        Sync blocks grouped by (clock, reset), in order of first use.
+        Paths are compared by field index, so differently-spelled
+        references to the same field share a domain
+        """
+        if self._domains is None:
+            domain_m : Dict[Tuple, SyncDomain] = {}
+            for s in self.syncs:
+                key = (s.clock.indices, s.reset.indices)
+                d = domain_m.get(key, None)
+                if d is None:
+                    d = SyncDomain(clock=s.clock, reset=s.reset)
+                    domain_m[key] = d
+                d.syncs.append(s)
+            self._domains = tuple(domain_m.values())
+        return self._domains
+
+    def field(self, name : str) -> FieldInfo:
+        if self._field_m is None:
+            self._field_m = {f.name : f for f in self.fields}
+        return self._field_m[name]
+
+    def fieldIndex(self, name : str) -> int:
+        return self.field(name).index
+
+def _typeKey(f : FieldInfo, sub_fp : Callable[[type], Optional[str]]) -> Optional[str]:
+    if f.width is not None:
+        return "bit%d" % f.width
+    if isinstance(f.type, type):
+        return _valueKey(f.type, sub_fp)
+    return str(f.type)
+
+def _defaultKey(f : FieldInfo, sub_fp : Callable[[type], Optional[str]]) -> Optional[str]:
+    if f.field is None:
+        return ""
+    if f.field.default is not dc.MISSING:
+        return _valueKey(f.field.default, sub_fp)
+    if f.field.default_factory is not dc.MISSING:
+        key = _valueKey(f.field.default_factory, sub_fp)
+        return None if key is None else "()" + key
+    return ""
+
+def _freeValuesKey(e : ExecInfo, sub_fp : Callable[[type], Optional[str]]) -> Optional[str]:
+    """
+    Key of the values of the global, closure and builtin names that the
+    body of 'e' reads. Two bodies with the same AST only behave the same
+    if these match
+    """
+    code = getattr(e.method, "__code__", None)
+    local_s = set(code.co_varnames) if code is not None else set()
+    names = []
+    for s in e.body:
+        for n in ast.walk(s):
+            if isinstance(n, ast.Name):
+                if isinstance(n.ctx, ast.Load):
+                    if n.id not in local_s:
+                        names.append(n.id)
+                else:
+                    local_s.add(n.id)
+    if len(names) == 0:
+        return ""
+
+    cell_m = {}
+    if code is not None and e.method.__closure__ is not None:
+        cell_m = dict(zip(code.co_freevars, e.method.__closure__))
+    globals_m = getattr(e.method, "__globals__", {})
+    keys = []
+    for name in sorted(set(names) - local_s):
+        if name in cell_m:
+            try:
+                v = cell_m[name].cell_contents
+            except ValueError:
+                # Not yet bound
+                return None
+        elif name in globals_m:
+            v = globals_m[name]
+        elif hasattr(builtins, name):
+            v = getattr(builtins, name)
+        else:
+            keys.append("%s=?" % name)
+            continue
+        key = _valueKey(v, sub_fp)
+        if key is None:
+            return None
+        keys.append("%s=%s" % (name, key))
+    return ",".join(keys)
+
+def _valueKey(v : Any, sub_fp : Callable[[type], Optional[str]]) -> Optional[str]:
+    """Content key of a value, or None if it can't be keyed"""
+    if v is None or isinstance(v, (bool, int, float, str, bytes)):
+        return "%s:%r" % (type(v).__name__, v)
+    elif isinstance(v, enum.Enum):
+        return "%s.%s:%s" % (type(v).__module__, type(v).__qualname__, v.name)
+    elif isinstance(v, tuple):
+        keys = [_valueKey(e, sub_fp) for e in v]
+        return None if None in keys else "(%s)" % ",".join(keys)
+    elif isinstance(v, type):
+        if issubclass(v, zdc.Component):
+            fp = sub_fp(v)
+            return None if fp is None else "C:" + fp
+        elif issubclass(v, zdc.Bit) and hasattr(v, "W"):
+            return "bit%d" % v.W
+    elif isinstance(v, types.ModuleType):
+        return "M:" + v.__name__
+    elif isinstance(v, types.FunctionType) and v.__closure__ is not None:
+        # Captures values of its own
+        return None
+    elif not isinstance(v, (types.FunctionType, types.BuiltinFunctionType)):
+        return None
+    # Module-level classes and functions are keyed by name. Those defined
+    # in a function may differ between calls
+    if "<locals>" in v.__qualname__:
+        return None
+    return "%s.%s" % (v.__module__, v.__qualname__)
+
+@dc.dataclass
+class Analyzer(object):
+    """
+    Analyzes component classes once (introspection, source parsing and
+    static path resolution) into a ComponentInfo that any number of
+    emitters can consume.
+    """
+    _info_m : WeakLruCache = dc.field(
+        default_factory=lambda: WeakLruCache("analysis.components"))
+    # Field info per class, and exec/sync info per defining class. Both
+    # are shared with subclasses
+    _fields_m : WeakLruCache = dc.field(
+        default_factory=lambda: WeakLruCache("analysis.fields"))
+    _member_m : WeakLruCache = dc.field(
+        default_factory=lambda: WeakLruCache("analysis.members"))
+    _source_m : WeakLruCache = dc.field(
+        default_factory=lambda: WeakLruCache("analysis.sources"))
+    _log : ClassVar = logging.getLogger("Analyzer")
+    _inst : ClassVar[Optional['Analyzer']] = None
+
+    @classmethod
+    def inst(cls) -> 'Analyzer':
+        if cls._inst is None:
+            cls._inst = Analyzer()
+        return cls._inst
+
+    def clear(self):
+        for c in (self._info_m, self._fields_m, self._member_m, self._source_m):
+            c.clear()
+
+    def analyze(self, t) -> ComponentInfo:
+        t_cls = t if isinstance(t, type) else type(t)
+        ret = self._info_m.get(t_cls, None)
+        if ret is None:
+            self._log.debug("--> analyze: %s" % t_cls.__qualname__)
+            ret = self._analyze(t_cls)
+            self._info_m[t_cls] = ret
+            self._log.debug("<-- analyze: %s" % t_cls.__qualname__)
+        return ret
+
+    def _analyze(self, t : type) -> ComponentInfo:
+        catalog = MemberCatalog.get(t)
+        ret = ComponentInfo(name=t.__qualname__, _analyzer=self)
+
+        ret.fields = self._fieldInfos(t)
+
+        for name, o in catalog.execs:
+            if isinstance(o, zdc.ExecSync):
+                ret.syncs.append(self._mkSyncInfo(t, name, o.method, o.clock, o.reset))
+            else:
+                ret.execs.append(self._memberInfo(
+                    t, name, lambda: ExecInfo(name=name, method=o.method)))
+        for name, m in catalog.sync_methods:
+            ann = m.__zsp_annotation__
+            ret.syncs.append(self._mkSyncInfo(
+                t, name, m, getattr(ann, "clock", None), getattr(ann, "reset", None)))
+
+        return ret
+
+    def fieldInfos(self, t : type) -> Tuple[FieldInfo, ...]:
+        """Returns field info for 't', without analyzing its exec bodies"""
+        return self._fieldInfos(t)
+
+    def _fieldInfos(self, t : type) -> Tuple[FieldInfo, ...]:
+        ret = self._fields_m.get(t, None)
+        if ret is None:
+            ret = self._mkFieldInfos(t)
+            self._fields_m[t] = ret
+        return ret
+
+    def _mkFieldInfos(self, t : type) -> Tuple[FieldInfo, ...]:
+        # Fields inherited unchanged from the nearest dataclass base share
+        # that base's FieldInfo objects (and, when nothing is added or
+        # overridden, the base's field tuple itself)
+        catalog = MemberCatalog.get(t)
+        base_fields : Tuple[FieldInfo, ...] = ()
+        base = next((b for b in t.__mro__[1:] if dc.is_dataclass(b)), None)
+        if base is not None:
+            base_fields = self._fieldInfos(base)
+
+        fields = []
+        for i, f in enumerate(catalog.fields):
+            if i < len(base_fields) and base_fields[i].field is f:
+                fields.append(base_fields[i])
+            else:
+                fields.append(self._mkFieldInfo(i, f))
+
+        if len(fields) == len(base_fields) and all(
+                a is b for a, b in zip(fields, base_fields)):
+            return base_fields
+        return tuple(fields)
+
+    def _mkFieldInfo(self, idx : int, f : dc.Field) -> FieldInfo:
+        kind = FieldKind.Data
+        factory = f.default_factory
+        if factory not in (None, dc.MISSING) and isinstance(factory, type):
+            kind_m = (
+                (zdc.Input, FieldKind.Input),
+                (zdc.Output, FieldKind.Output),
+                (zdc.Exec, FieldKind.Exec),
+                (zdc.Extern, FieldKind.Extern))
+            for kind_t, kind_v in kind_m:
+                if issubclass(factory, kind_t):
+                    kind = kind_v
+                    break
+
+        width = None
+        if isinstance(f.type, type) and issubclass(f.type, zdc.Bit):
+            width = f.type.W
+
+        return FieldInfo(
+            name=f.name, index=idx, kind=kind, type=f.type, width=width, field=f)
+
+    def _mkExecInfo(self, info : ExecInfo) -> ExecInfo:
+        fdef = self.parseMethod(info.method)
+        info.body = fdef.body
+        code = getattr(info.method, "__code__", None)
+        if code is not None:
+            info.file = code.co_filename
+            info.line = code.co_firstlineno
+        if isinstance(info, SyncInfo):
+            info.reset_split = ResetSplitter.split(info.body, info.reset.names)
+        return info
+
+    def _mkSyncInfo(self, t : type, name : str, method : Callable,
+                    clock : Optional[Callable], reset : Optional[Callable]) -> SyncInfo:
+        """
+        Sync info for an ExecSync or an AnnotationSync-annotated method.
+        Clock/reset paths that aren't specified are empty
+        """
+        def _resolve(p):
+            return PathRef() if p is None else self.resolvePath(t, p)
+        def _mk():
+            info = SyncInfo(name=name, method=method)
+            info.clock = _resolve(clock)
+            info.reset = _resolve(reset)
+            return info
+        info = self._memberInfo(t, name, _mk)
+
+        # Inherited paths stay valid unless the subclass overrides the
+        # field that the path starts from. Otherwise, share the body and
+        # only re-resolve the paths
+        catalog = MemberCatalog.get(t)
+        if not self._pathValid(catalog, info.clock) or not self._pathValid(catalog, info.reset):
+            info = dc.replace(
+                info,
+                clock=_resolve(clock),
+                reset=_resolve(reset))
+            info.reset_split = ResetSplitter.split(info.body, info.reset.names)
+        return info
+
+    def _memberInfo(self, t : type, name : str, mk : Callable[[], ExecInfo]) -> ExecInfo:
+        """Returns exec info for 'name', parsed once at its defining class"""
+        owner = next(b for b in t.__mro__ if name in vars(b))
+        member_m = self._member_m.get(owner, None)
+        if member_m is None:
+            member_m = {}
+            self._member_m[owner] = member_m
+        info = member_m.get(name, None)
+        if info is None:
+            info = self._mkExecInfo(mk())
+            member_m[name] = info
+        return info
+
+    def _pathValid(self, catalog : MemberCatalog, p : PathRef) -> bool:
+        if len(p.indices) == 0:
+            return True
+        idx = p.indices[0]
+        return idx < len(catalog.fields) and catalog.fields[idx] is p.field
+
+    def parseMethod(self, m : Callable) -> ast.FunctionDef:
+        # Parsed outside the cache lock. Concurrent callers for the same
+        # method wait on its pending entry, so each method has one AST
+        return self._source_m.getOrCreate(
+            m, lambda: ast.parse(textwrap.dedent(inspect.getsource(m))).body[0])
+
+    def resolvePath(self, t : type, path_lambda : Callable) -> PathRef:
+        """Resolves a path lambda (eg lambda s: s.clock) against type 't'"""
+        names = StaticPath.decodePath(path_lambda)
+        if names is None:
+            # Unsupported form. Evaluate against a path mock
+            r = path_lambda(_BindPathMock(t, ["s"]))
+            if not isinstance(r, _BindPathMock):
+                raise Exception("Path is not a static ref (%s)" % str(r))
+            names = tuple(object.__getattribute__(r, "_path")[1:])
+        indices, fields = StaticPath.resolve(t, names)
+        return PathRef(
+            names=names,
+            indices=indices,
+            field=fields[0] if len(fields) > 0 else None)
@@ -0,0 +1,227 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import dataclasses as dc
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, ClassVar, Dict, List, Optional
+
+@dc.dataclass
+class CacheStats(object):
+    name : str = ""
+    size : int = 0
+    maxsize : int = 0
+    hits : int = 0
+    misses : int = 0
+    evictions : int = 0
+
+class _Pending(object):
+    """Value of a key being created by getOrCreate()"""
+
+    def __init__(self, key):
+        # Held only while the value is created
+        self.key = key
+        self.thread = threading.get_ident()
+        self.done = threading.Event()
+        self.ok = False
+        self.value = None
+
+class WeakLruCache(object):
+    """
+    Cache keyed weakly on object identity (classes, functions, code
+    objects), with a size cap and least-recently-used eviction.
+
+    Entries are dropped when their key is garbage collected. Values must
+    not hold a strong reference to their key, or the entry will only be
+    released by eviction or clear().
+
+    Access is thread-safe. getOrCreate() creates values outside the
+    cache lock: concurrent callers for the same key wait for a single
+    creation, while those for other keys proceed.
+    """
+    default_maxsize : ClassVar[int] = 4096
+    _caches : ClassVar = weakref.WeakSet()
+
+    def __init__(self, name : str, maxsize : Optional[int] = None):
+        self.name = name
+        self.maxsize = WeakLruCache.default_maxsize if maxsize is None else maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries : OrderedDict = OrderedDict()
+        # Values being created by getOrCreate(), by key id
+        self._pending : Dict[int, _Pending] = {}
+        self._lock = threading.RLock()
+        WeakLruCache._caches.add(self)
+
+    @classmethod
+    def caches(cls) -> List['WeakLruCache']:
+        return list(cls._caches)
+
+    @classmethod
+    def clearAll(cls):
+        for c in cls.caches():
+            c.clear()
+
+    @classmethod
+    def statsAll(cls) -> Dict[str, CacheStats]:
+        return {c.name : c.stats for c in cls.caches()}
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            name=self.name,
+            size=len(self._entries),
+            maxsize=self.maxsize,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions)
+
+    def get(self, key, default=None):
+        with self._lock:
+            ent = self._entries.get(id(key), None)
+            if ent is None or ent[0]() is not key:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(id(key))
+            return ent[1]
+
+    def getOrCreate(self, key, mk : Callable[[], Any]) -> Any:
+        with self._lock:
+            ret = self.get(key, None)
+            if ret is not None:
+                return ret
+            pending = self._pending.get(id(key), None)
+            if pending is None:
+                pending = _Pending(key)
+                self._pending[id(key)] = pending
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            if pending.thread == threading.get_ident():
+                raise RuntimeError("%s: value for %s requested while creating it" % (
+                    self.name, str(key)))
+            pending.done.wait()
+            if pending.ok:
+                return pending.value
+            # Creation failed. Try again, reporting our own error if it fails
+            return self.getOrCreate(key, mk)
+
+        try:
+            ret = mk()
+            self[key] = ret
+            pending.value, pending.ok = ret, True
+        finally:
+            with self._lock:
+                del self._pending[id(key)]
+            pending.done.set()
+        return ret
+
+    def __setitem__(self, key, value):
+        k = id(key)
+        self_r = weakref.ref(self)
+        def _remove(r, k=k):
+            c = self_r()
+            if c is not None:
+                with c._lock:
+                    ent = c._entries.get(k, None)
+                    # The id may have been reused by a live key since
+                    if ent is not None and ent[0] is r:
+                        del c._entries[k]
+        with self._lock:
+            self._entries[k] = (weakref.ref(key, _remove), value)
+            self._entries.move_to_end(k)
+            while self.maxsize > 0 and len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __getitem__(self, key):
+        ret = self.get(key, None)
+        if ret is None:
+            raise KeyError(key)
+        return ret
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            ent = self._entries.get(id(key), None)
+            return ent is not None and ent[0]() is key
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class LruCache(object):
+    """
+    Cache keyed by value (eg source digests), with a size cap and
+    least-recently-used eviction. Thread-safe. Registered with the
+    WeakLruCache caches, so clearAll() and statsAll() include it.
+    """
+
+    def __init__(self, name : str, maxsize : Optional[int] = None):
+        self.name = name
+        self.maxsize = WeakLruCache.default_maxsize if maxsize is None else maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries : OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        WeakLruCache._caches.add(self)
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            name=self.name,
+            size=len(self._entries),
+            maxsize=self.maxsize,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions)
+
+    def get(self, key, default=None):
+        with self._lock:
+            ret = self._entries.get(key, None)
+            if ret is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return ret
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while self.maxsize > 0 and len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,184 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import ast
+import dataclasses as dc
+from typing import ClassVar, List, Optional, Set, Tuple
+
+@dc.dataclass
+class CaseTable(object):
+    """Dispatch of one subject expression over constant keys"""
+    subject : ast.expr = dc.field()
+    # (keys, body) per case, in source order. Keys are unique across cases
+    cases : List[Tuple[Tuple[int, ...], List[ast.stmt]]] = dc.field(default_factory=list)
+    default : Optional[List[ast.stmt]] = dc.field(default=None)
+
+class CaseRecognizer(object):
+    """
+    Recognizes statements that dispatch one expression over integer
+    constants:
+
+    * if/elif ladders whose tests are ``<subj> == <const>``,
+      ``<subj> in (<const>, ...)`` or an 'or' of these, all on the same
+      ``self.<path>`` subject. Leading clauses of this form become cases,
+      and the rest of the ladder becomes the default
+    * ``match <subj>:`` with literal, or-of-literal and wildcard patterns
+      and no guards
+
+    Keys repeated in a later clause can never select it, so they are
+    dropped (and clauses left without keys are removed).
+    """
+    # Shorter ladders and matches are left as if/else
+    MIN_CASES : ClassVar[int] = 3
+
+    @classmethod
+    def recognize(cls, s : ast.stmt) -> Optional[CaseTable]:
+        """Returns a table if 's' is worth lowering as a switch"""
+        if isinstance(s, ast.If):
+            return cls._recognizeIf(s)
+        elif isinstance(s, ast.Match):
+            ret = cls.recognizeMatch(s)
+            if ret is not None and len(ret.cases) < cls.MIN_CASES:
+                return None
+            return ret
+        return None
+
+    @classmethod
+    def recognizeMatch(cls, s : ast.Match) -> Optional[CaseTable]:
+        """
+        Returns the table of any supported match statement, regardless
+        of its number of cases. None if the match isn't supported
+        """
+        if not cls._isRef(s.subject):
+            return None
+        cases = []
+        default = None
+        for c in s.cases:
+            if c.guard is not None:
+                return None
+            if isinstance(c.pattern, ast.MatchAs) and c.pattern.pattern is None \
+                    and c.pattern.name is None:
+                # Wildcard. Python requires it to be last
+                default = c.body
+                continue
+            keys = cls._patternKeys(c.pattern)
+            if keys is None:
+                return None
+            cases.append((keys, c.body))
+        return cls._mkTable(s.subject, cases, default)
+
+    @classmethod
+    def _recognizeIf(cls, s : ast.If) -> Optional[CaseTable]:
+        subject, subject_k = None, None
+        cases = []
+        default = None
+        while True:
+            m = cls._testKeys(s.test)
+            if m is None or (subject_k is not None and ast.dump(m[0]) != subject_k):
+                # Remainder of the ladder is the default
+                default = [s]
+                break
+            if subject is None:
+                subject, subject_k = m[0], ast.dump(m[0])
+            cases.append((m[1], s.body))
+
+            if len(s.orelse) == 1 and isinstance(s.orelse[0], ast.If):
+                s = s.orelse[0]
+            else:
+                default = s.orelse if len(s.orelse) > 0 else None
+                break
+
+        if len(cases) < cls.MIN_CASES:
+            return None
+        return cls._mkTable(subject, cases, default)
+
+    @staticmethod
+    def _mkTable(subject, cases, default) -> CaseTable:
+        seen : Set[int] = set()
+        ret = CaseTable(subject=subject, default=default)
+        for keys, body in cases:
+            keys = tuple(k for k in dict.fromkeys(keys) if k not in seen)
+            if len(keys) == 0:
+                continue
+            seen.update(keys)
+            ret.cases.append((keys, body))
+        return ret
+
+    @classmethod
+    def _testKeys(cls, e : ast.expr) -> Optional[Tuple[ast.expr, Tuple[int, ...]]]:
+        """Returns (subject, keys) if 'e' tests a ref against constants"""
+        if isinstance(e, ast.BoolOp) and isinstance(e.op, ast.Or):
+            subject, subject_k, keys = None, None, []
+            for v in e.values:
+                m = cls._testKeys(v)
+                if m is None:
+                    return None
+                if subject is None:
+                    subject, subject_k = m[0], ast.dump(m[0])
+                elif ast.dump(m[0]) != subject_k:
+                    return None
+                keys.extend(m[1])
+            return subject, tuple(keys)
+        if not isinstance(e, ast.Compare) or len(e.ops) != 1:
+            return None
+        lhs, rhs = e.left, e.comparators[0]
+        if isinstance(e.ops[0], ast.Eq):
+            if cls._const(lhs) is not None:
+                lhs, rhs = rhs, lhs
+            k = cls._const(rhs)
+            if k is None or not cls._isRef(lhs):
+                return None
+            return lhs, (k,)
+        elif isinstance(e.ops[0], ast.In):
+            if not cls._isRef(lhs) or not isinstance(rhs, (ast.Tuple, ast.List, ast.Set)):
+                return None
+            keys = tuple(cls._const(k) for k in rhs.elts)
+            if len(keys) == 0 or any(k is None for k in keys):
+                return None
+            return lhs, keys
+        return None
+
+    @classmethod
+    def _patternKeys(cls, p : ast.pattern) -> Optional[Tuple[int, ...]]:
+        if isinstance(p, ast.MatchValue):
+            k = cls._const(p.value)
+            return None if k is None else (k,)
+        elif isinstance(p, ast.MatchOr):
+            keys = []
+            for sp in p.patterns:
+                k = cls._patternKeys(sp)
+                if k is None:
+                    return None
+                keys.extend(k)
+            return tuple(keys)
+        return None
+
+    @staticmethod
+    def _const(e : ast.expr) -> Optional[int]:
+        neg = False
+        if isinstance(e, ast.UnaryOp) and isinstance(e.op, ast.USub):
+            e, neg = e.operand, True
+        if isinstance(e, ast.Constant) and isinstance(e.value, int) \
+                and not isinstance(e.value, bool):
+            return -e.value if neg else e.value
+        return None
+
+    @staticmethod
+    def _isRef(e : ast.expr) -> bool:
+        if not isinstance(e, ast.Attribute):
+            return False
+        while isinstance(e, ast.Attribute):
+            e = e.value
+        return isinstance(e, ast.Name) and e.id == "self"
@@ -0,0 +1,287 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import dataclasses as dc
+import enum
+import logging
+import zuspec.dataclasses as zdc
+from typing import Callable, ClassVar, Dict, List, Optional, Set, Tuple
+from .analysis import Analyzer, FieldKind
+from .cache import WeakLruCache
+from .member_catalog import MemberCatalog
+from .static_path import NamePath, StaticPath
+from .visitor import _BindPathMock
+
+# Field-index path from the root component
+IndexPath = Tuple[int, ...]
+
+class _Role(enum.Enum):
+    Driver = enum.auto()
+    Sink = enum.auto()
+    Unknown = enum.auto()
+
+@dc.dataclass
+class Connection(object):
+    driver : IndexPath = dc.field()
+    sink : IndexPath = dc.field()
+    # Instance whose binds declare the connection
+    inst : IndexPath = dc.field()
+
+@dc.dataclass
+class _TypeBinds(object):
+    """Binds and ports of a component type, relative to its instance"""
+    # (sink, driver) pairs
+    binds : Tuple[Tuple[IndexPath, IndexPath], ...] = dc.field(default_factory=tuple)
+    conflicts : Tuple[str, ...] = dc.field(default_factory=tuple)
+    children : Tuple[Tuple[int, type], ...] = dc.field(default_factory=tuple)
+    ports : Tuple[Tuple[int, FieldKind], ...] = dc.field(default_factory=tuple)
+
+@dc.dataclass
+class ConnectivityGraph(object):
+    """
+    Flattened netlist of a component hierarchy, built from the binds of
+    every component instance. Bind maps come from each class's
+    ``__bind__`` method (eg ``return {self.a.i: self.b.o}``) by default.
+
+    Bind paths are resolved to field indices once per component type.
+    Each instance then only offsets the resolved paths by its own index
+    path. Ports (index paths from the root) are interned to integer
+    nodes, and connections are stored in flat arrays indexed by driver,
+    sink and declaring instance.
+
+    Binds are directional. The driver is the child-instance output or
+    own input, and the sink is the child-instance input or own output.
+    When neither side is a port, the key is taken to be the sink.
+    """
+    root : type = dc.field()
+    inst_paths : List[IndexPath] = dc.field(default_factory=list)
+    inst_types : List[type] = dc.field(default_factory=list)
+    node_paths : List[IndexPath] = dc.field(default_factory=list)
+    conn_driver : List[int] = dc.field(default_factory=list)
+    conn_sink : List[int] = dc.field(default_factory=list)
+    conn_inst : List[int] = dc.field(default_factory=list)
+    # Bind-direction problems (both sides drivers or both sinks)
+    errors : List[str] = dc.field(default_factory=list)
+    _node_m : Dict[IndexPath, int] = dc.field(default_factory=dict)
+    _inst_m : Dict[IndexPath, int] = dc.field(default_factory=dict)
+    _by_driver : Dict[int, List[int]] = dc.field(default_factory=dict)
+    _by_sink : Dict[int, List[int]] = dc.field(default_factory=dict)
+    _by_inst : List[List[int]] = dc.field(default_factory=list)
+    _ports_m : Dict[type, Tuple[Tuple[int, FieldKind], ...]] = dc.field(default_factory=dict)
+
+    _binds_m : ClassVar = WeakLruCache("connectivity.binds")
+    _log : ClassVar = logging.getLogger("ConnectivityGraph")
+
+    @classmethod
+    def build(cls,
+              root : type,
+              binds : Optional[Callable[[type], Optional[Callable]]] = None,
+              analyzer : Optional[Analyzer] = None) -> 'ConnectivityGraph':
+        """
+        Builds the graph for component type 'root'. 'binds' optionally
+        returns the bind lambda of a type, in place of its ``__bind__``
+        """
+        if analyzer is None:
+            analyzer = Analyzer.inst()
+        cls._log.debug("--> build: %s" % root.__qualname__)
+        ret = ConnectivityGraph(root=root)
+        local_m : Dict[type, _TypeBinds] = {}
+
+        stack : List[Tuple[IndexPath, type]] = [((), root)]
+        while len(stack) > 0:
+            path, t = stack.pop()
+            inst = len(ret.inst_paths)
+            ret.inst_paths.append(path)
+            ret.inst_types.append(t)
+            ret._inst_m[path] = inst
+            ret._by_inst.append([])
+
+            if binds is None:
+                tb = cls._binds_m.get(t, None)
+                if tb is None:
+                    tb = cls._mkTypeBinds(t, getattr(t, "__bind__", None), analyzer)
+                    cls._binds_m[t] = tb
+            else:
+                tb = local_m.get(t, None)
+                if tb is None:
+                    tb = cls._mkTypeBinds(t, binds(t), analyzer)
+                    local_m[t] = tb
+
+            ret._ports_m[t] = tb.ports
+            for err in tb.conflicts:
+                ret.errors.append("%s: %s" % (ret.pathName(path), err))
+            for sink, driver in tb.binds:
+                ret._connect(ret._node(path + driver), ret._node(path + sink), inst)
+            for idx, ct in reversed(tb.children):
+                stack.append((path + (idx,), ct))
+
+        cls._log.debug("<-- build: %d instances %d connections" % (
+            len(ret.inst_paths), len(ret.conn_driver)))
+        return ret
+
+    @classmethod
+    def boundFields(cls, t : type, analyzer : Optional[Analyzer] = None) -> Set[int]:
+        """Returns indices of the fields of 't' that its own binds connect"""
+        if analyzer is None:
+            analyzer = Analyzer.inst()
+        tb = cls._binds_m.get(t, None)
+        if tb is None:
+            tb = cls._mkTypeBinds(t, getattr(t, "__bind__", None), analyzer)
+            cls._binds_m[t] = tb
+        return {p[0] for pair in tb.binds for p in pair}
+
+    @classmethod
+    def _mkTypeBinds(cls, t : type, bind_f : Optional[Callable], analyzer : Analyzer) -> _TypeBinds:
+        fields = analyzer.fieldInfos(t)
+        ret = _TypeBinds(
+            children=tuple(
+                (f.index, f.type) for f in fields
+                if f.kind == FieldKind.Data and isinstance(f.type, type)
+                and issubclass(f.type, zdc.Component)),
+            ports=tuple((f.index, f.kind) for f in fields if f.is_port))
+        if bind_f is None:
+            return ret
+
+        pairs = StaticPath.decodeBinds(bind_f)
+        if pairs is None:
+            mapping = bind_f(_BindPathMock(t, ["s"]))
+            pairs = tuple(
+                (cls._mockPath(k), cls._mockPath(v)) for k, v in mapping.items())
+
+        binds = []
+        conflicts = []
+        for k_names, v_names in pairs:
+            k_idx, k_role = cls._resolveEnd(t, k_names, analyzer)
+            v_idx, v_role = cls._resolveEnd(t, v_names, analyzer)
+            if k_role == v_role and k_role != _Role.Unknown:
+                conflicts.append("bind %s <-> %s connects two %ss" % (
+                    ".".join(("s",) + k_names), ".".join(("s",) + v_names),
+                    k_role.name.lower()))
+            if k_role == _Role.Driver or v_role == _Role.Sink:
+                binds.append((v_idx, k_idx))
+            else:
+                binds.append((k_idx, v_idx))
+        ret.binds = tuple(binds)
+        ret.conflicts = tuple(conflicts)
+        return ret
+
+    @staticmethod
+    def _resolveEnd(t : type, names : NamePath, analyzer : Analyzer) -> Tuple[IndexPath, _Role]:
+        indices, fields = StaticPath.resolve(t, names)
+        if len(indices) == 0:
+            raise Exception("Empty bind path")
+        parent_t = t if len(fields) == 1 else fields[-2].type
+        kind = analyzer.fieldInfos(parent_t)[indices[-1]].kind
+        is_child = len(indices) > 1
+        if kind == FieldKind.Output:
+            role = _Role.Driver if is_child else _Role.Sink
+        elif kind == FieldKind.Input:
+            role = _Role.Sink if is_child else _Role.Driver
+        else:
+            role = _Role.Unknown
+        return indices, role
+
+    @staticmethod
+    def _mockPath(m) -> NamePath:
+        if not isinstance(m, _BindPathMock):
+            raise ValueError("Bind keys/values must be static paths")
+        return tuple(object.__getattribute__(m, "_path")[1:])
+
+    def _node(self, path : IndexPath) -> int:
+        ret = self._node_m.get(path, None)
+        if ret is None:
+            ret = len(self.node_paths)
+            self.node_paths.append(path)
+            self._node_m[path] = ret
+        return ret
+
+    def _connect(self, driver : int, sink : int, inst : int):
+        c = len(self.conn_driver)
+        self.conn_driver.append(driver)
+        self.conn_sink.append(sink)
+        self.conn_inst.append(inst)
+        self._by_driver.setdefault(driver, []).append(c)
+        self._by_sink.setdefault(sink, []).append(c)
+        self._by_inst[inst].append(c)
+
+    @property
+    def num_connections(self) -> int:
+        return len(self.conn_driver)
+
+    def connection(self, c : int) -> Connection:
+        return Connection(
+            driver=self.node_paths[self.conn_driver[c]],
+            sink=self.node_paths[self.conn_sink[c]],
+            inst=self.inst_paths[self.conn_inst[c]])
+
+    def driversOf(self, path : IndexPath) -> List[IndexPath]:
+        node = self._node_m.get(path, None)
+        return [self.node_paths[self.conn_driver[c]]
+                for c in self._by_sink.get(node, ())]
+
+    def sinksOf(self, path : IndexPath) -> List[IndexPath]:
+        node = self._node_m.get(path, None)
+        return [self.node_paths[self.conn_sink[c]]
+                for c in self._by_driver.get(node, ())]
+
+    def connectionsOf(self, inst_path : IndexPath) -> List[Connection]:
+        """Returns the connections declared by an instance's binds"""
+        inst = self._inst_m.get(inst_path, None)
+        if inst is None:
+            return []
+        return [self.connection(c) for c in self._by_inst[inst]]
+
+    def multipleDrivers(self) -> Dict[IndexPath, List[IndexPath]]:
+        """Returns sinks with more than one driver, with their drivers"""
+        ret = {}
+        for sink, conns in self._by_sink.items():
+            if len(conns) > 1:
+                ret[self.node_paths[sink]] = [
+                    self.node_paths[self.conn_driver[c]] for c in conns]
+        return ret
+
+    def unconnectedPorts(self) -> List[IndexPath]:
+        """Returns ports of sub-instances that are not bound to anything"""
+        return self._childPorts(
+            lambda node, kind: node is None or (
+                node not in self._by_driver and node not in self._by_sink))
+
+    def undrivenInputs(self) -> List[IndexPath]:
+        """Returns input ports of sub-instances that have no driver"""
+        return self._childPorts(
+            lambda node, kind: kind == FieldKind.Input and node not in self._by_sink)
+
+    def _childPorts(self, match : Callable) -> List[IndexPath]:
+        ret = []
+        for inst in range(1, len(self.inst_paths)):
+            path = self.inst_paths[inst]
+            for idx, kind in self._ports_m[self.inst_types[inst]]:
+                p = path + (idx,)
+                if match(self._node_m.get(p, None), kind):
+                    ret.append(p)
+        return ret
+
+    def indexPath(self, names : NamePath) -> IndexPath:
+        """Maps a name path from the root to an index path"""
+        return StaticPath.resolve(self.root, tuple(names))[0]
+
+    def pathName(self, path : IndexPath) -> str:
+        names = ["s"]
+        t = self.root
+        for idx in path:
+            f = MemberCatalog.get(t).fields[idx]
+            names.append(f.name)
+            t = f.type
+        return ".".join(names)
@@ -1,7 +1,16 @@
 
+import collections
 import dataclasses as dc
+import weakref
 import zuspec.dm as dm
-from typing import Any, List
+from typing import Any, Dict, List, Optional
+from .dm_overlay import DmOverlay
+
+def _chain(m, local):
+    """Returns a mapping that reads through to 'm' and writes to 'local'"""
+    if isinstance(m, collections.ChainMap):
+        return collections.ChainMap(local, *m.maps)
+    return collections.ChainMap(local, m)
 
 @dc.dataclass
 class Scope(object):
@@ -16,6 +25,20 @@ class Context(object):
     ctxt : dm.Context = dc.field()
     scope_s : List[Scope] = dc.field(default_factory=list)
     _result : Any = dc.field(default=None)
+    # Lowered type per Python class, and per (unique) type name
+    _type_m : weakref.WeakKeyDictionary = dc.field(
+        default_factory=weakref.WeakKeyDictionary)
+    _struct_m : Dict[str, Any] = dc.field(default_factory=dict)
+    # Structural fingerprint <-> lowered type, and alias names per type.
+    # Types are keyed by id(), since they stay alive in _struct_m
+    _fingerprint_m : Dict[str, Any] = dc.field(default_factory=dict)
+    _type_fingerprint_m : Dict[int, str] = dc.field(default_factory=dict)
+    _alias_m : Dict[int, List[str]] = dc.field(default_factory=dict)
+    # Original -> lowered field index, per class whose fields were pruned
+    _index_m : weakref.WeakKeyDictionary = dc.field(
+        default_factory=weakref.WeakKeyDictionary)
+    # Set by snapshot(). A frozen context is only read (by its forks)
+    _frozen : bool = dc.field(default=False)
 
     def push_scope(self, s : Scope):
         self.scope_s.append(s)
@@ -34,6 +57,98 @@ class Context(object):
     def setResult(self, r : Any) -> None:
         self._result = r
 
+    def findComponentType(self, t : type) -> Optional[Any]:
+        """Returns the type already lowered for class 't', if any"""
+        return self._type_m.get(t, None)
+
+    def addComponentType(self, t : type, name : str, dt : Any, fingerprint : Optional[str] = None):
+        self._checkMutable()
+        self._type_m[t] = dt
+        self._struct_m[name] = dt
+        if fingerprint is not None:
+            self._fingerprint_m.setdefault(fingerprint, dt)
+            self._type_fingerprint_m[id(dt)] = fingerprint
+
+    def addComponentAlias(self, t : type, name : str, dt : Any):
+        """Registers class 't' (named 'name') as lowering to existing type 'dt'"""
+        self._checkMutable()
+        self._type_m[t] = dt
+        self._struct_m[name] = dt
+        # Copied, rather than appended to, so a fork leaves its base unchanged
+        self._alias_m[id(dt)] = self.aliases(dt) + [name]
+
+    def setFieldIndexMap(self, t : type, index_m : Dict[int, int]):
+        """Records that class 't' was lowered with its fields re-indexed"""
+        self._checkMutable()
+        self._index_m[t] = index_m
+
+    def fieldIndexMap(self, t : type) -> Optional[Dict[int, int]]:
+        """Returns the field index map of 't', or None if not re-indexed"""
+        return self._index_m.get(t, None)
+
+    def findComponentTypeByFingerprint(self, fingerprint : str) -> Optional[Any]:
+        return self._fingerprint_m.get(fingerprint, None)
+
+    def fingerprint(self, dt : Any) -> Optional[str]:
+        """Returns the structural fingerprint of a lowered component type"""
+        return self._type_fingerprint_m.get(id(dt), None)
+
+    def aliases(self, dt : Any) -> List[str]:
+        """Returns the names of classes deduplicated onto 'dt'"""
+        return list(self._alias_m.get(id(dt), ()))
+
+    def findDataTypeStruct(self, name : str) -> Optional[Any]:
+        return self._struct_m.get(name, None)
+
+    def uniqueTypeName(self, name : str) -> str:
+        """Returns 'name', suffixed with '#<n>' if another class already uses it"""
+        ret = name
+        i = 2
+        while ret in self._struct_m:
+            ret = "%s#%d" % (name, i)
+            i += 1
+        return ret
+
+    @property
+    def frozen(self) -> bool:
+        return self._frozen
+
+    def snapshot(self) -> 'Context':
+        """
+        Freezes this context, typically after lowering a base library, so
+        that it can be forked. Returns the context
+        """
+        if len(self.scope_s) != 0:
+            raise RuntimeError("Cannot snapshot a context while lowering is in progress")
+        self._frozen = True
+        return self
+
+    def fork(self, ctxt : Optional[dm.Context] = None) -> 'Context':
+        """
+        Returns a new context that sees every type registered here, without
+        copying them. Types lowered in the fork are created in, and
+        registered with, 'ctxt' (by default, a new instance of the base
+        dm.Context's class) and are not visible to this context or to
+        other forks. Snapshots this context if not already frozen.
+        """
+        self.snapshot()
+        base = self.ctxt
+        if ctxt is None:
+            root = base.local if isinstance(base, DmOverlay) else base
+            ctxt = type(root)()
+        return Context(
+            ctxt=DmOverlay(ctxt, base),
+            _type_m=_chain(self._type_m, weakref.WeakKeyDictionary()),
+            _struct_m=_chain(self._struct_m, {}),
+            _fingerprint_m=_chain(self._fingerprint_m, {}),
+            _type_fingerprint_m=_chain(self._type_fingerprint_m, {}),
+            _alias_m=_chain(self._alias_m, {}),
+            _index_m=_chain(self._index_m, weakref.WeakKeyDictionary()))
+
+    def _checkMutable(self):
+        if self._frozen:
+            raise RuntimeError("Context is frozen. Add types to a fork() of it")
+
     def __call__(self):
         return self.ctxt
 
@@ -0,0 +1,47 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+
+class DmOverlay(object):
+    """
+    Stands in for the dm.Context of a forked front-end Context. Types are
+    created in, and registered with, the fork's own 'local' context.
+    Lookups (find*) that miss locally fall through to the 'base' context,
+    so types lowered before the fork are shared rather than copied.
+    """
+
+    def __init__(self, local, base):
+        self._local = local
+        self._base = base
+
+    @property
+    def local(self):
+        return self._local
+
+    @property
+    def base(self):
+        return self._base
+
+    def __getattr__(self, name):
+        local_f = getattr(self._local, name)
+        if not name.startswith("find"):
+            return local_f
+        base_f = getattr(self._base, name)
+        def _find(*args, **kwargs):
+            ret = local_f(*args, **kwargs)
+            if ret is None:
+                ret = base_f(*args, **kwargs)
+            return ret
+        return _find
@@ -0,0 +1,103 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import dataclasses as dc
+import logging
+from typing import ClassVar, Dict, List, Optional, Tuple
+from .analysis import Analyzer, SyncInfo
+from .connectivity import ConnectivityGraph, IndexPath
+
+@dc.dataclass
+class ClockDomain(object):
+    """Sync blocks, anywhere in a hierarchy, sharing a clock and reset source"""
+    clock : IndexPath = dc.field()
+    # None when the blocks have no reset
+    reset : Optional[IndexPath] = dc.field(default=None)
+    # (instance path, block) pairs, in instance order
+    syncs : List[Tuple[IndexPath, SyncInfo]] = dc.field(default_factory=list)
+
+@dc.dataclass
+class DomainMap(object):
+    """
+    Groups the sync blocks of a component hierarchy into clock domains.
+
+    Each block's clock and reset paths are made absolute by prefixing the
+    path of its instance, then canonicalized by following binds back to
+    their source: a port with exactly one driver is replaced by that
+    driver, until a port with no (or several) drivers is reached. Blocks
+    whose canonical clock and reset match are in the same domain, even
+    when declared in different components.
+    """
+    root : type = dc.field()
+    graph : ConnectivityGraph = dc.field()
+    domains : List[ClockDomain] = dc.field(default_factory=list)
+    _domain_m : Dict[Tuple[IndexPath, Optional[IndexPath]], ClockDomain] = dc.field(default_factory=dict)
+    _block_m : Dict[Tuple[IndexPath, str], ClockDomain] = dc.field(default_factory=dict)
+    _source_m : Dict[IndexPath, IndexPath] = dc.field(default_factory=dict)
+    _log : ClassVar = logging.getLogger("DomainMap")
+
+    @classmethod
+    def build(cls,
+              root : type,
+              graph : Optional[ConnectivityGraph] = None,
+              analyzer : Optional[Analyzer] = None) -> 'DomainMap':
+        if analyzer is None:
+            analyzer = Analyzer.inst()
+        if graph is None:
+            graph = ConnectivityGraph.build(root, analyzer=analyzer)
+        ret = DomainMap(root=root, graph=graph)
+
+        for path, t in zip(graph.inst_paths, graph.inst_types):
+            info = analyzer.analyze(t)
+            # Blocks of one instance that share a local domain also share
+            # a global one, so sources are resolved once per local domain
+            for d in info.domains:
+                clock = ret.source(path + d.clock.indices)
+                reset = ret.source(path + d.reset.indices) if len(d.reset.indices) else None
+                domain = ret._domain_m.get((clock, reset), None)
+                if domain is None:
+                    domain = ClockDomain(clock=clock, reset=reset)
+                    ret._domain_m[(clock, reset)] = domain
+                    ret.domains.append(domain)
+                for s in d.syncs:
+                    domain.syncs.append((path, s))
+                    ret._block_m[(path, s.name)] = domain
+
+        cls._log.debug("%s: %d domains" % (root.__qualname__, len(ret.domains)))
+        return ret
+
+    def source(self, path : IndexPath) -> IndexPath:
+        """Returns the canonical (source) path of signal 'path'"""
+        ret = self._source_m.get(path, None)
+        if ret is None:
+            ret = path
+            seen = {path}
+            while True:
+                drivers = self.graph.driversOf(ret)
+                if len(drivers) != 1 or drivers[0] in seen:
+                    break
+                ret = drivers[0]
+                seen.add(ret)
+            self._source_m[path] = ret
+        return ret
+
+    def domainOf(self, inst_path : IndexPath, sync : str) -> Optional[ClockDomain]:
+        """Returns the domain of sync block 'sync' of instance 'inst_path'"""
+        return self._block_m.get((tuple(inst_path), sync), None)
+
+    def domainsOf(self, clock : IndexPath) -> List[ClockDomain]:
+        """Returns the domains (one per reset) clocked by 'clock'"""
+        clock = self.source(tuple(clock))
+        return [d for d in self.domains if d.clock == clock]
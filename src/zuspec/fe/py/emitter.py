@@ -0,0 +1,84 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import ast
+import dataclasses as dc
+from typing import Any, Dict
+from .analysis import ComponentInfo, ExecInfo, FieldInfo, SyncInfo
+
+class Emitter(object):
+    """
+    Base class for backends. An emitter receives an analyzed component
+    and produces backend IR from it, without repeating the analysis.
+    """
+
+    def emit(self, info : ComponentInfo) -> Any:
+        self.enterComponent(info)
+        for f in info.fields:
+            self.emitField(f)
+        for s in info.syncs:
+            self.emitSync(s)
+        for e in info.execs:
+            self.emitExec(e)
+        return self.leaveComponent(info)
+
+    def enterComponent(self, info : ComponentInfo):
+        pass
+
+    def leaveComponent(self, info : ComponentInfo) -> Any:
+        return None
+
+    def emitField(self, f : FieldInfo):
+        pass
+
+    def emitSync(self, s : SyncInfo):
+        pass
+
+    def emitExec(self, e : ExecInfo):
+        pass
+
+@dc.dataclass
+class CountingEmitter(Emitter):
+    """Emitter that only counts what it is handed. Useful for benchmarking analysis"""
+    counts : Dict[str, int] = dc.field(default_factory=dict)
+
+    def _inc(self, kind : str, n : int = 1):
+        self.counts[kind] = self.counts.get(kind, 0) + n
+
+    def enterComponent(self, info : ComponentInfo):
+        self._inc("components")
+
+    def leaveComponent(self, info : ComponentInfo) -> Any:
+        return self.counts
+
+    def emitField(self, f : FieldInfo):
+        self._inc("fields")
+
+    def emitSync(self, s : SyncInfo):
+        self._inc("syncs")
+        self._countBody(s)
+
+    def emitExec(self, e : ExecInfo):
+        self._inc("execs")
+        self._countBody(e)
+
+    def _countBody(self, e : ExecInfo):
+        for s in e.body:
+            for n in ast.walk(s):
+                if isinstance(n, ast.stmt):
+                    self._inc("statements")
+                elif isinstance(n, ast.expr):
+                    self._inc("expressions")
+
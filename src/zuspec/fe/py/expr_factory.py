@@ -16,66 +16,161 @@
 import dataclasses as dc
 import ast
 import zuspec.dm as dm
-from typing import Any, Dict, Type
+from typing import Any, Callable, Dict, List, Optional, Tuple, cast
+from .context import Context, StructScope
+from .width_infer import DEFAULT_INT_WIDTH, WidthInference
+
+_BIN_OP_M : Dict[Any, dm.BinOp] = {
+    ast.Add: dm.BinOp.Add,
+    ast.Sub: dm.BinOp.Sub,
+    ast.Mult: dm.BinOp.Mul,
+    ast.Div: dm.BinOp.Div,
+    ast.Mod: dm.BinOp.Mod,
+    ast.BitAnd: dm.BinOp.BitAnd,
+    ast.BitOr: dm.BinOp.BitOr,
+    ast.BitXor: dm.BinOp.BitXor,
+    ast.LShift: dm.BinOp.Sll,
+    ast.RShift: dm.BinOp.Srl,
+    ast.Eq: dm.BinOp.Eq,
+    ast.NotEq: dm.BinOp.Ne,
+    ast.Lt: dm.BinOp.Lt,
+    ast.LtE: dm.BinOp.Le,
+    ast.Gt: dm.BinOp.Gt,
+    ast.GtE: dm.BinOp.Ge,
+    ast.And: dm.BinOp.LogAnd,
+    ast.Or: dm.BinOp.LogOr
+}
 
 @dc.dataclass
 class ExprFactory(object):
-    ctxt : dm.Context = dc.field()
+    """
+    Lowers Python expressions to dm expressions. Lowering is iterative,
+    using an explicit work stack, so that very deep (eg generated
+    left-leaning) expression trees are handled in linear time without
+    hitting the Python recursion limit.
+    """
+    ctxt : Context = dc.field()
 
     def build(self, e : ast.expr) -> dm.TypeExpr:
+        # Post-order traversal. Each work item is (node, arity); arity is
+        # None until the node's operands have been scheduled
+        work : List[Tuple[ast.expr, Any]] = [(e, None)]
+        vals : List[dm.TypeExpr] = []
+        while len(work) > 0:
+            n, arity = work.pop()
+            if arity is None:
+                reason = self.unsupported(n)
+                if reason is not None:
+                    raise NotImplementedError("%s (line %d)" % (
+                        reason[1], getattr(n, "lineno", -1)))
+                operands = self.operands(n)
+                if len(operands) == 0:
+                    vals.append(self._buildLeaf(n))
+                else:
+                    work.append((n, len(operands)))
+                    for o in reversed(operands):
+                        work.append((o, None))
+            else:
+                args = vals[len(vals)-arity:]
+                del vals[len(vals)-arity:]
+                vals.append(self._buildNode(n, args))
+        return vals[0]
+
+    @staticmethod
+    def unsupported(e : ast.expr) -> Optional[Tuple[str, str]]:
+        """
+        Returns (construct, message) if node 'e' itself, apart from its
+        operands, can't be lowered. build() checks each node with this,
+        and SupportScanner reports from it, so the two agree
+        """
         if isinstance(e, ast.BinOp):
-            return self._buildBinExpr(e)
-        elif isinstance(e, ast.UnaryOp):
+            if type(e.op) not in _BIN_OP_M:
+                return "operator", "Unsupported operator %s" % type(e.op).__name__
+        elif isinstance(e, ast.BoolOp):
             pass
-        elif isinstance(e, ast.Name):
-            return self._buildNameRef(e)
+        elif isinstance(e, ast.Compare):
+            if len(e.ops) != 1:
+                return "expression", "Chained comparison"
+            elif type(e.ops[0]) not in _BIN_OP_M:
+                return "operator", "Unsupported operator %s" % type(e.ops[0]).__name__
+        elif isinstance(e, ast.UnaryOp):
+            # No unary expression is lowered to dm yet. Unary plus is a no-op
+            if not isinstance(e.op, ast.UAdd):
+                return "operator", "Unsupported operator %s" % type(e.op).__name__
         elif isinstance(e, ast.Attribute):
+            if not isinstance(e.value, ast.Name) or e.value.id != "self":
+                return "attribute", "Only 'self.<field>' attribute access is supported"
+        elif isinstance(e, ast.Constant):
+            if not isinstance(e.value, int):
+                return "constant", "Unsupported constant type %s" % type(e.value).__name__
+        elif isinstance(e, ast.Name):
+            return "name", "Reference to '%s': local variables are not supported" % e.id
+        else:
+            return "expression", "Unsupported expression %s" % type(e).__name__
+        return None
+
+    @staticmethod
+    def operands(e : ast.expr) -> List[ast.expr]:
+        if isinstance(e, ast.BinOp):
+            return [e.left, e.right]
+        elif isinstance(e, ast.BoolOp):
+            return e.values
+        elif isinstance(e, ast.Compare):
+            return [e.left] + e.comparators
+        elif isinstance(e, ast.UnaryOp):
+            return [e.operand]
+        return []
+
+    def _buildLeaf(self, e : ast.expr) -> dm.TypeExpr:
+        if isinstance(e, ast.Attribute):
             return self._buildAttrRef(e)
+        elif isinstance(e, ast.Constant) and isinstance(e.value, int):
+            return self._buildConstant(e)
+        else:
+            raise NotImplementedError("Expression type %s (%s)" % (
+                type(e), str(e)
+            ))
+
+    def _buildNode(self, e : ast.expr, args : List[dm.TypeExpr]) -> dm.TypeExpr:
+        if isinstance(e, ast.BinOp):
+            return self._buildBinExpr(e, e.op, args[0], args[1])
+        elif isinstance(e, ast.Compare):
+            return self._buildBinExpr(e, e.ops[0], args[0], args[1])
+        elif isinstance(e, ast.BoolOp):
+            # Fold 'a and b and c' to a left-leaning chain
+            ret = args[0]
+            for a in args[1:]:
+                ret = self._buildBinExpr(e, e.op, ret, a)
+            return ret
+        elif isinstance(e, ast.UnaryOp):
+            # Only unary plus is accepted, and it lowers to its operand
+            return args[0]
         else:
             raise NotImplementedError("Expression type %s (%s)" % (
                 type(e), str(e)
             ))
-        pass
 
     def _buildAttrRef(self, e : ast.Attribute) -> dm.TypeExprRef:
-        pass
+        scope = cast(StructScope, self.ctxt.scope)
+        idx = scope.scope.fieldIndex(e.attr)
+        return self.ctxt().mkTypeExprRefField(self.ctxt().mkTypeExprRefSelf(), idx)
 
-    def _buildBinExpr(self, e : ast.BinOp) -> dm.TypeExprBin:
-        op_map : Dict[Any, dm.BinOp] = {
-            ast.Add: dm.BinOp.Add,
-            ast.Sub: dm.BinOp.Sub,
-            ast.Mult: dm.BinOp.Mul,
-            ast.Div: dm.BinOp.Div,
-            ast.Mod: dm.BinOp.Mod,
-            ast.BitAnd: dm.BinOp.BitAnd,
-            ast.BitOr: dm.BinOp.BitOr,
-            ast.BitXor: dm.BinOp.BitXor,
-            ast.LShift: dm.BinOp.Sll,
-            ast.RShift: dm.BinOp.Srl,
-            ast.Eq: dm.BinOp.Eq,
-            ast.NotEq: dm.BinOp.Ne,
-            ast.Lt: dm.BinOp.Lt,
-            ast.LtE: dm.BinOp.Le,
-            ast.Gt: dm.BinOp.Gt,
-            ast.GtE: dm.BinOp.Ge,
-            ast.And: dm.BinOp.LogAnd,
-            ast.Or: dm.BinOp.LogOr
-        }
-        if e.op not in op_map.keys():
-            raise NotImplementedError(f"Unsupported BinOp: {type(e.op)}")
+    def _buildConstant(self, e : ast.Constant) -> dm.TypeExpr:
+        # Sized to context, as inferred for the enclosing component
+        scope = cast(StructScope, self.ctxt.scope)
+        w = WidthInference.get(scope.scope).get(e, None)
+        width, signed = (DEFAULT_INT_WIDTH, True) if w is None else (w.width, w.signed)
+        return self.ctxt().mkTypeExprVal(
+            self.ctxt().mkValRefInt(int(e.value), signed, width))
 
-        lhs = ExprFactory(self.ctxt).build(e.left)
-        rhs = ExprFactory(self.ctxt).build(e.right)
+    def _buildBinExpr(self, e : ast.expr, op, lhs : dm.TypeExpr, rhs : dm.TypeExpr) -> dm.TypeExprBin:
+        if type(op) not in _BIN_OP_M.keys():
+            raise NotImplementedError(f"Unsupported BinOp: {type(op)}")
 
-        loc = dm.Loc(line=e.lineno, pos=e.col_offset)
+        loc = dm.Loc(line=getattr(e, "lineno", -1), pos=getattr(e, "col_offset", -1))
 
-        return self.ctxt.mkTypeExprBin(
+        return self.ctxt().mkTypeExprBin(
             lhs, 
-            op_map[e.op], 
+            _BIN_OP_M[type(op)], 
             rhs,
             loc)
-    
-    def _buildNameRef(self, e : ast.Name) -> dm.TypeExpr:
-        pass
-
-    pass
\ No newline at end of file
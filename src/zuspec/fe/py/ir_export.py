@@ -0,0 +1,557 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+"""
+Flat binary export of analyzed components, for consumers in other
+processes.
+
+File layout (all integers little-endian, sections 8-byte aligned)::
+
+    header   magic 'ZSIR', version, counts, root node, section offsets
+    nodes    fixed-size records (see _NODE), referenced by index
+    edges    u32 array. A node's children are edges[first:first+n]
+    stroff   u64 array of n_strings+1 offsets into the string blob
+    strblob  UTF-8 string data
+
+Nodes are written children-first, so every reference points backward.
+For Path nodes, the edges hold field indices rather than node indices.
+For expression nodes, 'aux' holds the inferred width, with bit 31 set
+when the expression is signed.
+
+A Field node's single child is its type: the Component node of a
+sub-component (shared by every field of that type), or a Type node
+naming any other type. For zdc.Bit fields, 'aux' holds the width.
+Sub-components are exported along with the requested components; the
+Design node lists only the latter.
+
+A match over constant cases (see CaseRecognizer.recognizeMatch) is a
+Switch node. Its children are the subject expression, one Case node per
+case and, when 'tag' is 1, the default Block. 'aux' holds the number of
+cases. A Case node's children are one Constant node per key, followed
+by its body Block, and 'aux' holds the number of keys. Other matches
+are written as Unsupported.
+"""
+import ast
+import dataclasses as dc
+import enum
+import logging
+import mmap
+import struct
+from array import array
+from typing import Any, ClassVar, Dict, Iterable, List, Optional, Tuple
+from .analysis import Analyzer, ComponentInfo, ExecInfo, FieldInfo, PathRef, SyncInfo
+from .case_table import CaseRecognizer
+from .emitter import Emitter
+from .width_infer import ExprWidth, WidthInference
+
+IR_MAGIC = b"ZSIR"
+IR_VERSION = 4
+
+_HDR = struct.Struct("<4sHHIIIIQQQQ")
+# kind, tag, value, first edge, num edges, line, col, aux
+_NODE = struct.Struct("<HHqIIIII")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+NONE_IDX = 0xFFFFFFFF
+SIGNED_BIT = 0x80000000
+
+class IrKind(enum.IntEnum):
+    Design = 1
+    Component = 2
+    Field = 3
+    Sync = 4
+    Exec = 5
+    Path = 6
+    Block = 7
+    If = 8
+    Assign = 9
+    AugAssign = 10
+    Pass = 11
+    Name = 12
+    Attribute = 13
+    Constant = 14
+    BinOp = 15
+    BoolOp = 16
+    UnaryOp = 17
+    Compare = 18
+    Unsupported = 19
+    Type = 20
+    Switch = 21
+    Case = 22
+
+# Operator tag is the index of the operator's AST class name
+IR_OPS : Tuple[str, ...] = (
+    "Add", "Sub", "Mult", "MatMult", "Div", "FloorDiv", "Mod", "Pow",
+    "LShift", "RShift", "BitOr", "BitXor", "BitAnd",
+    "And", "Or",
+    "Not", "Invert", "UAdd", "USub",
+    "Eq", "NotEq", "Lt", "LtE", "Gt", "GtE", "Is", "IsNot", "In", "NotIn")
+_OP_M : Dict[str, int] = {n : i for i, n in enumerate(IR_OPS)}
+
+class IrConst(enum.IntEnum):
+    """Tag of Constant nodes"""
+    Int = 0
+    Bool = 1
+    NoneV = 2
+    Str = 3
+
+class IrSyncFlags(enum.IntFlag):
+    """Tag of Sync nodes"""
+    ResetSplit = 1
+    ActiveLow = 2
+
+# Kinds whose value is a string-table index
+_NAMED_KINDS = frozenset((
+    IrKind.Component, IrKind.Field, IrKind.Sync, IrKind.Exec, IrKind.Path,
+    IrKind.Name, IrKind.Attribute, IrKind.Unsupported, IrKind.Type))
+
+_EXPR_KINDS = frozenset((
+    IrKind.Name, IrKind.Attribute, IrKind.Constant, IrKind.BinOp,
+    IrKind.BoolOp, IrKind.UnaryOp, IrKind.Compare))
+
+class _Block(list):
+    pass
+
+class _Case(object):
+    """Keys and body of one case of a recognized match"""
+    def __init__(self, keys : Tuple[int, ...], body : List[ast.stmt], loc : ast.AST):
+        self.keys = keys
+        self.body = body
+        self.loc = loc
+        self.lineno, self.col_offset = loc.lineno, loc.col_offset
+
+def _align(n : int) -> int:
+    return (n + 7) & ~7
+
+@dc.dataclass
+class IrExporter(Emitter):
+    """
+    Writes analyzed components to the flat binary format. Statements and
+    expressions are written from the analyzed AST without recursion.
+    Each toBytes call produces a self-contained image.
+    """
+    analyzer : Optional[Analyzer] = dc.field(default=None)
+    # Component node of each exported type
+    _comp_m : Dict[type, int] = dc.field(default_factory=dict, init=False)
+    _nodes : bytearray = dc.field(default_factory=bytearray, init=False)
+    _num_nodes : int = dc.field(default=0, init=False)
+    _edges : array = dc.field(default_factory=lambda: array("I"), init=False)
+    _strings : List[bytes] = dc.field(default_factory=list, init=False)
+    _string_m : Dict[str, int] = dc.field(default_factory=dict, init=False)
+    _comp_children : List[int] = dc.field(default_factory=list, init=False)
+    _widths : Dict[ast.expr, ExprWidth] = dc.field(default_factory=dict, init=False)
+    _log : ClassVar = logging.getLogger("IrExporter")
+
+    def __post_init__(self):
+        if self.analyzer is None:
+            self.analyzer = Analyzer.inst()
+
+    def export(self, types : Iterable[type], path : str):
+        """Analyzes and writes the component types 'types' to 'path'"""
+        data = self.toBytes(types)
+        with open(path, "wb") as fp:
+            fp.write(data)
+
+    def toBytes(self, types : Iterable[type]) -> bytes:
+        self._reset()
+        comps = [self._exportType(t) for t in types]
+        root = self._addNode(IrKind.Design, children=comps)
+        return self._pack(root)
+
+    def _reset(self):
+        self._nodes = bytearray()
+        self._num_nodes = 0
+        self._edges = array("I")
+        self._strings = []
+        self._string_m = {}
+        self._comp_m = {}
+
+    def _exportType(self, t : type) -> int:
+        # Sub-components are exported first, so that field type references
+        # point backward. Post-order, with an explicit work stack
+        work : List[Tuple[type, bool]] = [(t, False)]
+        active = set()
+        while len(work) > 0:
+            c, expanded = work.pop()
+            if c in self._comp_m:
+                continue
+            info = self.analyzer.analyze(c)
+            if expanded:
+                active.discard(c)
+                self._comp_m[c] = self.emit(info)
+                continue
+            if c in active:
+                raise Exception("Component %s contains itself" % info.name)
+            active.add(c)
+            work.append((c, True))
+            for f in reversed(info.fields):
+                if f.is_component and f.type not in self._comp_m:
+                    work.append((f.type, False))
+        return self._comp_m[t]
+
+    def enterComponent(self, info : ComponentInfo):
+        self._comp_children = []
+        self._widths = WidthInference.get(info)
+
+    def leaveComponent(self, info : ComponentInfo) -> int:
+        return self._addNode(
+            IrKind.Component,
+            value=self._str(info.name),
+            children=self._comp_children)
+
+    def emitField(self, f : FieldInfo):
+        if f.is_component:
+            type_n = self._comp_m[f.type]
+        else:
+            type_n = self._addNode(
+                IrKind.Type,
+                value=self._str(getattr(f.type, "__qualname__", str(f.type))))
+        self._comp_children.append(self._addNode(
+            IrKind.Field,
+            tag=f.kind.value,
+            value=self._str(f.name),
+            children=[type_n],
+            aux=0 if f.width is None else f.width))
+
+    def emitSync(self, s : SyncInfo):
+        children = [
+            self._addPath(s.clock),
+            self._addPath(s.reset),
+            self._addTree(_Block(s.body), s)]
+        flags = 0
+        if s.reset_split is not None:
+            flags |= IrSyncFlags.ResetSplit
+            if s.reset_split.active_low:
+                flags |= IrSyncFlags.ActiveLow
+            children.append(self._addTree(_Block(s.reset_split.reset_body), s))
+            children.append(self._addTree(_Block(s.reset_split.update_body), s))
+        self._comp_children.append(self._addExecNode(IrKind.Sync, s, int(flags), children))
+
+    def emitExec(self, e : ExecInfo):
+        self._comp_children.append(self._addExecNode(
+            IrKind.Exec, e, 0, [self._addTree(_Block(e.body), e)]))
+
+    def _addExecNode(self, kind, e : ExecInfo, tag, children) -> int:
+        return self._addNode(
+            kind,
+            tag=tag,
+            value=self._str(e.name),
+            children=children,
+            line=max(e.line, 0),
+            aux=NONE_IDX if e.file is None else self._str(e.file))
+
+    def _addPath(self, p : PathRef) -> int:
+        return self._addNode(
+            IrKind.Path,
+            value=self._str(".".join(p.names)),
+            children=p.indices)
+
+    def _addTree(self, root, e : ExecInfo) -> int:
+        # Post-order, with an explicit work stack. Each work item is
+        # (node, arity); arity is None until the children are scheduled
+        base_line = max(e.line, 1) - 1
+        indent = e.indent
+        work : List[Tuple[Any, Optional[int]]] = [(root, None)]
+        ids : List[int] = []
+        while len(work) > 0:
+            n, arity = work.pop()
+            if arity is None:
+                children = self._astChildren(n)
+                work.append((n, len(children)))
+                for c in reversed(children):
+                    work.append((c, None))
+            else:
+                child_ids = ids[len(ids)-arity:]
+                del ids[len(ids)-arity:]
+                ids.append(self._addAstNode(n, child_ids, base_line, indent))
+        return ids[0]
+
+    @staticmethod
+    def _astChildren(n) -> List[Any]:
+        if isinstance(n, _Block):
+            return n
+        elif isinstance(n, ast.If):
+            return [n.test, _Block(n.body), _Block(n.orelse)]
+        elif isinstance(n, ast.Match):
+            table = CaseRecognizer.recognizeMatch(n)
+            if table is None:
+                return []
+            pattern_m = {id(c.body) : c.pattern for c in n.cases}
+            ret = [table.subject]
+            ret.extend(_Case(keys, body, pattern_m[id(body)]) for keys, body in table.cases)
+            if table.default is not None:
+                ret.append(_Block(table.default))
+            return ret
+        elif isinstance(n, _Case):
+            return [ast.copy_location(ast.Constant(value=k), n.loc) for k in n.keys] \
+                + [_Block(n.body)]
+        elif isinstance(n, ast.Assign):
+            return n.targets + [n.value]
+        elif isinstance(n, ast.AugAssign):
+            return [n.target, n.value]
+        elif isinstance(n, ast.Attribute):
+            return [n.value]
+        elif isinstance(n, ast.BinOp):
+            return [n.left, n.right]
+        elif isinstance(n, ast.BoolOp):
+            return n.values
+        elif isinstance(n, ast.UnaryOp):
+            return [n.operand]
+        elif isinstance(n, ast.Compare) and len(n.ops) == 1:
+            return [n.left, n.comparators[0]]
+        return []
+
+    def _addAstNode(self, n, children : List[int], base_line : int, indent : int) -> int:
+        line, col = 0, 0
+        if hasattr(n, "lineno"):
+            line, col = base_line + n.lineno, indent + n.col_offset
+
+        kind, tag, value, aux = IrKind.Unsupported, 0, 0, 0
+        if isinstance(n, _Block):
+            kind = IrKind.Block
+        elif isinstance(n, ast.If):
+            kind = IrKind.If
+        elif isinstance(n, ast.Match):
+            table = CaseRecognizer.recognizeMatch(n)
+            if table is not None:
+                kind, tag, aux = IrKind.Switch, int(table.default is not None), len(table.cases)
+        elif isinstance(n, _Case):
+            kind, aux = IrKind.Case, len(n.keys)
+        elif isinstance(n, ast.Assign):
+            kind, aux = IrKind.Assign, len(n.targets)
+        elif isinstance(n, ast.AugAssign):
+            kind, tag = IrKind.AugAssign, self._op(n.op)
+        elif isinstance(n, ast.Pass):
+            kind = IrKind.Pass
+        elif isinstance(n, ast.Name):
+            kind, value = IrKind.Name, self._str(n.id)
+        elif isinstance(n, ast.Attribute):
+            kind, value = IrKind.Attribute, self._str(n.attr)
+        elif isinstance(n, ast.BinOp):
+            kind, tag = IrKind.BinOp, self._op(n.op)
+        elif isinstance(n, ast.BoolOp):
+            kind, tag = IrKind.BoolOp, self._op(n.op)
+        elif isinstance(n, ast.UnaryOp):
+            kind, tag = IrKind.UnaryOp, self._op(n.op)
+        elif isinstance(n, ast.Compare) and len(n.ops) == 1:
+            kind, tag = IrKind.Compare, self._op(n.ops[0])
+        elif isinstance(n, ast.Constant) and isinstance(n.value, bool):
+            kind, tag, value = IrKind.Constant, IrConst.Bool, int(n.value)
+        elif isinstance(n, ast.Constant) and isinstance(n.value, int) \
+                and -(1 << 63) <= n.value < (1 << 63):
+            kind, tag, value = IrKind.Constant, IrConst.Int, n.value
+        elif isinstance(n, ast.Constant) and n.value is None:
+            kind, tag = IrKind.Constant, IrConst.NoneV
+        elif isinstance(n, ast.Constant) and isinstance(n.value, str):
+            kind, tag, value = IrKind.Constant, IrConst.Str, self._str(n.value)
+
+        if kind == IrKind.Unsupported:
+            value = self._str(type(n).__name__)
+            children = []
+        elif kind in _EXPR_KINDS:
+            w = self._widths.get(n, None)
+            if w is not None:
+                aux = w.width | (SIGNED_BIT if w.signed else 0)
+
+        return self._addNode(
+            kind, tag=tag, value=value, children=children,
+            line=line, col=col, aux=aux)
+
+    @staticmethod
+    def _op(op) -> int:
+        return _OP_M[type(op).__name__]
+
+    def _str(self, s : str) -> int:
+        idx = self._string_m.get(s, None)
+        if idx is None:
+            idx = len(self._strings)
+            self._strings.append(s.encode("utf-8"))
+            self._string_m[s] = idx
+        return idx
+
+    def _addNode(self, kind, tag=0, value=0, children=(), line=0, col=0, aux=0) -> int:
+        first = len(self._edges)
+        self._edges.extend(children)
+        self._nodes += _NODE.pack(
+            kind, tag, value, first, len(children), line, col, aux)
+        self._num_nodes += 1
+        return self._num_nodes - 1
+
+    def _pack(self, root : int) -> bytes:
+        edges = self._edges
+        if edges.itemsize != 4:
+            raise Exception("Unexpected u32 array item size %d" % edges.itemsize)
+        edges_b = edges.tobytes() if struct.pack("=I", 1) == struct.pack("<I", 1) \
+            else struct.pack("<%dI" % len(edges), *edges)
+
+        stroff = [0]
+        for s in self._strings:
+            stroff.append(stroff[-1] + len(s))
+        stroff_b = struct.pack("<%dQ" % len(stroff), *stroff)
+
+        nodes_off = _align(_HDR.size)
+        edges_off = _align(nodes_off + len(self._nodes))
+        stroff_off = _align(edges_off + len(edges_b))
+        strblob_off = _align(stroff_off + len(stroff_b))
+
+        out = bytearray(strblob_off + stroff[-1])
+        _HDR.pack_into(
+            out, 0, IR_MAGIC, IR_VERSION, 0,
+            self._num_nodes, len(edges), len(self._strings), root,
+            nodes_off, edges_off, stroff_off, strblob_off)
+        out[nodes_off:nodes_off+len(self._nodes)] = self._nodes
+        out[edges_off:edges_off+len(edges_b)] = edges_b
+        out[stroff_off:stroff_off+len(stroff_b)] = stroff_b
+        out[strblob_off:] = b"".join(self._strings)
+        return bytes(out)
+
+class IrNode(object):
+    """View of one node record. Children and strings are decoded on access"""
+    __slots__ = ("_reader", "index", "kind", "tag", "value", "_first", "_n", "line", "col", "aux")
+
+    def __init__(self, reader : 'IrReader', index : int):
+        self._reader = reader
+        self.index = index
+        (kind, self.tag, self.value, self._first, self._n,
+         self.line, self.col, self.aux) = _NODE.unpack_from(
+            reader._buf, reader._nodes_off + index*_NODE.size)
+        self.kind = IrKind(kind)
+
+    @property
+    def name(self) -> Optional[str]:
+        if self.kind in _NAMED_KINDS or (
+                self.kind == IrKind.Constant and self.tag == IrConst.Str):
+            return self._reader.string(self.value)
+        return None
+
+    @property
+    def op(self) -> Optional[str]:
+        if self.kind in (IrKind.AugAssign, IrKind.BinOp, IrKind.BoolOp,
+                         IrKind.UnaryOp, IrKind.Compare):
+            return IR_OPS[self.tag]
+        return None
+
+    @property
+    def file(self) -> Optional[str]:
+        if self.kind in (IrKind.Sync, IrKind.Exec) and self.aux != NONE_IDX:
+            return self._reader.string(self.aux)
+        return None
+
+    @property
+    def width(self) -> Optional[int]:
+        """Inferred width of an expression node"""
+        if self.kind in _EXPR_KINDS and self.aux != 0:
+            return self.aux & ~SIGNED_BIT
+        return None
+
+    @property
+    def signed(self) -> bool:
+        return self.kind in _EXPR_KINDS and (self.aux & SIGNED_BIT) != 0
+
+    @property
+    def type(self) -> Optional['IrNode']:
+        """Type of a Field node: a Component or Type node"""
+        if self.kind != IrKind.Field:
+            return None
+        return self.child(0)
+
+    @property
+    def numChildren(self) -> int:
+        return 0 if self.kind == IrKind.Path else self._n
+
+    def child(self, i : int) -> 'IrNode':
+        if i < 0 or i >= self.numChildren:
+            raise IndexError(i)
+        return self._reader.node(self._reader._edge(self._first + i))
+
+    @property
+    def children(self) -> List['IrNode']:
+        return [self.child(i) for i in range(self.numChildren)]
+
+    @property
+    def indices(self) -> Tuple[int, ...]:
+        """Field indices of a Path node"""
+        if self.kind != IrKind.Path:
+            return ()
+        return struct.unpack_from(
+            "<%dI" % self._n, self._reader._buf, self._reader._edges_off + 4*self._first)
+
+    def __repr__(self):
+        return "IrNode(%d, %s)" % (self.index, self.kind.name)
+
+class IrReader(object):
+    """
+    Opens an exported file through mmap. Only the header is decoded up
+    front; nodes and strings are read from the mapping as they are accessed.
+    """
+
+    def __init__(self, path : str):
+        self._fp = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._fp.close()
+            raise
+        self._buf = memoryview(self._mm)
+        self._string_m : Dict[int, str] = {}
+
+        (magic, version, _, self.num_nodes, self.num_edges, self.num_strings,
+         self._root, self._nodes_off, self._edges_off, self._stroff_off,
+         self._strblob_off) = _HDR.unpack_from(self._buf, 0)
+        if magic != IR_MAGIC:
+            self.close()
+            raise Exception("%s is not an IR export file" % path)
+        if version != IR_VERSION:
+            self.close()
+            raise Exception("Unsupported IR export version %d (expect %d)" % (
+                version, IR_VERSION))
+
+    def close(self):
+        if self._buf is not None:
+            self._buf.release()
+            self._buf = None
+            self._mm.close()
+            self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def root(self) -> IrNode:
+        return self.node(self._root)
+
+    @property
+    def components(self) -> List[IrNode]:
+        return self.root.children
+
+    def node(self, i : int) -> IrNode:
+        if i < 0 or i >= self.num_nodes:
+            raise IndexError(i)
+        return IrNode(self, i)
+
+    def string(self, i : int) -> str:
+        ret = self._string_m.get(i, None)
+        if ret is None:
+            start = _U64.unpack_from(self._buf, self._stroff_off + 8*i)[0]
+            end = _U64.unpack_from(self._buf, self._stroff_off + 8*(i+1))[0]
+            ret = str(self._buf[self._strblob_off+start:self._strblob_off+end], "utf-8")
+            self._string_m[i] = ret
+        return ret
+
+    def _edge(self, i : int) -> int:
+        return _U32.unpack_from(self._buf, self._edges_off + 4*i)[0]
@@ -0,0 +1,237 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import dataclasses as dc
+import logging
+import sys
+import tracemalloc
+import zuspec.dm as dm
+from typing import Any, ClassVar, Dict, List, Optional, Set, Tuple, Type
+from .analysis import Analyzer
+from .context import Context
+
+# Ordered (prefix, kind) pairs used to classify dm factory methods
+_KIND_M : Tuple[Tuple[str, str], ...] = (
+    ("mkTypeField", "fields"),
+    ("mkExecStmt", "statements"),
+    ("mkTypeProcStmt", "statements"),
+    ("mkExec", "execs"),
+    ("mkTypeExec", "execs"),
+    ("mkTypeExpr", "expressions"),
+    ("mkModelExpr", "expressions"),
+    ("mkDataType", "types"),
+)
+
+KINDS : Tuple[str, ...] = (
+    "types", "fields", "execs", "statements", "expressions", "locations", "other")
+
+def _kindOf(factory : str) -> str:
+    for prefix, kind in _KIND_M:
+        if factory.startswith(prefix):
+            return kind
+    return "other"
+
+def _sizeOf(o : Any) -> int:
+    """Shallow size estimate, including the instance dict of Python objects"""
+    sz = sys.getsizeof(o)
+    d = getattr(o, "__dict__", None)
+    if isinstance(d, dict):
+        sz += sys.getsizeof(d)
+    return sz
+
+@dc.dataclass
+class FootprintStats(object):
+    counts : Dict[str, int] = dc.field(default_factory=lambda: {k : 0 for k in KINDS})
+    sizes : Dict[str, int] = dc.field(default_factory=lambda: {k : 0 for k in KINDS})
+    # Names of node types with none of the known child accessors. These
+    # are leaves, or nodes whose children were not counted
+    opaque : Set[str] = dc.field(default_factory=set)
+
+    @property
+    def total_count(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def total_size(self) -> int:
+        return sum(self.sizes.values())
+
+    def add(self, kind : str, o : Any):
+        self.counts[kind] += 1
+        self.sizes[kind] += _sizeOf(o)
+
+@dc.dataclass
+class MethodReport(FootprintStats):
+    name : str = ""
+    peak_alloc : int = 0
+
+@dc.dataclass
+class ComponentReport(FootprintStats):
+    name : str = ""
+    peak_alloc : int = 0
+    retained_alloc : int = 0
+    methods : List[MethodReport] = dc.field(default_factory=list)
+
+    def method(self, name : str) -> Optional[MethodReport]:
+        return next((m for m in self.methods if m.name == name), None)
+
+# Accessors of single child nodes. Data types are deliberately not
+# followed: they are shared through the context's type registry
+_CHILD_GETTERS : Tuple[str, ...] = (
+    "getBody", "getResetBody", "getClock", "getReset",
+    "getCond", "getLhs", "getRhs", "getRoot", "getValue", "getLoc")
+
+def _kindOfNode(o : Any) -> str:
+    if isinstance(o, dm.Loc):
+        return "locations"
+    # dm classes are named as their factory methods, without 'mk'
+    return _kindOf("mk" + type(o).__name__)
+
+def _children(o : Any) -> Optional[List[Any]]:
+    """
+    Returns the child nodes of a dm object, via its num<X>s/get<X>(i)
+    and get<X>() accessors. None if it has none of these accessors
+    """
+    ret = []
+    found = False
+    for name in dir(o):
+        if not name.startswith("num") or not name.endswith("s"):
+            continue
+        get = getattr(o, "get" + name[3:-1], None)
+        if get is None:
+            continue
+        found = True
+        n = getattr(o, name)
+        n = n() if callable(n) else n
+        ret.extend(get(i) for i in range(n))
+    for name in _CHILD_GETTERS:
+        get = getattr(o, name, None)
+        if callable(get):
+            found = True
+            c = get()
+            if c is not None:
+                ret.append(c)
+    return ret if found else None
+
+def _measure(root : Any, stats : FootprintStats):
+    """Adds every node reachable from 'root' to 'stats'"""
+    seen = set()
+    work = [root]
+    while len(work) > 0:
+        o = work.pop()
+        if o is None or id(o) in seen:
+            continue
+        seen.add(id(o))
+        stats.add(_kindOfNode(o), o)
+        children = _children(o)
+        if children is not None:
+            work.extend(children)
+        elif not isinstance(o, dm.Loc):
+            stats.opaque.add(type(o).__name__)
+
+@dc.dataclass
+class IrReporter(object):
+    """
+    Measures the IR produced by a transform: the dm objects in the
+    returned component tree, by kind with an estimate of their size, and
+    peak/retained Python allocation (via ``tracemalloc``) for the
+    component and for each lowered method.
+
+    Nodes are walked through their num<X>s/get<X>(i) and known get<X>()
+    accessors. Node types with none of these are listed in ``opaque``,
+    as any children they have are not counted.
+
+    Peaks are only isolated per component and method when the reporter
+    starts tracing itself. When tracing is already active, the caller's
+    peak is left untouched, and reported peaks are upper bounds.
+    """
+    ctxt : Context = dc.field()
+    _comp : Optional[ComponentReport] = dc.field(default=None)
+    _method_s : List[Tuple[str, int]] = dc.field(default_factory=list)
+    _method_peak_m : Dict[str, int] = dc.field(default_factory=dict)
+    _outer_peak : int = dc.field(default=0)
+    _owns_trace : bool = dc.field(default=False)
+    _log : ClassVar = logging.getLogger("IrReporter")
+
+    def transform(self, t, transform_t : Optional[Type] = None) -> Tuple[Any, ComponentReport]:
+        """Applies the transform to ``t``, returning the result and its report"""
+        if transform_t is None:
+            from .transform_to_dm import TransformToDm
+            transform_t = TransformToDm
+
+        t_cls = t if isinstance(t, type) else type(t)
+        self._comp = ComponentReport(name=t_cls.__qualname__)
+        self._method_s.clear()
+        self._method_peak_m.clear()
+
+        xf = transform_t(ctxt=self.ctxt)
+        for m in ("emitExec", "emitSync"):
+            setattr(xf, m, self._wrapMethod(getattr(xf, m)))
+
+        self._owns_trace = not tracemalloc.is_tracing()
+        if self._owns_trace:
+            tracemalloc.start()
+        base, _ = tracemalloc.get_traced_memory()
+        self._outer_peak = 0
+
+        try:
+            ret = xf.transform(t)
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._owns_trace:
+                tracemalloc.stop()
+
+        self._comp.peak_alloc = max(peak, self._outer_peak) - base
+        self._comp.retained_alloc = current - base
+
+        # Counts come from the returned tree, so nodes created and then
+        # discarded aren't counted, and a type reused from the context's
+        # registry is measured like a newly-lowered one
+        _measure(ret, self._comp)
+        if len(self._comp.opaque) > 0:
+            self._log.info("%s: no child accessors on node types %s. Any children aren't counted" % (
+                self._comp.name, ", ".join(sorted(self._comp.opaque))))
+        execs = self._execNodes(ret)
+        analyzer = getattr(xf, "analyzer", None) or Analyzer.inst()
+        info = analyzer.analyze(t_cls)
+        for e, node in zip(list(info.syncs) + list(info.execs), execs):
+            name = getattr(e.method, "__qualname__", e.name)
+            report = MethodReport(name=name, peak_alloc=self._method_peak_m.get(name, 0))
+            _measure(node, report)
+            self._comp.methods.append(report)
+        return ret, self._comp
+
+    @staticmethod
+    def _execNodes(comp : Any) -> List[Any]:
+        n = getattr(comp, "numExecs", 0)
+        n = n() if callable(n) else n
+        return [comp.getExec(i) for i in range(n)]
+
+    def _wrapMethod(self, visit):
+        def _visit(e):
+            m = getattr(e, "method", e)
+            name = getattr(m, "__qualname__", str(m))
+            # Preserve the enclosing peak before restarting peak tracking
+            self._outer_peak = max(self._outer_peak, tracemalloc.get_traced_memory()[1])
+            if self._owns_trace:
+                tracemalloc.reset_peak()
+            self._method_s.append((name, tracemalloc.get_traced_memory()[0]))
+            try:
+                return visit(e)
+            finally:
+                _, start = self._method_s.pop()
+                peak = tracemalloc.get_traced_memory()[1]
+                self._outer_peak = max(self._outer_peak, peak)
+                self._method_peak_m[name] = peak - start
+        return _visit
@@ -0,0 +1,104 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import dataclasses as dc
+import zuspec.dataclasses as zdc
+from typing import Any, Callable, ClassVar, Dict, List, Tuple
+from .cache import WeakLruCache
+
+@dc.dataclass
+class MemberCatalog(object):
+    """
+    Per-class index of the members the front-end cares about. Built once
+    per class by walking the class ``__dict__`` along the MRO, so that the
+    various visitor passes don't each re-scan ``dir()`` with ``getattr``.
+    """
+    fields : Tuple[dc.Field, ...] = dc.field(default_factory=tuple)
+    field_index : Dict[str, int] = dc.field(default_factory=dict)
+    execs : List[Tuple[str, Any]] = dc.field(default_factory=list)
+    sync_methods : List[Tuple[str, Callable]] = dc.field(default_factory=list)
+    functions : List[Tuple[str, Callable]] = dc.field(default_factory=list)
+    externs : List[dc.Field] = dc.field(default_factory=list)
+
+    _catalog_m : ClassVar = WeakLruCache("member_catalog")
+
+    @classmethod
+    def get(cls, t) -> 'MemberCatalog':
+        """Returns the (cached) catalog for a class or instance"""
+        t_cls = t if isinstance(t, type) else type(t)
+        ret = cls._catalog_m.get(t_cls, None)
+        if ret is None:
+            ret = cls._build(t_cls)
+            cls._catalog_m[t_cls] = ret
+        return ret
+
+    def field(self, name : str) -> dc.Field:
+        return self.fields[self.field_index[name]]
+
+    @classmethod
+    def _build(cls, t : type) -> 'MemberCatalog':
+        from zuspec.dataclasses.annotation import AnnotationSync
+        ret = MemberCatalog()
+
+        if dc.is_dataclass(t):
+            ret.fields = tuple(dc.fields(t))
+        ret.field_index = {f.name : i for i,f in enumerate(ret.fields)}
+
+        for f in ret.fields:
+            if f.default_factory not in (None, dc.MISSING) \
+                    and isinstance(f.default_factory, type) \
+                    and issubclass(f.default_factory, zdc.Extern):
+                ret.externs.append(f)
+
+        # Collect the most-derived definition of each member. Plain
+        # __dict__ access avoids triggering descriptors.
+        members : Dict[str, Any] = {}
+        for base in t.__mro__:
+            if base is object:
+                continue
+            for name, o in vars(base).items():
+                if name.startswith("__") or name in members:
+                    continue
+                members[name] = o
+
+        seen_execs = set()
+        exec_methods = set()
+        annotated = []
+        for name in sorted(members.keys()):
+            o = members[name]
+            if isinstance(o, (staticmethod, classmethod)):
+                o = o.__func__
+
+            if isinstance(o, (zdc.ExecSync, zdc.Exec)):
+                # The same exec object may be reachable via more than one name
+                if id(o) not in seen_execs:
+                    seen_execs.add(id(o))
+                    ret.execs.append((name, o))
+                    m = getattr(o, "method", None)
+                    if m is not None:
+                        exec_methods.add(id(m))
+            elif callable(o):
+                ret.functions.append((name, o))
+                ann = getattr(o, "__zsp_annotation__", None)
+                if isinstance(ann, AnnotationSync):
+                    annotated.append((name, o))
+
+        # Annotated methods already represented by an exec object must
+        # only be visited once, via the exec object
+        ret.sync_methods = [
+            (n, m) for n, m in annotated if id(m) not in exec_methods]
+
+        return ret
+
@@ -0,0 +1,297 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import ast
+import dataclasses as dc
+import enum
+import logging
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
+from .analysis import ComponentInfo, SyncInfo
+from .cache import WeakLruCache
+from .case_table import CaseRecognizer
+from .width_infer import DEFAULT_INT_WIDTH, ExprWidth, WidthInference
+
+class NsKind(enum.IntEnum):
+    Const = 1
+    # Pre-edge value of a field. 'value' is the field name
+    Field = 2
+    # 'op' is the AST operator name (eg "Add", "Eq"), 'args' the operands
+    Op = 3
+    # 'args' is (cond, if-true, if-false)
+    Mux = 4
+
+@dc.dataclass(frozen=True)
+class NsNode(object):
+    kind : NsKind = dc.field()
+    width : int = dc.field()
+    op : Optional[str] = dc.field(default=None)
+    args : Tuple[int, ...] = dc.field(default_factory=tuple)
+    value : Any = dc.field(default=None)
+
+@dc.dataclass
+class NsBlock(object):
+    sync : SyncInfo = dc.field()
+    # Next-state node of each field the block writes
+    next_m : Dict[str, int] = dc.field(default_factory=dict)
+
+# Local-variable and field-next values along one control path
+_Env = Tuple[Dict[str, int], Dict[str, int]]
+
+@dc.dataclass
+class NextState(object):
+    """
+    Next-state form of a component's sync blocks. For each field a
+    block writes, a single expression gives the field's post-edge value
+    in terms of pre-edge field values, with branches merged into Mux
+    nodes. Field assignments are non-blocking (reads always see the
+    pre-edge value) and locals are blocking, as in RefEvaluator.
+
+    Nodes are hash-consed into one table per component, so a
+    sub-expression used by several fields (or blocks) is a single node.
+    Muxes with a constant condition or identical arms are folded.
+    Results are cached per component.
+    """
+    name : str = dc.field()
+    nodes : List[NsNode] = dc.field(default_factory=list)
+    blocks : List[NsBlock] = dc.field(default_factory=list)
+    _node_m : Dict[NsNode, int] = dc.field(default_factory=dict)
+    _widths : Dict[ast.expr, ExprWidth] = dc.field(default_factory=dict)
+    # Declared width per field. The ComponentInfo itself isn't held, as
+    # it keys the cache
+    _field_w : Dict[str, int] = dc.field(default_factory=dict)
+
+    _ns_m : ClassVar = WeakLruCache("next_state.components")
+    _log : ClassVar = logging.getLogger("NextState")
+
+    @classmethod
+    def get(cls, info : ComponentInfo) -> 'NextState':
+        ret = cls._ns_m.get(info, None)
+        if ret is None:
+            ret = NextState(
+                name=info.name,
+                _widths=WidthInference.get(info),
+                _field_w={f.name : f.width if f.width is not None else DEFAULT_INT_WIDTH
+                          for f in info.fields})
+            for s in info.syncs:
+                ret.blocks.append(ret._lowerSync(s))
+            cls._ns_m[info] = ret
+            cls._log.debug("%s: %d nodes for %d blocks" % (
+                info.name, len(ret.nodes), len(ret.blocks)))
+        return ret
+
+    def node(self, i : int) -> NsNode:
+        return self.nodes[i]
+
+    def block(self, name : str) -> NsBlock:
+        return next(b for b in self.blocks if b.sync.name == name)
+
+    def format(self, i : int) -> str:
+        """Returns node 'i' as an expression string (shared nodes are repeated)"""
+        n = self.nodes[i]
+        if n.kind == NsKind.Const:
+            return str(n.value)
+        elif n.kind == NsKind.Field:
+            return n.value
+        elif n.kind == NsKind.Mux:
+            return "(%s ? %s : %s)" % tuple(self.format(a) for a in n.args)
+        return "%s(%s)" % (n.op, ", ".join(self.format(a) for a in n.args))
+
+    def mkConst(self, value : int, width : int) -> int:
+        return self._intern(NsNode(NsKind.Const, width, value=value))
+
+    def mkField(self, name : str) -> int:
+        return self._intern(NsNode(NsKind.Field, self._field_w[name], value=name))
+
+    def mkOp(self, op : str, args : Tuple[int, ...], width : int) -> int:
+        return self._intern(NsNode(NsKind.Op, width, op=op, args=tuple(args)))
+
+    def mkMux(self, cond : int, a : int, b : int) -> int:
+        if a == b:
+            return a
+        c = self.nodes[cond]
+        if c.kind == NsKind.Const:
+            return a if c.value else b
+        width = max(self.nodes[a].width, self.nodes[b].width)
+        return self._intern(NsNode(NsKind.Mux, width, args=(cond, a, b)))
+
+    def _intern(self, n : NsNode) -> int:
+        ret = self._node_m.get(n, None)
+        if ret is None:
+            ret = len(self.nodes)
+            self.nodes.append(n)
+            self._node_m[n] = ret
+        return ret
+
+    def _lowerSync(self, s : SyncInfo) -> NsBlock:
+        local_m, next_m = self._lowerStmts(s.body, ({}, {}))
+        return NsBlock(sync=s, next_m=next_m)
+
+    def _lowerStmts(self, stmts : List[ast.stmt], env : _Env) -> _Env:
+        for s in stmts:
+            if isinstance(s, ast.Pass):
+                pass
+            elif isinstance(s, ast.Expr) and isinstance(s.value, ast.Constant):
+                # Docstring
+                pass
+            elif isinstance(s, ast.Assign):
+                if len(s.targets) != 1:
+                    raise NotImplementedError("Multiple assignment targets (line %d)" % s.lineno)
+                self._store(s.targets[0], self._lowerExpr(s.value, env[0]), env)
+            elif isinstance(s, ast.AugAssign):
+                width = max(self._width(s.target), self._width(s.value))
+                value = self.mkOp(type(s.op).__name__, (
+                    self._lowerExpr(s.target, env[0]),
+                    self._lowerExpr(s.value, env[0])), width)
+                self._store(s.target, value, env)
+            elif isinstance(s, (ast.If, ast.Match)):
+                env = self._lowerBranch(s, env)
+            else:
+                raise NotImplementedError("Statement type %s (line %d)" % (
+                    type(s).__name__, s.lineno))
+        return env
+
+    def _lowerBranch(self, s : ast.stmt, env : _Env) -> _Env:
+        # if/elif ladders (and match) are lowered as a list of clauses,
+        # then merged bottom-up, so that long ladders don't recurse
+        clauses : List[Tuple[int, List[ast.stmt]]] = []
+        default : List[ast.stmt] = []
+        if isinstance(s, ast.Match):
+            table = CaseRecognizer.recognizeMatch(s)
+            if table is None:
+                raise NotImplementedError("Match statement (line %d)" % s.lineno)
+            subject = self._lowerExpr(table.subject, env[0])
+            width = self._width(table.subject)
+            for keys, body in table.cases:
+                cond = None
+                for k in keys:
+                    eq = self.mkOp("Eq", (subject, self.mkConst(k, width)), 1)
+                    cond = eq if cond is None else self.mkOp("Or", (cond, eq), 1)
+                clauses.append((cond, body))
+            default = table.default if table.default is not None else []
+        else:
+            while True:
+                clauses.append((self._lowerExpr(s.test, env[0]), s.body))
+                if len(s.orelse) == 1 and isinstance(s.orelse[0], ast.If):
+                    s = s.orelse[0]
+                else:
+                    default = s.orelse
+                    break
+
+        # Clause conditions are evaluated in the environment before the
+        # branch. Clause bodies each start from a copy of it
+        ret = self._lowerStmts(default, (dict(env[0]), dict(env[1])))
+        for cond, body in reversed(clauses):
+            taken = self._lowerStmts(body, (dict(env[0]), dict(env[1])))
+            ret = (self._merge(cond, taken[0], ret[0], None),
+                   self._merge(cond, taken[1], ret[1], self.mkField))
+        return ret
+
+    def _merge(self, cond : int, a_m : Dict[str, int], b_m : Dict[str, int], hold) -> Dict[str, int]:
+        ret = {}
+        for k in dict.fromkeys(list(a_m.keys()) + list(b_m.keys())):
+            a, b = a_m.get(k, None), b_m.get(k, None)
+            if a is None or b is None:
+                if hold is None:
+                    # Local assigned on only one path
+                    ret[k] = a if b is None else b
+                    continue
+                # An unwritten field holds its value
+                a = hold(k) if a is None else a
+                b = hold(k) if b is None else b
+            ret[k] = self.mkMux(cond, a, b)
+        return ret
+
+    def _store(self, target : ast.expr, value : int, env : _Env):
+        if self._isFieldRef(target):
+            env[1][target.attr] = value
+        elif isinstance(target, ast.Name):
+            env[0][target.id] = value
+        else:
+            raise NotImplementedError("Assignment target %s (line %d)" % (
+                type(target).__name__, target.lineno))
+
+    def _lowerExpr(self, e : ast.expr, local_m : Dict[str, int]) -> int:
+        # Post-order with an explicit work stack, as in ExprFactory
+        result : Dict[int, int] = {}
+        work : List[Tuple[ast.expr, bool]] = [(e, False)]
+        while len(work) > 0:
+            n, expanded = work.pop()
+            if id(n) in result:
+                continue
+            children = self._operands(n)
+            if not expanded and len(children) > 0:
+                work.append((n, True))
+                for c in reversed(children):
+                    work.append((c, False))
+                continue
+            args = tuple(result[id(c)] for c in children)
+            result[id(n)] = self._lowerNode(n, args, local_m)
+        return result[id(e)]
+
+    def _operands(self, e : ast.expr) -> List[ast.expr]:
+        if isinstance(e, ast.BinOp):
+            return [e.left, e.right]
+        elif isinstance(e, ast.UnaryOp):
+            return [e.operand]
+        elif isinstance(e, ast.BoolOp):
+            return list(e.values)
+        elif isinstance(e, ast.Compare):
+            return [e.left] + list(e.comparators)
+        elif isinstance(e, ast.IfExp):
+            return [e.test, e.body, e.orelse]
+        return []
+
+    def _lowerNode(self, e : ast.expr, args : Tuple[int, ...], local_m : Dict[str, int]) -> int:
+        if self._isFieldRef(e):
+            try:
+                return self.mkField(e.attr)
+            except KeyError:
+                raise NotImplementedError("Reference to unknown field %s (line %d)" % (
+                    e.attr, e.lineno))
+        elif isinstance(e, ast.Name):
+            if e.id not in local_m:
+                raise NotImplementedError("Reference to unassigned name %s (line %d)" % (
+                    e.id, e.lineno))
+            return local_m[e.id]
+        elif isinstance(e, ast.Constant):
+            if not isinstance(e.value, int):
+                raise NotImplementedError("Constant %s (line %d)" % (str(e.value), e.lineno))
+            return self.mkConst(int(e.value), self._width(e))
+        elif isinstance(e, (ast.BinOp, ast.UnaryOp)):
+            return self.mkOp(type(e.op).__name__, args, self._width(e))
+        elif isinstance(e, ast.BoolOp):
+            # Left-associated pairs, so that 'a and b and c' shares 'a and b'
+            op = type(e.op).__name__
+            ret = args[0]
+            for a in args[1:]:
+                ret = self.mkOp(op, (ret, a), 1)
+            return ret
+        elif isinstance(e, ast.Compare):
+            if len(e.ops) != 1:
+                raise NotImplementedError("Chained comparison (line %d)" % e.lineno)
+            return self.mkOp(type(e.ops[0]).__name__, args, 1)
+        elif isinstance(e, ast.IfExp):
+            return self.mkMux(*args)
+        raise NotImplementedError("Expression type %s (line %d)" % (
+            type(e).__name__, e.lineno))
+
+    def _width(self, e : ast.expr) -> int:
+        w = self._widths.get(e, None)
+        return w.width if w is not None else DEFAULT_INT_WIDTH
+
+    @staticmethod
+    def _isFieldRef(e : ast.expr) -> bool:
+        return isinstance(e, ast.Attribute) \
+            and isinstance(e.value, ast.Name) and e.value.id == "self"
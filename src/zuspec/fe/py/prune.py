@@ -0,0 +1,162 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import ast
+import dataclasses as dc
+import logging
+import zuspec.dataclasses as zdc
+from typing import ClassVar, Dict, Iterable, List, Optional, Set, Tuple
+from .analysis import ComponentInfo, ExecInfo, FieldInfo, FieldKind, PathRef, SyncInfo
+
+@dc.dataclass
+class PruneReport(object):
+    component : str = dc.field()
+    removed_fields : List[str] = dc.field(default_factory=list)
+    removed_syncs : List[str] = dc.field(default_factory=list)
+    removed_execs : List[str] = dc.field(default_factory=list)
+    # Original field index -> index in the pruned component
+    index_m : Dict[int, int] = dc.field(default_factory=dict)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.removed_fields) == 0 and len(self.removed_syncs) == 0 \
+            and len(self.removed_execs) == 0
+
+@dc.dataclass
+class _Access(object):
+    reads : Set[str] = dc.field(default_factory=set)
+    writes : Set[str] = dc.field(default_factory=set)
+    # Has effects other than field writes (eg calls). Never pruned
+    opaque : bool = dc.field(default=False)
+
+class Pruner(object):
+    """
+    Removes data fields and exec blocks that can't influence anything
+    observable. Ports, externs, sub-component instances and the fields
+    named in 'keep' (eg fields bound from outside) are observable. A
+    block is live if it writes a live field. Every field a live block
+    reads (including its clock and reset) is live, as is every field it
+    writes, since the block is kept whole.
+
+    Pruned components have their fields re-indexed. The report maps
+    original field indices to the new ones; index paths computed on the
+    unpruned class must be mapped through it (see TransformToDm.remapPath).
+    """
+    _log : ClassVar = logging.getLogger("Pruner")
+
+    @classmethod
+    def prune(cls, info : ComponentInfo, keep : Iterable[str] = ()) -> Tuple[ComponentInfo, PruneReport]:
+        report = PruneReport(component=info.name)
+        blocks : List[ExecInfo] = list(info.syncs) + list(info.execs)
+        access = [cls._access(b) for b in blocks]
+
+        live : Set[str] = set(keep)
+        for f in info.fields:
+            if not cls._prunable(f):
+                live.add(f.name)
+
+        live_b = [False]*len(blocks)
+        changed = True
+        while changed:
+            changed = False
+            for i, b in enumerate(blocks):
+                if live_b[i]:
+                    continue
+                a = access[i]
+                if a.opaque or not a.writes.isdisjoint(live):
+                    live_b[i] = True
+                    changed = True
+                    live.update(a.reads)
+                    live.update(a.writes)
+                    if isinstance(b, SyncInfo):
+                        live.update(b.clock.names[:1])
+                        live.update(b.reset.names[:1])
+
+        fields = []
+        for f in info.fields:
+            if f.name in live or not cls._prunable(f):
+                report.index_m[f.index] = len(fields)
+                fields.append(f if f.index == len(fields) else dc.replace(f, index=len(fields)))
+            else:
+                report.removed_fields.append(f.name)
+
+        # Keeps the producing analyzer. Derived state (field map,
+        # fingerprint, domains) is reset, as it's computed from the fields
+        ret = dc.replace(info, fields=tuple(fields), syncs=[], execs=[])
+        for i, b in enumerate(blocks):
+            if not live_b[i]:
+                if isinstance(b, SyncInfo):
+                    report.removed_syncs.append(b.name)
+                else:
+                    report.removed_execs.append(b.name)
+            elif isinstance(b, SyncInfo):
+                ret.syncs.append(cls._remapSync(b, report.index_m))
+            else:
+                ret.execs.append(b)
+
+        if report.empty:
+            return info, report
+        cls._log.debug("Pruned %s: fields=%s syncs=%s execs=%s" % (
+            info.name, report.removed_fields, report.removed_syncs, report.removed_execs))
+        return ret, report
+
+    @staticmethod
+    def _prunable(f : FieldInfo) -> bool:
+        if f.kind != FieldKind.Data:
+            return False
+        return not (isinstance(f.type, type) and issubclass(f.type, zdc.Component))
+
+    @staticmethod
+    def _remapSync(s : SyncInfo, index_m : Dict[int, int]) -> SyncInfo:
+        def _remap(p : PathRef) -> PathRef:
+            if len(p.indices) == 0 or index_m.get(p.indices[0]) == p.indices[0]:
+                return p
+            return dc.replace(p, indices=(index_m[p.indices[0]],) + p.indices[1:])
+        clock, reset = _remap(s.clock), _remap(s.reset)
+        if clock is s.clock and reset is s.reset:
+            return s
+        return dc.replace(s, clock=clock, reset=reset)
+
+    @classmethod
+    def _access(cls, b : ExecInfo) -> _Access:
+        ret = _Access()
+        for s in b.body:
+            for n in ast.walk(s):
+                if isinstance(n, (ast.Assign, ast.AugAssign, ast.AnnAssign)):
+                    targets = n.targets if isinstance(n, ast.Assign) else [n.target]
+                    for t in targets:
+                        root = cls._rootField(t)
+                        if root is None:
+                            continue
+                        ret.writes.add(root)
+                        if isinstance(n, ast.AugAssign):
+                            ret.reads.add(root)
+                elif isinstance(n, ast.Attribute) and isinstance(n.ctx, ast.Load) \
+                        and isinstance(n.value, ast.Name) and n.value.id == "self":
+                    ret.reads.add(n.attr)
+                elif isinstance(n, (ast.Call, ast.Await, ast.Yield, ast.YieldFrom,
+                                    ast.Global, ast.Nonlocal, ast.Delete)):
+                    ret.opaque = True
+        return ret
+
+    @staticmethod
+    def _rootField(e : ast.expr) -> Optional[str]:
+        """Returns 'x' for targets of the form self.x[.y|[i]...]"""
+        while isinstance(e, (ast.Attribute, ast.Subscript)):
+            if isinstance(e, ast.Attribute) and isinstance(e.value, ast.Name) \
+                    and e.value.id == "self":
+                return e.attr
+            e = e.value
+        return None
@@ -0,0 +1,358 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import ast
+import dataclasses as dc
+import logging
+from typing import Any, Callable, ClassVar, Dict, List, Optional
+from .analysis import Analyzer, SyncInfo
+from .case_table import CaseRecognizer
+from .width_infer import ExprWidth, WidthInference
+
+# NumPy is an optional dependency (the 'refeval' extra), imported when
+# the first evaluator is created
+np = None
+
+def _importNumpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError as e:
+            raise ImportError(
+                "RefEvaluator requires numpy. Install zuspec-fe-py[refeval]") from e
+        np = numpy
+    return np
+
+# Compiled expressions take the evaluation environment and return an array
+ExprFn = Callable[['_Env'], Any]
+# Compiled statements take the environment and the active-instance mask
+StmtFn = Callable[['_Env', Any], None]
+
+@dc.dataclass
+class _Env(object):
+    cur : Dict[str, Any]
+    nxt : Dict[str, Any]
+    local : Dict[str, Any] = dc.field(default_factory=dict)
+
+@dc.dataclass
+class _SyncBlock(object):
+    name : str
+    clock : str
+    reset : str
+    body : List[StmtFn]
+
+@dc.dataclass
+class RefEvaluator(object):
+    """
+    Reference evaluator for the sync blocks of a component. Evaluates
+    ``n`` independent instances in lock-step, holding each field as a
+    NumPy array with one element per instance. Sync bodies are compiled
+    from the same analysis that the IR emitters consume.
+
+    Assignments to fields have non-blocking semantics: all blocks
+    triggered by a clock edge read the pre-edge state. The result of
+    each operation wraps to its inferred width (see WidthInference), and
+    field values wrap to the width of their ``zdc.Bit[W]`` type on update.
+    """
+    t : type = dc.field()
+    n : int = dc.field(default=1)
+    _widths : Dict[str, int] = dc.field(default_factory=dict)
+    _expr_w : Dict[ast.expr, ExprWidth] = dc.field(default_factory=dict)
+    _state : Dict[str, Any] = dc.field(default_factory=dict)
+    _blocks : List[_SyncBlock] = dc.field(default_factory=list)
+    _log : ClassVar = logging.getLogger("RefEvaluator")
+
+    def __post_init__(self):
+        _importNumpy()
+        info = Analyzer.inst().analyze(self.t)
+        self._expr_w = WidthInference.get(info)
+
+        for f in info.fields:
+            if f.width is not None:
+                if f.width > 64:
+                    raise NotImplementedError(
+                        "Field %s: widths > 64 not supported (%d)" % (f.name, f.width))
+                self._widths[f.name] = f.width
+                self._state[f.name] = np.zeros(self.n, dtype=np.uint64)
+
+        for s in info.syncs:
+            self._blocks.append(self._compileSync(s))
+
+    def get(self, name : str) -> 'np.ndarray':
+        return self._state[name]
+
+    def set(self, name : str, value) -> None:
+        self._state[name] = self._wrap(
+            name,
+            np.broadcast_to(np.asarray(value, dtype=np.uint64), (self.n,)).copy())
+
+    def step(self, inputs : Optional[Dict[str, object]] = None, clock : Optional[str] = None):
+        """
+        Applies ``inputs`` and evaluates one active edge of ``clock``
+        (or of all clocks when ``clock`` is None) across all instances
+        """
+        if inputs is not None:
+            for k, v in inputs.items():
+                self.set(k, v)
+
+        env = _Env(cur=self._state, nxt=dict(self._state))
+        mask = np.ones(self.n, dtype=bool)
+        for b in self._blocks:
+            if clock is not None and b.clock != clock:
+                continue
+            env.local = {}
+            for s in b.body:
+                s(env, mask)
+        self._state = env.nxt
+
+    def run(self, stimulus : Dict[str, 'np.ndarray'], clock : Optional[str] = None) -> Dict[str, 'np.ndarray']:
+        """
+        Applies a ``(cycles, n)`` array of values per input and returns
+        the ``(cycles, n)`` trace of every field after each edge
+        """
+        cycles = None
+        for v in stimulus.values():
+            cycles = len(v) if cycles is None else min(cycles, len(v))
+        cycles = 0 if cycles is None else cycles
+
+        trace = {k : np.zeros((cycles, self.n), dtype=np.uint64) for k in self._state.keys()}
+        for c in range(cycles):
+            self.step({k : v[c] for k, v in stimulus.items()}, clock)
+            for k, v in self._state.items():
+                trace[k][c] = v
+        return trace
+
+    def _wrap(self, name : str, v : 'np.ndarray') -> 'np.ndarray':
+        width = self._widths[name]
+        if width < 64:
+            v = v & np.uint64((1 << width) - 1)
+        return v
+
+    def _compileSync(self, s : SyncInfo) -> _SyncBlock:
+        body = [self._compileStmt(ss) for ss in s.body]
+        return _SyncBlock(
+            name=s.name,
+            clock=".".join(s.clock.names),
+            reset=".".join(s.reset.names),
+            body=body)
+
+    def _compileStmt(self, s : ast.stmt) -> StmtFn:
+        if isinstance(s, ast.Pass):
+            return lambda env, mask: None
+        elif isinstance(s, ast.Expr) and isinstance(s.value, ast.Constant) \
+                and isinstance(s.value.value, str):
+            # Docstring
+            return lambda env, mask: None
+        elif isinstance(s, ast.If):
+            cond = self._compileExpr(s.test)
+            body = [self._compileStmt(ss) for ss in s.body]
+            orelse = [self._compileStmt(ss) for ss in s.orelse]
+            def _if(env, mask):
+                c = cond(env) != 0
+                t_mask = mask & c
+                f_mask = mask & ~c
+                if t_mask.any():
+                    for ss in body:
+                        ss(env, t_mask)
+                if f_mask.any():
+                    for ss in orelse:
+                        ss(env, f_mask)
+            return _if
+        elif isinstance(s, ast.Match):
+            return self._compileMatch(s)
+        elif isinstance(s, ast.Assign):
+            if len(s.targets) != 1:
+                raise NotImplementedError("Multiple assignment targets (line %d)" % s.lineno)
+            return self._compileStore(s.targets[0], self._compileExpr(s.value))
+        elif isinstance(s, ast.AugAssign):
+            # Synthesized node has no inferred width. It takes the wider operand's
+            width = max(self._exprWidth(s.target), self._exprWidth(s.value))
+            value = self._compileBinOp(
+                ast.BinOp(left=s.target, op=s.op, right=s.value), width)
+            return self._compileStore(s.target, value)
+        else:
+            raise NotImplementedError("Statement type %s (line %d)" % (
+                type(s).__name__, s.lineno))
+
+    def _compileMatch(self, s : ast.Match) -> StmtFn:
+        table = CaseRecognizer.recognizeMatch(s)
+        if table is None:
+            raise NotImplementedError("Match statement (line %d)" % s.lineno)
+        subject = self._compileExpr(table.subject)
+        cases = []
+        for keys, body in table.cases:
+            for k in keys:
+                if k < 0:
+                    raise NotImplementedError("Constant %d" % k)
+            cases.append((
+                np.array(keys, dtype=np.uint64),
+                [self._compileStmt(ss) for ss in body]))
+        default = [self._compileStmt(ss) for ss in table.default or []]
+
+        def _match(env, mask):
+            v = subject(env)
+            rem = mask
+            for keys, body in cases:
+                c_mask = rem & np.isin(v, keys)
+                rem = rem & ~c_mask
+                if c_mask.any():
+                    for ss in body:
+                        ss(env, c_mask)
+            if rem.any():
+                for ss in default:
+                    ss(env, rem)
+        return _match
+
+    def _compileStore(self, target : ast.expr, value : ExprFn) -> StmtFn:
+        if self._isFieldRef(target):
+            name = target.attr
+            def _store(env, mask):
+                env.nxt[name] = np.where(mask, self._wrap(name, value(env)), env.nxt[name])
+            return _store
+        elif isinstance(target, ast.Name):
+            name = target.id
+            def _store_local(env, mask):
+                prev = env.local.get(name, None)
+                v = value(env)
+                env.local[name] = v if prev is None else np.where(mask, v, prev)
+            return _store_local
+        else:
+            raise NotImplementedError("Assignment target %s (line %d)" % (
+                type(target).__name__, target.lineno))
+
+    def _isFieldRef(self, e : ast.expr) -> bool:
+        return isinstance(e, ast.Attribute) \
+            and isinstance(e.value, ast.Name) and e.value.id == "self"
+
+    def _compileExpr(self, e : ast.expr) -> ExprFn:
+        if self._isFieldRef(e):
+            name = e.attr
+            if name not in self._widths:
+                raise NotImplementedError("Reference to unsupported field %s" % name)
+            return lambda env: env.cur[name]
+        elif isinstance(e, ast.Name):
+            name = e.id
+            return lambda env: env.local[name]
+        elif isinstance(e, ast.Constant):
+            if not isinstance(e.value, (bool, int)) or e.value < 0:
+                raise NotImplementedError("Constant %s" % str(e.value))
+            v = np.uint64(int(e.value))
+            return lambda env: v
+        elif isinstance(e, ast.BinOp):
+            return self._compileBinOp(e, self._exprWidth(e))
+        elif isinstance(e, ast.UnaryOp):
+            operand = self._compileExpr(e.operand)
+            if isinstance(e.op, ast.Not):
+                return lambda env: (operand(env) == 0).astype(np.uint64)
+            elif isinstance(e.op, ast.Invert):
+                return self._mask(
+                    lambda env: ~np.asarray(operand(env), dtype=np.uint64),
+                    self._exprWidth(e))
+            elif isinstance(e.op, ast.USub):
+                return self._mask(
+                    lambda env: np.uint64(0) - np.asarray(operand(env), dtype=np.uint64),
+                    self._exprWidth(e))
+            elif isinstance(e.op, ast.UAdd):
+                return operand
+            raise NotImplementedError("Unary operator %s" % type(e.op).__name__)
+        elif isinstance(e, ast.Compare):
+            if len(e.ops) != 1:
+                raise NotImplementedError("Chained comparison (line %d)" % e.lineno)
+            return self._compileCompare(e)
+        elif isinstance(e, ast.BoolOp):
+            values = [self._compileExpr(v) for v in e.values]
+            is_and = isinstance(e.op, ast.And)
+            def _boolop(env):
+                r = values[0](env) != 0
+                for v in values[1:]:
+                    r = (r & (v(env) != 0)) if is_and else (r | (v(env) != 0))
+                return r.astype(np.uint64)
+            return _boolop
+        elif isinstance(e, ast.IfExp):
+            test = self._compileExpr(e.test)
+            body = self._compileExpr(e.body)
+            orelse = self._compileExpr(e.orelse)
+            return self._mask(
+                lambda env: np.where(test(env) != 0, body(env), orelse(env)).astype(np.uint64),
+                self._exprWidth(e))
+        raise NotImplementedError("Expression type %s (line %d)" % (
+            type(e).__name__, e.lineno))
+
+    def _exprWidth(self, e : ast.expr) -> int:
+        w = self._expr_w.get(e, None)
+        return w.width if w is not None else 64
+
+    def _mask(self, fn : ExprFn, width : int) -> ExprFn:
+        """Wraps the result of 'fn' to 'width' bits"""
+        if width >= 64:
+            return fn
+        m = np.uint64((1 << width) - 1)
+        return lambda env: np.asarray(fn(env), dtype=np.uint64) & m
+
+    def _compileBinOp(self, e : ast.BinOp, width : int) -> ExprFn:
+        lhs = self._compileExpr(e.left)
+        rhs = self._compileExpr(e.right)
+
+        def _shl(a, b):
+            return np.where(b < 64, np.left_shift(a, np.minimum(b, 63)), np.uint64(0))
+
+        def _shr(a, b):
+            return np.where(b < 64, np.right_shift(a, np.minimum(b, 63)), np.uint64(0))
+
+        def _div(a, b):
+            with np.errstate(divide="ignore"):
+                return np.floor_divide(a, b)
+
+        def _mod(a, b):
+            with np.errstate(divide="ignore"):
+                return np.mod(a, b)
+
+        op_m = {
+            ast.Add: np.add,
+            ast.Sub: np.subtract,
+            ast.Mult: np.multiply,
+            ast.FloorDiv: _div,
+            ast.Div: _div,
+            ast.Mod: _mod,
+            ast.BitAnd: np.bitwise_and,
+            ast.BitOr: np.bitwise_or,
+            ast.BitXor: np.bitwise_xor,
+            ast.LShift: _shl,
+            ast.RShift: _shr,
+        }
+        op = op_m.get(type(e.op), None)
+        if op is None:
+            raise NotImplementedError("Binary operator %s" % type(e.op).__name__)
+        return self._mask(lambda env: op(
+            np.asarray(lhs(env), dtype=np.uint64),
+            np.asarray(rhs(env), dtype=np.uint64)), width)
+
+    def _compileCompare(self, e : ast.Compare) -> ExprFn:
+        lhs = self._compileExpr(e.left)
+        rhs = self._compileExpr(e.comparators[0])
+        op_m = {
+            ast.Eq: np.equal,
+            ast.NotEq: np.not_equal,
+            ast.Lt: np.less,
+            ast.LtE: np.less_equal,
+            ast.Gt: np.greater,
+            ast.GtE: np.greater_equal,
+        }
+        op = op_m.get(type(e.ops[0]), None)
+        if op is None:
+            raise NotImplementedError("Comparison operator %s" % type(e.ops[0]).__name__)
+        return lambda env: op(lhs(env), rhs(env)).astype(np.uint64)
+
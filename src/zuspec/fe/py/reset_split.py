@@ -0,0 +1,125 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import ast
+import dataclasses as dc
+from typing import List, Optional, Tuple
+
+@dc.dataclass
+class ResetSplit(object):
+    """Result of splitting a sync body into its reset and update blocks"""
+    reset_body : List[ast.stmt] = dc.field(default_factory=list)
+    update_body : List[ast.stmt] = dc.field(default_factory=list)
+    # True when the reset block runs while the reset signal is 0
+    active_low : bool = dc.field(default=False)
+
+class ResetSplitter(object):
+    """
+    Recognizes sync bodies of the form::
+
+        if <reset-test>:
+            <init>
+        else:
+            <update>
+
+    where <reset-test> tests the exec's reset signal, directly or
+    negated (``self.rst``, ``not self.rst_n``, ``self.rst == 0``, ...).
+    The branch taken while reset is asserted becomes the reset block.
+    By default that is the 'if' branch. When only the 'else' branch is a
+    plain initialization (constant assignments), the branches are
+    swapped, so that ``if not self.reset: <update> else: <init>`` is
+    also recognized.
+    """
+
+    @classmethod
+    def split(cls, body : List[ast.stmt], reset : Tuple[str, ...]) -> Optional[ResetSplit]:
+        if len(body) != 1 or not isinstance(body[0], ast.If) or len(reset) == 0:
+            return None
+        s : ast.If = body[0]
+
+        # Level of the reset signal at which the test is true
+        level = cls._testLevel(s.test, reset)
+        if level is None:
+            return None
+
+        init, update = s.body, s.orelse
+        if not cls._isInit(init) and len(update) > 0 and cls._isInit(update):
+            init, update = update, init
+            level = not level
+
+        return ResetSplit(
+            reset_body=list(init),
+            update_body=list(update),
+            active_low=not level)
+
+    @staticmethod
+    def join(sp : ResetSplit, reset : Tuple[str, ...], loc : ast.AST) -> ast.If:
+        """
+        Equivalent single 'if' of a split. The reset signal is tested
+        directly, or compared with 0 when active-low, so that no unary
+        operator is needed
+        """
+        test : ast.expr = ast.Name(id="self", ctx=ast.Load())
+        for name in reset:
+            test = ast.Attribute(value=test, attr=name, ctx=ast.Load())
+        if sp.active_low:
+            test = ast.Compare(left=test, ops=[ast.Eq()], comparators=[ast.Constant(value=0)])
+        for n in ast.walk(test):
+            ast.copy_location(n, loc)
+        return ast.copy_location(ast.If(
+            test=test, body=sp.reset_body, orelse=sp.update_body), loc)
+
+    @classmethod
+    def _testLevel(cls, e : ast.expr, reset : Tuple[str, ...]) -> Optional[bool]:
+        if cls._isRef(e, reset):
+            return True
+        elif isinstance(e, ast.UnaryOp) and isinstance(e.op, ast.Not):
+            level = cls._testLevel(e.operand, reset)
+            return None if level is None else not level
+        elif isinstance(e, ast.Compare) and len(e.ops) == 1 \
+                and isinstance(e.ops[0], (ast.Eq, ast.NotEq)):
+            lhs, rhs = e.left, e.comparators[0]
+            if cls._isRef(rhs, reset):
+                lhs, rhs = rhs, lhs
+            if not cls._isRef(lhs, reset) or not isinstance(rhs, ast.Constant) \
+                    or rhs.value not in (0, 1):
+                return None
+            level = bool(rhs.value)
+            return level if isinstance(e.ops[0], ast.Eq) else not level
+        return None
+
+    @staticmethod
+    def _isRef(e : ast.expr, path : Tuple[str, ...]) -> bool:
+        for name in reversed(path):
+            if not isinstance(e, ast.Attribute) or e.attr != name:
+                return False
+            e = e.value
+        return isinstance(e, ast.Name) and e.id == "self"
+
+    @staticmethod
+    def _isInit(stmts : List[ast.stmt]) -> bool:
+        """Checks whether a block only assigns constants"""
+        for s in stmts:
+            if isinstance(s, ast.Pass):
+                continue
+            if not isinstance(s, ast.Assign):
+                return False
+            v = s.value
+            if isinstance(v, ast.UnaryOp) and isinstance(v.op, ast.USub):
+                v = v.operand
+            if not isinstance(v, ast.Constant):
+                return False
+        return True
+
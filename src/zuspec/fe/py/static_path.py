@@ -0,0 +1,136 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import dataclasses as dc
+import dis
+import logging
+from typing import Any, Callable, ClassVar, List, Optional, Tuple, Union
+from .cache import WeakLruCache
+from .member_catalog import MemberCatalog
+
+# A decoded path is the tuple of attribute names applied to the lambda
+# argument. A decoded bind map is a tuple of (key-path, value-path) pairs
+NamePath = Tuple[str, ...]
+BindPairs = Tuple[Tuple[NamePath, NamePath], ...]
+
+@dc.dataclass(frozen=True)
+class _Unsupported(object):
+    reason : str = ""
+
+class StaticPath(object):
+    """
+    Decodes path lambdas (eg ``lambda s: s.clock`` or
+    ``lambda s: {s.a.x: s.b}``) from their bytecode, without executing
+    them. Results are memoized per code object. Lambdas that don't have
+    one of these forms decode to None, and callers fall back to
+    evaluating them against a path mock.
+    """
+    # Opcodes that carry no meaning for path decoding
+    _SKIP_OPS : ClassVar = frozenset((
+        "RESUME", "NOP", "CACHE", "EXTENDED_ARG", "COPY_FREE_VARS", "MAKE_CELL"))
+    _LOAD_ARG_OPS : ClassVar = frozenset((
+        "LOAD_FAST", "LOAD_FAST_CHECK", "LOAD_FAST_BORROW"))
+    _code_m : ClassVar = WeakLruCache("static_path.code")
+    _log : ClassVar = logging.getLogger("StaticPath")
+
+    @classmethod
+    def decode(cls, fn : Callable) -> Optional[Union[NamePath, BindPairs]]:
+        code = getattr(fn, "__code__", None)
+        if code is None:
+            return None
+        ret = cls._code_m.getOrCreate(code, lambda: cls._decode(code))
+        if isinstance(ret, _Unsupported):
+            cls._log.debug("Falling back to mock for %s: %s" % (str(fn), ret.reason))
+            return None
+        return ret
+
+    @classmethod
+    def decodePath(cls, fn : Callable) -> Optional[NamePath]:
+        ret = cls.decode(fn)
+        if ret is None or (len(ret) > 0 and not isinstance(ret[0], str)):
+            return None
+        return ret
+
+    @classmethod
+    def decodeBinds(cls, fn : Callable) -> Optional[BindPairs]:
+        ret = cls.decode(fn)
+        if ret is None or (len(ret) > 0 and isinstance(ret[0], str)):
+            return None
+        return ret
+
+    @classmethod
+    def _decode(cls, code) -> Union[NamePath, BindPairs, _Unsupported]:
+        if code.co_argcount != 1 or code.co_kwonlyargcount != 0:
+            return _Unsupported("expect exactly one argument")
+        arg = code.co_varnames[0]
+
+        stack : List[Any] = []
+        for ins in dis.get_instructions(code):
+            op = ins.opname
+            if op in cls._SKIP_OPS:
+                continue
+            elif op in cls._LOAD_ARG_OPS and ins.argval == arg:
+                stack.append(())
+            elif op == "LOAD_ATTR" and len(stack) > 0 and isinstance(stack[-1], tuple):
+                stack.append(stack.pop() + (ins.argval,))
+            elif op == "BUILD_MAP" and len(stack) >= 2*ins.arg:
+                items = stack[len(stack)-2*ins.arg:]
+                del stack[len(stack)-2*ins.arg:]
+                # Pairs are held in a dict while the map is built. A repeated
+                # key overwrites the earlier value, as in the dict Python
+                # builds (and the mock fallback sees)
+                pairs = {}
+                for i in range(ins.arg):
+                    pairs[items[2*i]] = items[2*i+1]
+                stack.append(pairs)
+            elif op == "MAP_ADD" and len(stack) >= ins.arg+2 \
+                    and isinstance(stack[-ins.arg-2], dict):
+                # Larger maps start from an empty BUILD_MAP and add one
+                # pair at a time
+                value = stack.pop()
+                key = stack.pop()
+                stack[-ins.arg][key] = value
+            elif op == "DICT_UPDATE" and len(stack) >= ins.arg+1 \
+                    and isinstance(stack[-1], dict) \
+                    and isinstance(stack[-ins.arg-1], dict):
+                update = stack.pop()
+                stack[-ins.arg].update(update)
+            elif op == "BUILD_CONST_KEY_MAP":
+                # Keys come from a constant tuple, never from the argument
+                return _Unsupported("constant keys in bind map")
+            elif op == "RETURN_VALUE" and len(stack) == 1:
+                r = stack.pop()
+                return tuple(r.items()) if isinstance(r, dict) else r
+            else:
+                return _Unsupported("opcode %s" % op)
+        return _Unsupported("no return")
+
+    @staticmethod
+    def resolve(t : type, names : NamePath) -> Tuple[Tuple[int, ...], Tuple[dc.Field, ...]]:
+        """Maps a name path on type 't' to field indices and Field objects"""
+        indices = []
+        fields = []
+        typ = t
+        for n in names:
+            catalog = MemberCatalog.get(typ)
+            idx = catalog.field_index.get(n, None)
+            if idx is None:
+                raise AttributeError("Invalid field '%s' in path %s" % (
+                    n, ".".join(("s",) + names)))
+            indices.append(idx)
+            fields.append(catalog.fields[idx])
+            typ = catalog.fields[idx].type
+        return tuple(indices), tuple(fields)
+
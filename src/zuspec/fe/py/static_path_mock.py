@@ -3,6 +3,7 @@ import dataclasses as dc
 import zuspec.dm as dm
 from typing import Optional, cast
 from .context import Context
+from .member_catalog import MemberCatalog
 
 @dc.dataclass
 class StaticPathMock(object):
@@ -16,15 +17,16 @@ class StaticPathMock(object):
             return object.__getattribute__(self, name)
         # Validate field exists
 
-        fields = {f.name for f in dc.fields(self.typ)}
+        catalog = MemberCatalog.get(self.typ)
+        idx = catalog.field_index.get(name, None)
 
-        if name not in fields:
+        if idx is None:
             raise AttributeError(f"Invalid field '{name}' in path")
         
         root = self.expr if self.expr is not None else self.ctxt().mkTypeExprRefSelf()
 
         # Find the field offset and type
-        idx, field_type = next((i,f) for i,f in enumerate(dc.fields(self.typ)) if f.name == name)
+        field_type = catalog.fields[idx]
 
         expr = self.ctxt().mkTypeExprRefField(root, idx)
 
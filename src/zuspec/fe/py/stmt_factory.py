@@ -3,66 +3,137 @@ import ast
 import dataclasses as dc
 import logging
 import zuspec.dm as dm
-from typing import cast, ClassVar, List
+from typing import cast, ClassVar, List, Optional, Tuple
+from .case_table import CaseRecognizer, CaseTable
 from .context import Context
-from .expr_factory import ExprFactory
+from .expr_factory import _BIN_OP_M, ExprFactory
 
 @dc.dataclass
 class StmtFactory(object):
     ctxt : Context = dc.field()
+    _expr : ExprFactory = dc.field(init=False)
     _log : ClassVar = logging.getLogger("StmtFactory")
 
+    def __post_init__(self):
+        self._expr = ExprFactory(self.ctxt)
+
+    @staticmethod
+    def unsupported(s : ast.stmt) -> Optional[Tuple[str, str]]:
+        """
+        Returns (construct, message) if statement 's' itself, apart from
+        its expressions and sub-statements, can't be lowered. build()
+        checks each statement with this, and SupportScanner reports from
+        it, so the two agree
+        """
+        if isinstance(s, ast.If) or isinstance(s, ast.Pass) or StmtFactory._isDocString(s):
+            pass
+        elif isinstance(s, ast.Match):
+            if CaseRecognizer.recognizeMatch(s) is None:
+                return "statement", "Match statements must be over a field, with constant cases and no guards"
+        elif isinstance(s, ast.Assign):
+            if len(s.targets) != 1:
+                return "statement", "Multiple assignment targets"
+            return StmtFactory._unsupportedTarget(s.targets[0])
+        elif isinstance(s, ast.AugAssign):
+            if type(s.op) not in _BIN_OP_M:
+                return "operator", "Unsupported operator %s" % type(s.op).__name__
+            return StmtFactory._unsupportedTarget(s.target)
+        else:
+            return "statement", "Unsupported statement %s" % type(s).__name__
+        return None
+
+    @staticmethod
+    def _unsupportedTarget(t : ast.expr) -> Optional[Tuple[str, str]]:
+        if not isinstance(t, ast.Attribute):
+            return "target", "Unsupported assignment target %s: only 'self.<field>' is supported" % (
+                type(t).__name__)
+        return None
+
+    @staticmethod
+    def _isDocString(s : ast.stmt) -> bool:
+        return isinstance(s, ast.Expr) and isinstance(s.value, ast.Constant) \
+            and isinstance(s.value.value, str)
+
     def build(self, s):
         stmt : dm.ExecStmt = None
 
-        if isinstance(s, ast.If):
-            stmt = self._buildStmtIf(s)
+        reason = self.unsupported(s)
+        if reason is not None:
+            raise NotImplementedError("%s (line %d)" % (reason[1], getattr(s, "lineno", -1)))
+
+        if isinstance(s, (ast.If, ast.Match)):
+            # Ladders over constants become a single switch, where the dm
+            # build provides one
+            table = CaseRecognizer.recognize(s) if self._hasSwitch() else None
+            if table is not None:
+                stmt = self._buildStmtSwitch(table)
+            elif isinstance(s, ast.If):
+                stmt = self._buildStmtIf(s)
+            else:
+                # Too few cases for a switch, or no switch statement
+                table = CaseRecognizer.recognizeMatch(s)
+                if len(table.cases) > 0:
+                    stmt = self._buildStmtIf(self._caseLadder(table, s))
+                elif table.default is not None:
+                    # Only a wildcard case
+                    stmt = self._buildScope(table.default)
         elif isinstance(s, ast.AugAssign):
             stmt = self._buildStmtAugAssign(s)
         elif isinstance(s, ast.Assign):
             stmt = self._buildStmtAssign(s)
+        # No statement for 'pass' and docstrings
         return stmt
-    
-    def _processOrElse(self, if_clauses : List[dm.ExecStmtIf], orelse):
-        self._log.debug("--> _processOrElse")
-        else_scope = None
-        if isinstance(orelse[0], ast.If):
-            # elif
-            if_s = cast(ast.If, orelse[0])
-            cond = ExprFactory(self.ctxt).build(if_s.test)
-            # Append to if_clauses
-            if_clauses.append(self.ctxt().mkExecStmtIf(
-                cond,
-                self.build(if_s.body)
-            ))
 
-            if if_s.orelse is not None:
-                else_scope = self._processOrElse(if_clauses, if_s.orelse)
-        else:
-            # else
-            self._log.debug(" else")
-            else_scope = self.ctxt().mkExecStmtScope()
-            for s in orelse:
-                else_scope.addStmt(self.build(s))
-            if else_scope.numStmts == 1:
-                else_scope = else_scope.getStmt(0)
-
-        self._log.debug("<-- _processOrElse")
-        return else_scope
+    def buildScope(self, stmts : List[ast.stmt]) -> dm.ExecStmtScope:
+        return self._mkScope(self._buildStmts(stmts))
+
+    def _buildScope(self, stmts : List[ast.stmt]) -> dm.ExecStmt:
+        # Decided on the lowered list, so that no scope is created (or
+        # queried) for single-statement bodies
+        stmts_l = self._buildStmts(stmts)
+        if len(stmts_l) == 1:
+            return stmts_l[0]
+        return self._mkScope(stmts_l)
+
+    def _buildStmts(self, stmts : List[ast.stmt]) -> List[dm.ExecStmt]:
+        ret = []
+        for s in stmts:
+            stmt = self.build(s)
+            if stmt is not None:
+                ret.append(stmt)
+        return ret
+
+    def _mkScope(self, stmts : List[dm.ExecStmt]) -> dm.ExecStmtScope:
+        scope = self.ctxt().mkExecStmtScope()
+        for stmt in stmts:
+            scope.addStmt(stmt)
+        return scope
     
     def _buildStmtIf(self, s) -> dm.ExecStmt:
         self._log.debug("--> _buildStmtIf")
-        stmt : dm.ExecStmt = None
-        cond = ExprFactory(self.ctxt).build(s.test)
+        # Walk the if/elif ladder iteratively, collecting one clause per
+        # condition, so that long ladders don't recurse per 'elif'
+        if_clauses : List[dm.ExecStmtIf] = []
+        else_scope = None
+        while True:
+            cond = self._expr.build(s.test)
+            if_clauses.append(self.ctxt().mkExecStmtIf(
+                cond,
+                self._buildScope(s.body)))
 
-        stmt = self.ctxt().mkExecStmtIf(
-            cond,
-            self.build(s.body))
+            if len(s.orelse) == 1 and isinstance(s.orelse[0], ast.If):
+                # elif
+                s = cast(ast.If, s.orelse[0])
+            else:
+                if len(s.orelse) > 0:
+                    self._log.debug(" else")
+                    else_scope = self._buildScope(s.orelse)
+                break
 
-        if s.orelse is not None:
-            # It's nested
-            if_clauses = [stmt]
-            else_scope = self._processOrElse(if_clauses, s.orelse)
+        stmt : dm.ExecStmt = None
+        if len(if_clauses) == 1 and else_scope is None:
+            stmt = if_clauses[0]
+        else:
             stmt = self.ctxt().mkExecStmtIfElse(
                 if_clauses,
                 else_scope)
@@ -70,8 +141,47 @@ class StmtFactory(object):
         self._log.debug("<-- _buildStmtIf")
         return stmt
 
-    def _buildStmtAssign(self, s : ast.Assign):
-        pass
+    def _hasSwitch(self) -> bool:
+        ctxt = self.ctxt()
+        return hasattr(ctxt, "mkExecStmtSwitch") and hasattr(ctxt, "mkExecStmtCase")
+
+    def _buildStmtSwitch(self, t : CaseTable) -> dm.ExecStmt:
+        self._log.debug("--> _buildStmtSwitch (%d cases)" % len(t.cases))
+        cases = []
+        for keys, body in t.cases:
+            cases.append(self.ctxt().mkExecStmtCase(
+                list(keys),
+                self._buildScope(body)))
+        stmt = self.ctxt().mkExecStmtSwitch(
+            self._expr.build(t.subject),
+            cases,
+            self._buildScope(t.default) if t.default is not None else None)
+        self._log.debug("<-- _buildStmtSwitch")
+        return stmt
+
+    @staticmethod
+    def _caseLadder(t : CaseTable, s : ast.Match) -> ast.If:
+        """Equivalent if/elif ladder of a table with at least one case"""
+        ret = t.default if t.default is not None else []
+        for keys, body in reversed(t.cases):
+            tests = [ast.copy_location(ast.Compare(
+                left=t.subject, ops=[ast.Eq()],
+                comparators=[ast.copy_location(ast.Constant(value=k), t.subject)]), t.subject)
+                for k in keys]
+            test = tests[0] if len(tests) == 1 else ast.copy_location(
+                ast.BoolOp(op=ast.Or(), values=tests), t.subject)
+            ret = [ast.copy_location(ast.If(test=test, body=body, orelse=ret), s)]
+        return ret[0]
+
+    def _buildStmtAssign(self, s : ast.Assign) -> dm.ExecStmt:
+        return self.ctxt().mkExecStmtAssign(
+            self._expr.build(s.targets[0]),
+            self._expr.build(s.value))
 
-    def _buildStmtAugAssign(self, s : ast.AugAssign):
-        pass
+    def _buildStmtAugAssign(self, s : ast.AugAssign) -> dm.ExecStmt:
+        # 'x op= v' is lowered as 'x = x op v'
+        value = ast.copy_location(
+            ast.BinOp(left=s.target, op=s.op, right=s.value), s)
+        return self.ctxt().mkExecStmtAssign(
+            self._expr.build(s.target),
+            self._expr.build(value))
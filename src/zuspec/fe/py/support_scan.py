@@ -0,0 +1,230 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import ast
+import dataclasses as dc
+import hashlib
+import logging
+import zuspec.dataclasses as zdc
+from typing import Any, ClassVar, Iterable, List, Optional, Set, Tuple
+from .analysis import Analyzer, ComponentInfo, ExecInfo, FieldInfo, FieldKind, SyncInfo
+from .cache import LruCache, WeakLruCache
+from .case_table import CaseRecognizer
+from .emitter import Emitter
+from .expr_factory import ExprFactory
+from .stmt_factory import StmtFactory
+
+@dc.dataclass
+class Unsupported(object):
+    """A construct that the dm lowering doesn't handle"""
+    component : str = dc.field()
+    # Exec/sync method or field name
+    member : str = dc.field()
+    construct : str = dc.field()
+    message : str = dc.field()
+    file : Optional[str] = dc.field(default=None)
+    line : int = dc.field(default=-1)
+    col : int = dc.field(default=-1)
+
+    def __str__(self):
+        return "%s:%d:%d: %s.%s: %s" % (
+            self.file, self.line, self.col, self.component, self.member, self.message)
+
+# Finding within a method body: (line, col, construct, message), with the
+# line relative to the method's first source line
+_Finding = Tuple[int, int, str, str]
+
+@dc.dataclass
+class _BodyScan(object):
+    findings : Tuple[_Finding, ...] = dc.field(default_factory=tuple)
+    # 'self.<name>' references, checked against the component's fields
+    # when reported: (name, line, col)
+    refs : Tuple[Tuple[str, int, int], ...] = dc.field(default_factory=tuple)
+
+@dc.dataclass
+class SupportScanner(Emitter):
+    """
+    Pre-scan for constructs the dm lowering (TransformToDm) doesn't
+    support. Rather than stopping at the first error, as lowering does,
+    every exec body and field of a component hierarchy is checked and
+    all problems are collected with their source locations.
+
+    What is supported is decided by StmtFactory.unsupported() and
+    ExprFactory.unsupported(), which the lowering itself checks.
+
+    Method ASTs come from the Analyzer, so nothing is re-parsed. Scan
+    results are cached (in a bounded LRU) per method source fingerprint
+    (the body AST, including locations), so methods with identical
+    source, such as those of factory-generated classes, are scanned once.
+    """
+    analyzer : Optional[Analyzer] = dc.field(default=None)
+    findings : List[Unsupported] = dc.field(default_factory=list)
+    _seen : Set[type] = dc.field(default_factory=set)
+    _info : Optional[ComponentInfo] = dc.field(default=None)
+
+    _fp_m : ClassVar = WeakLruCache("support_scan.fingerprints")
+    _scan_m : ClassVar = LruCache("support_scan.bodies")
+    _log : ClassVar = logging.getLogger("SupportScanner")
+
+    def __post_init__(self):
+        if self.analyzer is None:
+            self.analyzer = Analyzer.inst()
+
+    @classmethod
+    def clearCache(cls):
+        cls._scan_m.clear()
+
+    def scan(self, types : Iterable[type]) -> List[Unsupported]:
+        """Scans the given component types, and their sub-components"""
+        if isinstance(types, type):
+            types = [types]
+        work = [t if isinstance(t, type) else type(t) for t in types]
+        while len(work) > 0:
+            t = work.pop()
+            if t in self._seen:
+                continue
+            self._seen.add(t)
+            info = self.analyzer.analyze(t)
+            self.emit(info)
+            for f in info.fields:
+                if f.kind == FieldKind.Data and isinstance(f.type, type) \
+                        and issubclass(f.type, zdc.Component):
+                    work.append(f.type)
+        return self.findings
+
+    def enterComponent(self, info : ComponentInfo):
+        self._info = info
+
+    def leaveComponent(self, info : ComponentInfo) -> Any:
+        self._info = None
+        return self.findings
+
+    def emitField(self, f : FieldInfo):
+        if f.kind in (FieldKind.Exec, FieldKind.Extern):
+            return
+        if f.width is None:
+            # TypeFactory only lowers zdc.Bit types
+            self._add(f.name, "field", "Unsupported type %s for field %s" % (
+                getattr(f.type, "__qualname__", str(f.type)), f.name))
+
+    def emitSync(self, s : SyncInfo):
+        for what, p in (("clock", s.clock), ("reset", s.reset)):
+            if len(p.indices) == 0:
+                self._add(s.name, "path", "%s is not a static field reference" % what,
+                          s.file, s.line)
+        self._scanBody(s)
+
+    def emitExec(self, e : ExecInfo):
+        self._add(e.name, "exec", "Only sync execs are supported by the dm target",
+                  e.file, e.line)
+        self._scanBody(e)
+
+    def _add(self, member : str, construct : str, message : str,
+             file : Optional[str] = None, line : int = -1, col : int = -1):
+        self.findings.append(Unsupported(
+            component=self._info.name, member=member, construct=construct,
+            message=message, file=file, line=line, col=col))
+
+    def _scanBody(self, e : ExecInfo):
+        fp = self._fp_m.getOrCreate(e.method, lambda: self._fingerprint(e))
+        scan = self._scan_m.get(fp, None)
+        if scan is None:
+            scan = _BodyScan()
+            _BodyChecker(scan).check(self._loweredBody(e))
+            self._scan_m[fp] = scan
+
+        def _loc(line, col):
+            return (e.line + line - 1 if e.line > 0 else line), col + e.indent
+
+        for line, col, construct, message in scan.findings:
+            self._add(e.name, construct, message, e.file, *_loc(line, col))
+        for name, line, col in scan.refs:
+            try:
+                self._info.field(name)
+            except KeyError:
+                self._add(e.name, "attribute", "No field '%s' in %s" % (
+                    name, self._info.name), e.file, *_loc(line, col))
+
+    @staticmethod
+    def _loweredBody(e : ExecInfo) -> List[ast.stmt]:
+        # The reset test of a split sync body isn't lowered as written
+        split = getattr(e, "reset_split", None)
+        if split is not None:
+            return split.reset_body + split.update_body
+        return e.body
+
+    @classmethod
+    def _fingerprint(cls, e : ExecInfo) -> bytes:
+        h = hashlib.blake2b(digest_size=16)
+        for s in cls._loweredBody(e):
+            h.update(ast.dump(s, annotate_fields=False, include_attributes=True).encode())
+        return h.digest()
+
+class _BodyChecker(object):
+    """Collects unsupported statements and expressions in a method body"""
+
+    def __init__(self, scan : _BodyScan):
+        self.scan = scan
+        self._findings : List[_Finding] = []
+        self._refs : List[Tuple[str, int, int]] = []
+
+    def check(self, body : List[ast.stmt]):
+        # Explicit work stack, so deeply-nested bodies don't recurse
+        work : List[ast.AST] = list(reversed(body))
+        while len(work) > 0:
+            n = work.pop()
+            if isinstance(n, ast.stmt):
+                children = self._checkStmt(n)
+            else:
+                children = self._checkExpr(n)
+            work.extend(reversed(children))
+        self.scan.findings = tuple(self._findings)
+        self.scan.refs = tuple(self._refs)
+
+    def _add(self, n : ast.AST, reason : Tuple[str, str]):
+        self._findings.append((
+            getattr(n, "lineno", -1), getattr(n, "col_offset", -1), reason[0], reason[1]))
+
+    def _checkStmt(self, s : ast.stmt) -> List[ast.AST]:
+        reason = StmtFactory.unsupported(s)
+        if reason is not None:
+            self._add(s, reason)
+        if isinstance(s, ast.If):
+            return [s.test] + s.body + s.orelse
+        elif isinstance(s, ast.Match):
+            table = CaseRecognizer.recognizeMatch(s)
+            if table is None:
+                return []
+            ret = [table.subject]
+            for keys, body in table.cases:
+                ret.extend(body)
+            if table.default is not None:
+                ret.extend(table.default)
+            return ret
+        elif isinstance(s, ast.Assign):
+            targets = s.targets if reason is None else []
+            return targets + [s.value]
+        elif isinstance(s, ast.AugAssign):
+            targets = [s.target] if isinstance(s.target, ast.Attribute) else []
+            return targets + [s.value]
+        return []
+
+    def _checkExpr(self, e : ast.expr) -> List[ast.AST]:
+        reason = ExprFactory.unsupported(e)
+        if reason is not None:
+            self._add(e, reason)
+        elif isinstance(e, ast.Attribute):
+            self._refs.append((e.attr, e.lineno, e.col_offset))
+        return ExprFactory.operands(e)
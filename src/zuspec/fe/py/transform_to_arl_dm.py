@@ -0,0 +1,169 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import ast
+import dataclasses as dc
+import logging
+import zsp_arl_dm.core as arl
+import vsc_dm.core as vsc
+from typing import Any, ClassVar, Dict, List, Optional
+from .analysis import Analyzer, ComponentInfo, ExecInfo, FieldInfo, FieldKind, SyncInfo
+from .emitter import Emitter
+from .width_infer import DEFAULT_INT_WIDTH, ExprWidth, WidthInference
+
+_AUG_ASSIGN_OP_M : Dict[type, Any] = {
+    ast.Add: arl.TypeProcStmtAssignOp.PlusEq,
+    ast.Sub: arl.TypeProcStmtAssignOp.MinusEq,
+    ast.LShift: arl.TypeProcStmtAssignOp.ShlEq,
+    ast.RShift: arl.TypeProcStmtAssignOp.ShrEq,
+    ast.BitOr: arl.TypeProcStmtAssignOp.OrEq,
+    ast.BitAnd: arl.TypeProcStmtAssignOp.AndEq,
+}
+
+@dc.dataclass
+class TransformToArlDm(Emitter):
+    """Emits analyzed components as zsp_arl_dm component types"""
+    ctxt : Any = dc.field()
+    analyzer : Optional[Analyzer] = dc.field(default=None)
+    _comp : Any = dc.field(default=None)
+    _widths : Dict[ast.expr, ExprWidth] = dc.field(default_factory=dict)
+    _log : ClassVar = logging.getLogger("zuspec.fe.py.TransformToArlDm")
+
+    def __post_init__(self):
+        if self.analyzer is None:
+            self.analyzer = Analyzer.inst()
+
+    def transform(self, t) -> arl.DataTypeComponent:
+        self._log.debug("--> transform: %s" % str(t))
+        ret = self.emit(self.analyzer.analyze(t))
+        self._log.debug("<-- transform: %s" % str(t))
+        return ret
+
+    def enterComponent(self, info : ComponentInfo):
+        self._comp = self.ctxt.mkDataTypeComponent(info.name)
+        self.ctxt.addDataTypeComponent(self._comp)
+        self._widths = WidthInference.get(info)
+
+    def leaveComponent(self, info : ComponentInfo) -> arl.DataTypeComponent:
+        ret = self._comp
+        self._comp = None
+        self._widths = {}
+        return ret
+
+    def emitField(self, f : FieldInfo):
+        if not f.is_port:
+            return
+        width = 1 if f.width is None else f.width
+        data_t = self.ctxt.findDataTypeInt(False, width)
+        if data_t is None:
+            data_t = self.ctxt.mkDataTypeInt(False, width)
+            self.ctxt.addDataTypeInt(data_t)
+        self._comp.addField(self.ctxt.mkTypeFieldInOut(
+            f.name,
+            data_t,
+            f.kind == FieldKind.Input))
+
+    def emitSync(self, s : SyncInfo):
+        self.emitExec(s)
+
+    def emitExec(self, e : ExecInfo):
+        body = self.ctxt.mkTypeProcStmtScope()
+        for stmt in e.body:
+            for s in self._procStmt(stmt):
+                body.addStatement(s)
+        self._comp.addExec(self.ctxt.mkTypeExecProc(arl.ExecKindT.Body, body))
+
+    def _procStmt(self, node : ast.stmt) -> List[Any]:
+        stmts = []
+        if isinstance(node, ast.If):
+            cond_expr = self._procExpr(node.test)
+            body_scope = self.ctxt.mkTypeProcStmtScope()
+            for stmt in node.body:
+                for s in self._procStmt(stmt):
+                    body_scope.addStatement(s)
+            if_clauses = [self.ctxt.mkTypeProcStmtIfClause(cond_expr, body_scope)]
+            else_scope = self.ctxt.mkTypeProcStmtScope()
+            for stmt in node.orelse:
+                for s in self._procStmt(stmt):
+                    else_scope.addStatement(s)
+            stmts.append(self.ctxt.mkTypeProcStmtIfElse(if_clauses, else_scope))
+        elif isinstance(node, ast.Assign):
+            rhs = self._procExpr(node.value)
+            for t in node.targets:
+                stmts.append(self.ctxt.mkTypeProcStmtAssign(
+                    self._procExpr(t), arl.TypeProcStmtAssignOp.Eq, rhs))
+        elif isinstance(node, ast.AugAssign):
+            op = _AUG_ASSIGN_OP_M.get(type(node.op), None)
+            if op is None:
+                raise NotImplementedError("Unsupported augmented assignment: %s (line %d)" % (
+                    type(node.op).__name__, node.lineno))
+            stmts.append(self.ctxt.mkTypeProcStmtAssign(
+                self._procExpr(node.target), op,
+                self._procExpr(node.value)))
+        elif isinstance(node, ast.Pass):
+            pass
+        elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) \
+                and isinstance(node.value.value, str):
+            # Docstring
+            pass
+        else:
+            raise NotImplementedError("Unsupported statement: %s (line %d)" % (
+                type(node).__name__, node.lineno))
+        return stmts
+
+    def _procExpr(self, expr : ast.expr) -> vsc.TypeExpr:
+        if isinstance(expr, ast.BinOp):
+            op_m = {
+                ast.Add: vsc.BinOp.Add,
+                ast.Sub: vsc.BinOp.Sub,
+                ast.Mult: vsc.BinOp.Mul,
+                ast.BitAnd: vsc.BinOp.BinAnd,
+                ast.BitOr: vsc.BinOp.BinOr,
+                ast.BitXor: vsc.BinOp.Xor,
+            }
+            op = op_m.get(type(expr.op))
+            if op is None:
+                raise NotImplementedError(f"Unsupported BinOp: {type(expr.op)}")
+            return self.ctxt.mkTypeExprBin(
+                self._procExpr(expr.left), op, self._procExpr(expr.right))
+        elif isinstance(expr, ast.UnaryOp):
+            op_m = {
+                ast.Not: vsc.UnaryOp.Not,
+                # Add more as needed
+            }
+            op = op_m.get(type(expr.op))
+            if op is None:
+                raise NotImplementedError(f"Unsupported UnaryOp: {type(expr.op)}")
+            return self.ctxt.mkTypeExprUnary(op, self._procExpr(expr.operand))
+        elif isinstance(expr, ast.Attribute):
+            # Handle attribute access (e.g., self.x)
+            if isinstance(expr.value, ast.Name) and expr.value.id == "self":
+                return vsc.TypeExpr.mkVarRef(expr.attr)
+            raise NotImplementedError("Only 'self.<field>' attribute access is supported")
+        elif isinstance(expr, ast.Name):
+            return vsc.TypeExpr.mkVarRef(expr.id)
+        elif isinstance(expr, ast.Constant):
+            # Only handle integer constants for now. Sized to context
+            if isinstance(expr.value, int):
+                w = self._widths.get(expr, None)
+                if w is None:
+                    w = ExprWidth(DEFAULT_INT_WIDTH, True)
+                return self.ctxt.mkTypeExprVal(
+                    self.ctxt.mkValRefInt(expr.value, w.signed, w.width))
+            else:
+                raise NotImplementedError(f"Unsupported constant type: {type(expr.value)}")
+        else:
+            raise NotImplementedError(f"Unsupported AST expr: {type(expr)}")
+
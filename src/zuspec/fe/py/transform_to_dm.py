@@ -14,205 +14,185 @@
 # limitations under the License.
 #****************************************************************************
 import dataclasses as dc
-import inspect
 import logging
 import zuspec.dataclasses as zdc
-from typing import ClassVar, List, Optional, cast
-from zuspec.dataclasses import Input, Output
+from typing import ClassVar, List, Optional, Tuple, cast
 import zuspec.dm as dm
 from zuspec.dm import (DataTypeComponent, Loc)
+from .analysis import Analyzer, ComponentInfo, ExecInfo, FieldInfo, FieldKind, PathRef, SyncInfo
+from .connectivity import ConnectivityGraph
 from .context import Context, StructScope
+from .emitter import Emitter
+from .prune import PruneReport, Pruner
+from .reset_split import ResetSplitter
 from .stmt_factory import StmtFactory
 from .type_factory import TypeFactory
 from .visitor import Visitor
 
 @dc.dataclass
-class TransformToDm(Visitor):
+class TransformToDm(Visitor, Emitter):
     ctxt : Optional[Context] = dc.field(default=None)
+    analyzer : Optional[Analyzer] = dc.field(default=None)
+    # Lower structurally-identical classes to a single type
+    dedupe : bool = dc.field(default=False)
+    # Omit fields and sync blocks that can't affect ports or bound fields.
+    # 'keep' names additional fields to treat as observable
+    prune : bool = dc.field(default=False)
+    keep : Tuple[str, ...] = dc.field(default_factory=tuple)
+    prune_reports : List[PruneReport] = dc.field(default_factory=list)
     _log : ClassVar = logging.getLogger("zuspec.be.py.TransformToDm")
 
     def __post_init__(self):
         super().__post_init__()
         assert self.ctxt is not None
+        if self.analyzer is None:
+            self.analyzer = Analyzer.inst()
 
     def visitComponentType(self, t):
-        # Always work with the class, not the instance
         t_cls = t if isinstance(t, type) else type(t)
-        name = t_cls.__qualname__
-        comp_t = self.ctxt().mkDataTypeComponent(name)
-        self.ctxt().addDataTypeStruct(comp_t)
-
-        self.ctxt.push_scope(StructScope(scope=t, type=comp_t))
-
-        # Call base Visitor logic to ensure visitExec is called
-        self.visitStructType(cast(zdc.Struct, t))
-
-        # Explicitly call visitExec for @sync methods
-        from zuspec.dataclasses.annotation import AnnotationSync
-        for attr_name in dir(t_cls):
-            attr = getattr(t_cls, attr_name)
-            if hasattr(attr, "__zsp_annotation__") and isinstance(getattr(attr, "__zsp_annotation__"), AnnotationSync):
-                self.visitExec(attr)
-        
-        self.ctxt.pop_scope()
+        comp_t = self.ctxt.findComponentType(t_cls)
+        if comp_t is not None:
+            self._log.debug("Reusing lowered type for %s" % t_cls.__qualname__)
+            self.ctxt.setResult(comp_t)
+            return
+        elif self.ctxt.frozen:
+            raise RuntimeError("Cannot lower %s into a frozen context. Use a fork() of it" % (
+                t_cls.__qualname__))
+
+        # Analysis is shared with other targets. Only emission is specific to dm
+        info = self.analyzer.analyze(t_cls)
+        report = None
+        if self.prune:
+            info, report = self._prune(t_cls, info)
+        name = self.ctxt.uniqueTypeName(info.name)
+        if self.dedupe and info.fingerprint is not None:
+            comp_t = self.ctxt.findComponentTypeByFingerprint(info.fingerprint)
+            if comp_t is not None:
+                self._log.debug("%s is structurally identical to a lowered type" % name)
+                self.ctxt.addComponentAlias(t_cls, name, comp_t)
+                if report is not None and len(report.removed_fields) > 0:
+                    self.ctxt.setFieldIndexMap(t_cls, report.index_m)
+                self.ctxt.setResult(comp_t)
+                return
+
+        if name != info.name:
+            # Distinct class with the same qualified name (eg a local class)
+            info = dc.replace(info, name=name)
+        comp_t = self.emit(info)
+        self.ctxt.addComponentType(t_cls, name, comp_t, info.fingerprint)
+        if report is not None and len(report.removed_fields) > 0:
+            self.ctxt.setFieldIndexMap(t_cls, report.index_m)
         self.ctxt.setResult(comp_t)
 
-    def visitStructType(self, t : zdc.Struct):
-        self._visitFields(t)
-        self._visitExecs(t)
-        
-        for f in dir(t):
-            o = getattr(t, f)
-#             if callable(o) and hasattr(o, Annotation.NAME):
-#                 # Extract source code of the method
-#                 try:
-#                     src = inspect.getsource(o)
-#                     src = textwrap.dedent(src)
-#                     tree = ast.parse(src)
-#                     for stmt in tree.body[0].body:  # tree.body[0] is the FunctionDef
-#                         self.visit_statement(stmt)
-#                 except Exception as e:
-#                     print(f"Could not process method {f}: {e}")
-# #                self.visitExec(f, o)
-# #                print("Found")
-
-    def visitExec(self, m):
-        # Called for methods decorated with @zdc.sync
-        import inspect
-        import ast
-        from zsp_arl_dm.core import ExecKindT
-
-        import textwrap
-        src = inspect.getsource(m)
-        src = textwrap.dedent(src)
-        tree = ast.parse(src)
-
-        body = self.ctxt().mkTypeProcStmtScope()
-
-        def _proc_expr(expr):
-            # Recursively convert Python AST expressions to vsc_dm.core expressions
-            if isinstance(expr, ast.BinOp):
-                pass
-            elif isinstance(expr, ast.UnaryOp):
-                op_map = {
-                    ast.Not: vsc_dm.UnaryOp.Not,
-                    # Add more as needed
-                }
-                operand = _proc_expr(expr.operand)
-                op = op_map.get(type(expr.op))
-                if op is None:
-                    raise NotImplementedError(f"Unsupported UnaryOp: {type(expr.op)}")
-                return self.ctxt().mkModelExprUnary(op, operand, False)
-            elif isinstance(expr, ast.Name):
-                # Look up the field in the current component by name
-                field = None
-                for f in self.comp.getFields():
-                    if f.name() == expr.id:
-                        field = f
-                        break
-                if field is None:
-                    raise RuntimeError(f"Field '{expr.id}' not found in component")
-                model_field = self.ctxt.buildModelField(field)
-                return self.ctxt().mkModelExprFieldRef(model_field)
-            elif isinstance(expr, ast.Attribute):
-                # Handle attribute access (e.g., self.x)
-                if isinstance(expr.value, ast.Name) and expr.value.id == "self":
-                    field = None
-                    for f in self.comp.getFields():
-                        if f.name() == expr.attr:
-                            field = f
-                            break
-                    if field is None:
-                        raise RuntimeError(f"Field '{expr.attr}' not found in component")
-                    model_field = self.ctxt.buildModelField(field)
-                    return self.ctxt().mkModelExprFieldRef(model_field)
-                raise NotImplementedError("Only 'self.<field>' attribute access is supported")
-            elif isinstance(expr, ast.Constant):
-                # Only handle integer constants for now
-                if isinstance(expr.value, int):
-                    return self.ctxt().mkModelExprVal(self.ctxt().mkValRefInt(expr.value, True, 32))
-                else:
-                    raise NotImplementedError(f"Unsupported constant type: {type(expr.value)}")
+    def _prune(self, t : type, info : ComponentInfo) -> Tuple[ComponentInfo, PruneReport]:
+        keep = set(self.keep)
+        for idx in ConnectivityGraph.boundFields(t, self.analyzer):
+            keep.add(info.fields[idx].name)
+        info, report = Pruner.prune(info, keep)
+        self.prune_reports.append(report)
+        if not report.empty:
+            self._log.info("%s: pruned fields %s, syncs %s" % (
+                report.component, report.removed_fields, report.removed_syncs))
+        return info, report
+
+    def remapPath(self, t : type, indices : Tuple[int, ...]) -> Tuple[int, ...]:
+        """
+        Maps a field-index path from class 't', computed on the unpruned
+        classes (eg by ConnectivityGraph, or for an enclosing component's
+        binds), to the field indices of the lowered types. Classes that
+        haven't been lowered with pruning map unchanged
+        """
+        ret = []
+        for idx in indices:
+            index_m = self.ctxt.fieldIndexMap(t)
+            fields = self.analyzer.fieldInfos(t)
+            if index_m is not None:
+                if idx not in index_m:
+                    raise KeyError("Field %s of %s was removed by pruning. Name it in 'keep' to retain it" % (
+                        fields[idx].name, t.__qualname__))
+                ret.append(index_m[idx])
             else:
-                raise NotImplementedError(f"Unsupported AST expr: {type(expr)}")
-
-        def _proc_stmt(node):
-            stmts = []
-            if isinstance(node, ast.If):
-                cond_expr = _proc_expr(node.test)
-                body_scope = self.ctxt().mkTypeProcStmtScope()
-                for stmt in node.body:
-                    for s in _proc_stmt(stmt):
-                        body_scope.addStatement(s)
-                if_clauses = [self.ctxt().mkTypeProcStmtIfClause(cond_expr, body_scope)]
-                else_scope = self.ctxt().mkTypeProcStmtScope()
-                for stmt in node.orelse:
-                    for s in _proc_stmt(stmt):
-                        else_scope.addStatement(s)
-                if_stmt = self.ctxt().mkTypeProcStmtIfElse(if_clauses, else_scope)
-                stmts.append(if_stmt)
-            # TODO: handle other statement types (assign, expr, etc.)
-            return stmts
-
-        # Traverse AST and add statements to body
-        for stmt in tree.body[0].body:
-            for s in _proc_stmt(stmt):
-                body.addStatement(s)
-
-        exec_proc = self.ctxt().mkTypeExecProc(ExecKindT.Body, body)
-        self.comp.addExec(exec_proc)
+                ret.append(idx)
+            t = fields[idx].type
+        return tuple(ret)
 
-    def visitExecSync(self, e : zdc.ExecSync):
-        self._log.debug("--> visitExecSync")
-        import inspect
-        import ast
-        from .static_path_mock import StaticPathMock
-
-        import textwrap
-        src = inspect.getsource(e.method)
-        src = textwrap.dedent(src)
-        tree = ast.parse(src)
+    def enterComponent(self, info : ComponentInfo):
+        comp_t = self.ctxt().mkDataTypeComponent(info.name)
+        self.ctxt().addDataTypeStruct(comp_t)
+        self.ctxt.push_scope(StructScope(scope=info, type=comp_t))
 
+    def leaveComponent(self, info : ComponentInfo) -> DataTypeComponent:
         scope : StructScope = cast(StructScope, self.ctxt.scope)
+        self.ctxt.pop_scope()
+        return scope.type
 
-        clock_r = e.clock(StaticPathMock(self.ctxt, scope.scope))
-        reset_r = e.reset(StaticPathMock(self.ctxt, scope.scope))
-
-        if not isinstance(clock_r, StaticPathMock) or clock_r.expr is None:
-            raise Exception("Clock is not a static ref (%s)" % str(clock_r))
-
-        if not isinstance(reset_r, StaticPathMock) or reset_r.expr is None:
-            raise Exception("Reset is not a static ref (%s)" % str(reset_r))
+    def emitExec(self, e : ExecInfo):
+        raise NotImplementedError(
+            "Exec %s: only sync execs are supported by the dm target" % e.name)
 
-        # TODO: Convert lambda expressions to ref expressions
+    def emitSync(self, s : SyncInfo):
+        self._log.debug("--> emitSync")
+        scope : StructScope = cast(StructScope, self.ctxt.scope)
 
-        clock = clock_r.expr
-        reset = reset_r.expr
+        clock = self._mkPathRef(s.clock, "Clock")
+        reset = self._mkPathRef(s.reset, "Reset")
 
-        self._log.debug("method: %s" % str(e.method))
+        self._log.debug("method: %s" % str(s.method))
 
-        file = e.method.__code__.co_filename
-        line = e.method.__code__.co_firstlineno
-        pos = -1
         exec = self.ctxt().mkExecSync(
             clock,
             reset,
-            ref=e.method,
-            loc=Loc(file=file, line=line, ref=e.method)
+            ref=s.method,
+            loc=Loc(file=s.file, line=s.line, ref=s.method)
         )
 
-        # Process the body 
-        for s_ast in tree.body[0].body:
-            stmt = StmtFactory(self.ctxt).build(s_ast)
-            print("Stmt: %s" % stmt)
+        # Process the body. Reset-guarded bodies are emitted as separate
+        # reset and update blocks, so backends don't test reset every cycle.
+        # The split needs ExecSync reset-body setters. Where the dm build
+        # doesn't provide them, a single body is lowered instead
+        stmt_f = StmtFactory(self.ctxt)
+        split = s.reset_split
+        if not hasattr(exec, "setBody"):
+            self._log.warning("ExecSync has no setBody; body of %s not attached" % s.name)
+        elif split is None:
+            exec.setBody(stmt_f.buildScope(s.body))
+        elif hasattr(exec, "setResetBody") and hasattr(exec, "setResetActiveLow"):
+            exec.setResetBody(stmt_f.buildScope(split.reset_body))
+            exec.setResetActiveLow(split.active_low)
+            exec.setBody(stmt_f.buildScope(split.update_body))
+        else:
+            # The reset test is rebuilt, as it may be written with 'not'
+            exec.setBody(stmt_f.buildScope([
+                ResetSplitter.join(split, s.reset.names, s.body[0])]))
 
         scope.type.addExec(exec)
-        self._log.debug("<-- visitExecSync")
-
-    def visitField(self, f):
-        self._log.debug("--> visitField: %s" % f.name)
+        self._log.debug("<-- emitSync")
+
+    def _mkPathRef(self, p : PathRef, what : str) -> Optional[dm.TypeExpr]:
+        if len(p.indices) == 0:
+            # Not specified (eg on an annotated sync method)
+            self._log.debug("%s not specified" % what)
+            return None
+        indices = p.indices
+        if len(indices) > 1:
+            # The first index is already that of the (pruned) component.
+            # The rest are into sub-components, which may have been pruned
+            info = cast(StructScope, self.ctxt.scope).scope
+            indices = indices[:1] + self.remapPath(info.fields[indices[0]].type, indices[1:])
+        expr = self.ctxt().mkTypeExprRefSelf()
+        for idx in indices:
+            expr = self.ctxt().mkTypeExprRefField(expr, idx)
+        return expr
+
+    def emitField(self, f : FieldInfo):
+        self._log.debug("--> emitField: %s" % f.name)
         scope : StructScope = cast(StructScope, self.ctxt.scope)
 
+        if f.kind in (FieldKind.Exec, FieldKind.Extern):
+            # Not represented as data fields
+            self._log.debug("<-- emitField: %s (skip)" % f.name)
+            return
+
         # TODO: gather binds from fields
 
         data_t = TypeFactory(self.ctxt).build(f.type)
@@ -221,45 +201,20 @@ class TransformToDm(Visitor):
             raise NotImplementedError(f"Unsupported type for field {f.name}")
 
         field : dm.TypeField = None
-        if hasattr(f, "default_factory"):
-            kind_m = [
-                (Input, self._mkFieldInOut),
-                (Output, self._mkFieldInOut),
-            ]
-
-            for kind_t, kind_f in kind_m:
-                if issubclass(f.default_factory, kind_t):
-                    field = kind_f(f, data_t)
-                    break
+        if f.is_port:
+            field = self._mkFieldInOut(f, data_t)
         else:
             field = self.ctxt().mkTypeField(f.name, data_t)
 
-        if field is None:
-            raise NotImplementedError(f"Port {f.name} (type {f.type}) not supported")
-        
         scope.type.addField(field)
-        self._log.debug("<-- visitField: %s" % f.name)
+        self._log.debug("<-- emitField: %s" % f.name)
         
-    def _mkFieldInOut(self, f, data_t : dm.DataType) -> dm.TypeFieldInOut:
+    def _mkFieldInOut(self, f : FieldInfo, data_t : dm.DataType) -> dm.TypeFieldInOut:
         field = self.ctxt().mkTypeFieldInOut(
             f.name,
             data_t,
-            issubclass(f.default_factory, Output))
+            f.kind == FieldKind.Output)
         return field
-    
-    def _visitExecs(self, t):
-        self._log.debug("--> _visitExecs")
-        exec_t = (
-            (zdc.ExecSync, self.visitExecSync),
-            (zdc.Exec, self.visitExec)
-        )
-        for n in dir(t):
-            o = getattr(t, n)
-            for et, em in exec_t:
-                if isinstance(o, et):
-                    em(o)
-                    break
-        self._log.debug("<-- _visitExecs")
 
     def _visitDataType(self, t):
 
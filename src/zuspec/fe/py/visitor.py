@@ -22,6 +22,8 @@ from typing import Callable, ClassVar, Dict, Type, List, Tuple
 import inspect
 import ast
 import textwrap
+from .member_catalog import MemberCatalog
+from .static_path import StaticPath
 
 class _BindPathMock:
     def __init__(self, typ, path=None):
@@ -32,13 +34,14 @@ class _BindPathMock:
         if name in ("_typ", "_path", "__class__"):
             return object.__getattribute__(self, name)
         # Validate field exists
-        fields = {f.name for f in dc.fields(self._typ)}
-        if name not in fields:
-            raise AttributeError(f"Invalid field '{name}' in path {'.'.join(self._path + [name])}")
-        # Get field type
-        field_type = next(f.type for f in dc.fields(self._typ) if f.name == name)
+        typ = object.__getattribute__(self, "_typ")
+        path = object.__getattribute__(self, "_path")
+        catalog = MemberCatalog.get(typ)
+        idx = catalog.field_index.get(name, None)
+        if idx is None:
+            raise AttributeError(f"Invalid field '{name}' in path {'.'.join(path + [name])}")
         # Return new mock for nested access
-        return _BindPathMock(field_type, self._path + [name])
+        return _BindPathMock(catalog.fields[idx].type, path + [name])
 
     def __call__(self):
         # For supporting callables if needed
@@ -81,47 +84,35 @@ class Visitor(object):
         Processes a lambda expression returning a single property path.
         Returns: (field_obj, path_tuple)
         """
-        root_mock = _BindPathMock(root_type, ["s"])
-        result_mock = path_lambda(root_mock)
-        path = getattr(result_mock, "_path", None)
-        if path is None:
-            raise ValueError("Lambda must return a _BindPathMock instance")
-        typ = root_type
-        for name in path[1:]:  # skip 's'
-            field = next(f for f in dc.fields(typ) if f.name == name)
-            typ = field.type
-        return (field, tuple(path))
+        names = StaticPath.decodePath(path_lambda)
+        if names is None:
+            names = self._mockPath(path_lambda(_BindPathMock(root_type, ["s"])))
+        _, fields = StaticPath.resolve(root_type, names)
+        return (fields[-1], ("s",) + names)
 
     def _elabBinds(self, bind_lambda, root_type):
-        # Instantiate mock for root
-        root_mock = _BindPathMock(root_type, ["s"])
-        # Evaluate lambda to get mapping
-        mapping = bind_lambda(root_mock)
+        pairs = StaticPath.decodeBinds(bind_lambda)
+        if pairs is None:
+            # Instantiate mock for root and evaluate lambda to get mapping
+            mapping = bind_lambda(_BindPathMock(root_type, ["s"]))
+            pairs = tuple(
+                (self._mockPath(k), self._mockPath(v)) for k, v in mapping.items())
         result = {}
-        for k, v in mapping.items():
-            # Extract path from mock objects
-            k_path = getattr(k, "_path", None)
-            v_path = getattr(v, "_path", None)
-            if k_path is None or v_path is None:
-                raise ValueError("Bind keys/values must be _BindPathMock instances")
-            # Get terminal Field for key
-            k_typ = root_type
-            for name in k_path[1:]:  # skip 's'
-                field = next(f for f in dc.fields(k_typ) if f.name == name)
-                k_typ = field.type
-            k_field = field
-            # Get terminal Field for value
-            v_typ = root_type
-            for name in v_path[1:]:
-                field = next(f for f in dc.fields(v_typ) if f.name == name)
-                v_typ = field.type
-            v_field = field
-            result[(k_field, tuple(k_path))] = (v_field, tuple(v_path))
+        for k_path, v_path in pairs:
+            # Get terminal Field for key and value
+            _, k_fields = StaticPath.resolve(root_type, k_path)
+            _, v_fields = StaticPath.resolve(root_type, v_path)
+            result[(k_fields[-1], ("s",) + k_path)] = (v_fields[-1], ("s",) + v_path)
         return result
 
+    def _mockPath(self, m) -> Tuple[str, ...]:
+        if not isinstance(m, _BindPathMock):
+            raise ValueError("Bind keys/values must be _BindPathMock instances")
+        return tuple(object.__getattribute__(m, "_path")[1:])
+
     def _visitFields(self, t : zdc.Struct):
         self._log.debug("--> visitFields")
-        for f in dc.fields(t):
+        for f in MemberCatalog.get(t).fields:
             self._log.debug("-- field: %s" % f.name)
             self._dispatchField(f)
         self._log.debug("<-- visitFields")
@@ -153,10 +144,9 @@ class Visitor(object):
 
 
     def _visitFunctions(self, t):
-        for e in dir(t):
-            if not e.startswith("__") and callable(getattr(t, e)):
-                print("Function: %s" % e)
-                self.visitFunction(getattr(t, e))
+        for e, f in MemberCatalog.get(t).functions:
+            self._log.debug("Function: %s" % e)
+            self.visitFunction(f)
 
     def visitFunction(self, f):
         pass
@@ -188,15 +178,14 @@ class Visitor(object):
         referenced inside. 
         Returns: List of [<is_write>,[path]]
         """
-        import inspect, ast, textwrap
+        from .analysis import Analyzer
 
-        src = inspect.getsource(method)
-        src = textwrap.dedent(src)
-        tree = ast.parse(src)
+        fdef = Analyzer.inst().parseMethod(method)
         refs = []
 
         # Map field names to Field objects
-        field_map = {f.name: f for f in dc.fields(t)}
+        catalog = MemberCatalog.get(t)
+        field_map = {f.name: f for f in catalog.fields}
 
         class FieldRefVisitor(ast.NodeVisitor):
             def __init__(self):
@@ -220,7 +209,7 @@ class Visitor(object):
                 self.generic_visit(node)
 
         visitor = FieldRefVisitor()
-        for stmt in tree.body[0].body:
+        for stmt in fdef.body:
             visitor.visit(stmt)
 
         # Remove duplicate refs (e.g., multiple reads/writes)
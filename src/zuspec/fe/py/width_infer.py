@@ -0,0 +1,169 @@
+#****************************************************************************
+# Copyright 2019-2025 Matthew Ballance and contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#****************************************************************************
+import ast
+import dataclasses as dc
+import logging
+from typing import ClassVar, Dict, List, Optional, Tuple
+from .analysis import ComponentInfo, ExecInfo
+from .cache import WeakLruCache
+
+# Width of values with no declared width (plain 'int' fields, locals)
+DEFAULT_INT_WIDTH = 32
+
+@dc.dataclass(frozen=True)
+class ExprWidth(object):
+    width : int = dc.field()
+    signed : bool = dc.field(default=False)
+
+# Operators whose result has the width of the wider operand
+_MAX_OPS = (
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.BitAnd, ast.BitOr, ast.BitXor)
+# Operators whose result has the width of the left operand
+_LHS_OPS = (ast.LShift, ast.RShift, ast.Pow)
+
+_BOOL = ExprWidth(1, False)
+_DEFAULT = ExprWidth(DEFAULT_INT_WIDTH, True)
+
+class WidthInference(object):
+    """
+    Infers the result width and signedness of every expression in a
+    component's exec bodies, following Verilog-style rules:
+
+    * field refs have the width of their ``zdc.Bit[W]`` type (unsigned)
+    * arithmetic and bitwise ops take the wider operand's width, shifts
+      and power the left operand's. Results are signed only if both
+      operands are
+    * comparisons and logical ops are 1 bit
+    * integer constants are sized to context: to the other operand of a
+      binary op or comparison, or to the target of an assignment. Free
+      constants take their minimal width
+
+    Results are computed once per component and cached.
+    """
+    _widths_m : ClassVar = WeakLruCache("width_infer.components")
+    _log : ClassVar = logging.getLogger("WidthInference")
+
+    def __init__(self, info : ComponentInfo):
+        self.info = info
+        self.widths : Dict[ast.expr, ExprWidth] = {}
+
+    @classmethod
+    def get(cls, info : ComponentInfo) -> Dict[ast.expr, ExprWidth]:
+        """Returns the widths of all expressions in 'info's exec bodies"""
+        ret = cls._widths_m.get(info, None)
+        if ret is None:
+            inf = WidthInference(info)
+            for e in list(info.syncs) + list(info.execs):
+                inf.inferBody(e.body)
+            ret = inf.widths
+            cls._widths_m[info] = ret
+        return ret
+
+    def inferBody(self, stmts : List[ast.stmt]):
+        for s in stmts:
+            for n in ast.walk(s):
+                if isinstance(n, ast.expr) and n not in self.widths:
+                    self._inferSelf(n)
+        for s in stmts:
+            for n in ast.walk(s):
+                self._sizeConstants(n)
+
+    def _inferSelf(self, e : ast.expr):
+        # Self-determined widths, post-order with an explicit work stack
+        work : List[Tuple[ast.expr, bool]] = [(e, False)]
+        while len(work) > 0:
+            n, expanded = work.pop()
+            if expanded:
+                self.widths[n] = self._nodeWidth(n)
+            else:
+                work.append((n, True))
+                for c in ast.iter_child_nodes(n):
+                    if isinstance(c, ast.expr) and c not in self.widths:
+                        work.append((c, False))
+
+    def _nodeWidth(self, e : ast.expr) -> ExprWidth:
+        w = self.widths
+        if isinstance(e, ast.Attribute):
+            if isinstance(e.value, ast.Name) and e.value.id == "self":
+                try:
+                    f = self.info.field(e.attr)
+                except KeyError:
+                    return _DEFAULT
+                if f.width is not None:
+                    return ExprWidth(f.width, False)
+            return _DEFAULT
+        elif isinstance(e, ast.Constant):
+            return self._constWidth(e.value)
+        elif isinstance(e, ast.BinOp):
+            lhs, rhs = w[e.left], w[e.right]
+            if isinstance(e.op, _LHS_OPS):
+                return lhs
+            return ExprWidth(max(lhs.width, rhs.width), lhs.signed and rhs.signed)
+        elif isinstance(e, (ast.Compare, ast.BoolOp)):
+            return _BOOL
+        elif isinstance(e, ast.UnaryOp):
+            if isinstance(e.op, ast.Not):
+                return _BOOL
+            operand = w[e.operand]
+            if isinstance(e.op, ast.USub):
+                return ExprWidth(operand.width, True)
+            return operand
+        elif isinstance(e, ast.IfExp):
+            a, b = w[e.body], w[e.orelse]
+            return ExprWidth(max(a.width, b.width), a.signed and b.signed)
+        return _DEFAULT
+
+    @staticmethod
+    def _constWidth(v) -> ExprWidth:
+        if isinstance(v, bool):
+            return _BOOL
+        elif isinstance(v, int):
+            if v < 0:
+                return ExprWidth((-v-1).bit_length() + 1, True)
+            return ExprWidth(max(v.bit_length(), 1), False)
+        return _DEFAULT
+
+    def _sizeConstants(self, n : ast.AST):
+        if isinstance(n, ast.BinOp) and isinstance(n.op, _MAX_OPS):
+            self._sizeTo(n.left, n.right)
+            self._sizeTo(n.right, n.left)
+        elif isinstance(n, ast.Compare) and len(n.ops) == 1:
+            self._sizeTo(n.left, n.comparators[0])
+            self._sizeTo(n.comparators[0], n.left)
+        elif isinstance(n, ast.Assign):
+            for t in n.targets:
+                self._sizeTo(n.value, t)
+        elif isinstance(n, ast.AugAssign) and isinstance(n.op, _MAX_OPS):
+            self._sizeTo(n.value, n.target)
+
+    def _sizeTo(self, c : ast.expr, ctxt : ast.expr):
+        if not self._isIntConst(c) or self._isIntConst(ctxt):
+            return
+        cw, tw = self.widths.get(c), self.widths.get(ctxt)
+        if cw is None or tw is None:
+            return
+        width = max(cw.width, tw.width)
+        self.widths[c] = ExprWidth(width, cw.signed)
+        if isinstance(c, ast.UnaryOp):
+            self.widths[c.operand] = ExprWidth(width, self.widths[c.operand].signed)
+
+    @staticmethod
+    def _isIntConst(e : ast.expr) -> bool:
+        if isinstance(e, ast.UnaryOp) and isinstance(e.op, ast.USub):
+            e = e.operand
+        return isinstance(e, ast.Constant) and isinstance(e.value, int) \
+            and not isinstance(e.value, bool)
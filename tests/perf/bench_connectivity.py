@@ -0,0 +1,50 @@
+#****************************************************************************
+# Benchmark: connectivity-graph construction for large bind counts
+#
+# % PYTHONPATH=$(pwd)/src python tests/perf/bench_connectivity.py
+#****************************************************************************
+import time
+import zuspec.dataclasses as zdc
+from zuspec.fe.py.connectivity import ConnectivityGraph
+
+# (instances per Mid, Mids in Top). Connections ~= product of the two
+SIZES = ((10, 100), (100, 100), (100, 1000))
+
+@zdc.dataclass
+class Sub(zdc.Component):
+    i : zdc.Bit = zdc.input()
+    o : zdc.Bit = zdc.output()
+
+def _mkChain(name, sub_t, n):
+    """Component with 'n' sub_t instances, each driven by the previous one"""
+    ns = {"zdc" : zdc, "sub_t" : sub_t}
+    lines = ["class %s(zdc.Component):" % name]
+    for k in range(n):
+        lines.append("    u%d : sub_t = zdc.field()" % k)
+    lines.append("    i : zdc.Bit = zdc.input()")
+    lines.append("    o : zdc.Bit = zdc.output()")
+    lines.append("    def __bind__(self):")
+    lines.append("        return {")
+    lines.append("            self.u0.i: self.i,")
+    for k in range(1, n):
+        lines.append("            self.u%d.i: self.u%d.o," % (k, k-1))
+    lines.append("            self.o: self.u%d.o," % (n-1))
+    lines.append("        }")
+    exec("\n".join(lines), ns)
+    return zdc.dataclass(ns[name])
+
+def main():
+    print("%10s %10s %12s %12s %12s" % ("per-mid", "mids", "connections", "build (s)", "us/conn"))
+    for per_mid, mids in SIZES:
+        Mid = _mkChain("Mid", Sub, per_mid)
+        Top = _mkChain("Top", Mid, mids)
+        start = time.perf_counter()
+        g = ConnectivityGraph.build(Top)
+        g.multipleDrivers()
+        g.unconnectedPorts()
+        t = time.perf_counter() - start
+        print("%10d %10d %12d %12.4f %12.3f" % (
+            per_mid, mids, g.num_connections, t, 1e6*t/g.num_connections))
+
+if __name__ == "__main__":
+    main()
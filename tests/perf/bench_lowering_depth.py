@@ -0,0 +1,54 @@
+#****************************************************************************
+# Benchmark: lowering of very deep expressions and long elif ladders
+#
+# % PYTHONPATH=$(pwd)/src python tests/perf/bench_lowering_depth.py
+#****************************************************************************
+import ast
+import time
+import zuspec.dm as dm
+from zuspec.fe.py import Context
+from zuspec.fe.py.analysis import ComponentInfo, FieldInfo, FieldKind
+from zuspec.fe.py.context import StructScope
+from zuspec.fe.py.expr_factory import ExprFactory
+from zuspec.fe.py.stmt_factory import StmtFactory
+
+DEPTHS = (1000, 10000, 100000)
+
+def _mkCtxt():
+    info = ComponentInfo(
+        name="Bench",
+        fields=(FieldInfo(name="a", index=0, kind=FieldKind.Data, type=int),))
+    ctxt = Context(ctxt=dm.impl.Context())
+    ctxt.push_scope(StructScope(scope=info, type=None))
+    return ctxt
+
+def _ref():
+    return ast.Attribute(value=ast.Name(id="self"), attr="a")
+
+def bench_expr(depth):
+    e = _ref()
+    for _ in range(depth):
+        e = ast.BinOp(left=e, op=ast.Add(), right=_ref())
+    f = ExprFactory(_mkCtxt())
+    start = time.perf_counter()
+    f.build(e)
+    return time.perf_counter() - start
+
+def bench_elif(depth):
+    s = ast.If(test=_ref(), body=[ast.Pass()], orelse=[])
+    for _ in range(depth):
+        s = ast.If(test=_ref(), body=[ast.Pass()], orelse=[s])
+    f = StmtFactory(_mkCtxt())
+    start = time.perf_counter()
+    f.build(s)
+    return time.perf_counter() - start
+
+def main():
+    print("%10s %12s %12s %12s" % ("depth", "expr (s)", "elif (s)", "us/node"))
+    for d in DEPTHS:
+        te = bench_expr(d)
+        ts = bench_elif(d)
+        print("%10d %12.4f %12.4f %12.3f" % (d, te, ts, 1e6*te/d))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import gc
+import zuspec.dataclasses as zdc
+from zuspec.fe.py.analysis import Analyzer
+from zuspec.fe.py.cache import WeakLruCache
+
+def test_lru_eviction():
+    class K(object):
+        pass
+
+    c = WeakLruCache("test.lru", maxsize=2)
+    k1, k2, k3 = K(), K(), K()
+    c[k1] = 1
+    c[k2] = 2
+    assert c.get(k1) == 1
+    c[k3] = 3
+
+    # k2 was least-recently used
+    assert k2 not in c
+    assert k1 in c and k3 in c
+    st = c.stats
+    assert st.size == 2
+    assert st.evictions == 1
+    assert st.hits == 1
+
+    c.clear()
+    assert len(c) == 0
+
+def test_classes_not_pinned():
+    analyzer = Analyzer()
+
+    def mk():
+        @zdc.dataclass
+        class MyC(zdc.Component):
+            clock : zdc.Bit = zdc.input()
+            reset : zdc.Bit = zdc.input()
+
+            @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+            def abc(self):
+                pass
+        return MyC
+
+    for _ in range(100):
+        analyzer.analyze(mk())
+    gc.collect()
+
+    assert analyzer._info_m.stats.size == 0
+    assert analyzer._source_m.stats.size == 0
+
+def test_create_outside_lock():
+    import threading
+
+    class K(object):
+        pass
+
+    c = WeakLruCache("test.create")
+    k1, k2 = K(), K()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def mk1():
+        calls.append(k1)
+        started.set()
+        release.wait(10)
+        return 1
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(c.getOrCreate(k1, mk1)))
+               for _ in range(2)]
+    threads[0].start()
+    assert started.wait(10)
+    threads[1].start()
+
+    # Another key isn't blocked by the creation in progress
+    assert c.getOrCreate(k2, lambda: 2) == 2
+
+    release.set()
+    for t in threads:
+        t.join(10)
+    # Concurrent callers for one key share a single creation
+    assert results == [1, 1]
+    assert len(calls) == 1
+
+def test_create_error():
+    import pytest
+
+    class K(object):
+        pass
+
+    c = WeakLruCache("test.create_error")
+    k = K()
+    def mk():
+        raise ValueError()
+    with pytest.raises(ValueError):
+        c.getOrCreate(k, mk)
+    # Nothing is left pending
+    assert c.getOrCreate(k, lambda: 1) == 1
+
+def test_value_lru():
+    from zuspec.fe.py.cache import LruCache
+
+    c = LruCache("test.value_lru", maxsize=2)
+    c[b"a"] = 1
+    c[b"b"] = 2
+    assert c.get(b"a") == 1
+    c[b"c"] = 3
+    assert b"b" not in c
+    assert b"a" in c and b"c" in c
+    assert c.stats.evictions == 1
+    assert c.name in WeakLruCache.statsAll()
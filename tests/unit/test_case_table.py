@@ -0,0 +1,171 @@
+import ast
+import textwrap
+from zuspec.fe.py.case_table import CaseRecognizer
+
+def _stmt(src):
+    return ast.parse(textwrap.dedent(src)).body[0]
+
+def test_elif_ladder():
+    t = CaseRecognizer.recognize(_stmt("""
+        if self.op == 0:
+            self.a = 1
+        elif self.op in (1, 2):
+            self.a = 2
+        elif 3 == self.op or self.op == 1:
+            self.a = 3
+        else:
+            self.a = 4
+        """))
+    assert t is not None
+    assert ast.unparse(t.subject) == "self.op"
+    # Key 1 is unreachable in the third clause
+    assert [keys for keys, _ in t.cases] == [(0,), (1, 2), (3,)]
+    assert ast.unparse(t.default[0]) == "self.a = 4"
+
+def test_elif_ladder_remainder():
+    t = CaseRecognizer.recognize(_stmt("""
+        if self.op == 0:
+            pass
+        elif self.op == 1:
+            pass
+        elif self.op == 2:
+            pass
+        elif self.en:
+            self.a = 1
+        """))
+    assert [keys for keys, _ in t.cases] == [(0,), (1,), (2,)]
+    # The rest of the ladder is kept as an if
+    assert isinstance(t.default[0], ast.If)
+    assert ast.unparse(t.default[0].test) == "self.en"
+
+def test_not_a_case():
+    # Too short
+    assert CaseRecognizer.recognize(_stmt("""
+        if self.op == 0:
+            pass
+        elif self.op == 1:
+            pass
+        """)) is None
+    # Different subjects
+    assert CaseRecognizer.recognize(_stmt("""
+        if self.op == 0:
+            pass
+        elif self.b == 1:
+            pass
+        elif self.op == 2:
+            pass
+        """)) is None
+
+def test_match():
+    s = _stmt("""
+        match self.op:
+            case 0:
+                self.a = 1
+            case 1 | 2 | -1:
+                self.a = 2
+            case _:
+                self.a = 3
+        """)
+    t = CaseRecognizer.recognizeMatch(s)
+    assert [keys for keys, _ in t.cases] == [(0,), (1, 2, -1)]
+    assert t.default is not None
+    # Too short for a switch, as for if/elif ladders
+    assert CaseRecognizer.recognize(s) is None
+
+    assert CaseRecognizer.recognizeMatch(_stmt("""
+        match self.op:
+            case 0 if self.en:
+                pass
+        """)) is None
+
+def test_lower_match():
+    import pytest
+    import zuspec.dm as dm
+    from zuspec.fe.py import Context
+    from zuspec.fe.py.analysis import ComponentInfo, FieldInfo, FieldKind
+    from zuspec.fe.py.context import StructScope
+    from zuspec.fe.py.stmt_factory import StmtFactory
+
+    info = ComponentInfo(
+        name="MyC",
+        fields=(FieldInfo(name="op", index=0, kind=FieldKind.Data, type=int),
+                FieldInfo(name="a", index=1, kind=FieldKind.Data, type=int),
+                FieldInfo(name="en", index=2, kind=FieldKind.Data, type=int)))
+    ctxt = Context(ctxt=dm.impl.Context())
+    ctxt.push_scope(StructScope(scope=info, type=None))
+    f = StmtFactory(ctxt)
+
+    stmt = f.build(_stmt("""
+        match self.op:
+            case 0:
+                self.a = 1
+            case 1:
+                self.a = 2
+            case 2 | 3:
+                self.a = 3
+        """))
+    assert type(stmt).__name__ == "ExecStmtSwitch"
+
+    # Short matches are lowered as if/else, like short ladders
+    stmt = f.build(_stmt("""
+        match self.op:
+            case 0:
+                self.a = 1
+            case _:
+                self.a = 2
+        """))
+    assert type(stmt).__name__ == "ExecStmtIfElse"
+
+    with pytest.raises(NotImplementedError):
+        f.build(_stmt("""
+            match self.op:
+                case 0 if self.en:
+                    pass
+            """))
+
+def test_lower_without_switch():
+    import zuspec.dm as dm
+    from zuspec.fe.py import Context
+    from zuspec.fe.py.analysis import ComponentInfo, FieldInfo, FieldKind
+    from zuspec.fe.py.context import StructScope
+    from zuspec.fe.py.stmt_factory import StmtFactory
+
+    def _missing(self):
+        raise AttributeError("mkExecStmtSwitch")
+
+    class NoSwitchContext(dm.impl.Context):
+        mkExecStmtSwitch = property(_missing)
+        def __getattr__(self, name):
+            if name == "mkExecStmtSwitch":
+                raise AttributeError(name)
+            return super().__getattr__(name)
+
+    info = ComponentInfo(
+        name="MyC",
+        fields=(FieldInfo(name="op", index=0, kind=FieldKind.Data, type=int),
+                FieldInfo(name="a", index=1, kind=FieldKind.Data, type=int)))
+    ctxt = Context(ctxt=NoSwitchContext())
+    ctxt.push_scope(StructScope(scope=info, type=None))
+    f = StmtFactory(ctxt)
+
+    # Without a switch statement, ladders and matches stay if/else
+    stmt = f.build(_stmt("""
+        if self.op == 0:
+            self.a = 1
+        elif self.op == 1:
+            self.a = 2
+        elif self.op == 2:
+            self.a = 3
+        """))
+    assert type(stmt).__name__ == "ExecStmtIfElse"
+
+    stmt = f.build(_stmt("""
+        match self.op:
+            case 0:
+                self.a = 1
+            case 1:
+                self.a = 2
+            case 2 | 3:
+                self.a = 3
+        """))
+    assert type(stmt).__name__ == "ExecStmtIfElse"
@@ -0,0 +1,99 @@
+import zuspec.dataclasses as zdc
+from zuspec.fe.py.connectivity import ConnectivityGraph
+
+def test_graph():
+
+    @zdc.dataclass
+    class Sub(zdc.Component):
+        i : zdc.Bit = zdc.input()
+        o : zdc.Bit = zdc.output()
+
+    @zdc.dataclass
+    class Top(zdc.Component):
+        a : Sub = zdc.field()
+        b : Sub = zdc.field()
+        c : Sub = zdc.field()
+        d : Sub = zdc.field()
+        i : zdc.Bit = zdc.input()
+        o : zdc.Bit = zdc.output()
+
+        def __bind__(self):
+            return {
+                self.a.i: self.i,
+                # Value side is the sink here. Direction comes from the ports
+                self.a.o: self.b.i,
+                self.o: self.b.o,
+                self.c.i: self.a.o,
+                self.b.o: self.c.i,
+            }
+
+    g = ConnectivityGraph.build(Top)
+    p = g.indexPath
+    assert g.errors == []
+    assert g.inst_paths[0] == ()
+    assert len(g.inst_paths) == 5
+
+    assert g.driversOf(p(("a", "i"))) == [p(("i",))]
+    assert g.driversOf(p(("b", "i"))) == [p(("a", "o"))]
+    assert sorted(g.sinksOf(p(("a", "o")))) == sorted([p(("b", "i")), p(("c", "i"))])
+    assert g.driversOf(p(("o",))) == [p(("b", "o"))]
+
+    # c.i is bound as a key and as a value
+    assert g.multipleDrivers() == {p(("c", "i")): [p(("a", "o")), p(("b", "o"))]}
+    assert len(g.connectionsOf(())) == 5
+    assert g.connection(0).inst == ()
+
+    assert sorted(g.unconnectedPorts()) == sorted([p(("c", "o")), p(("d", "i")), p(("d", "o"))])
+    assert sorted(g.undrivenInputs()) == [p(("d", "i"))]
+    assert g.pathName(p(("a", "i"))) == "s.a.i"
+
+def test_multiple_drivers():
+
+    @zdc.dataclass
+    class Sub(zdc.Component):
+        i : zdc.Bit = zdc.input()
+        o : zdc.Bit = zdc.output()
+
+    @zdc.dataclass
+    class Mid(zdc.Component):
+        s : Sub = zdc.field()
+        o : zdc.Bit = zdc.output()
+
+        def __bind__(self):
+            return {self.o: self.s.o}
+
+    @zdc.dataclass
+    class Top(zdc.Component):
+        m1 : Mid = zdc.field()
+        m2 : Mid = zdc.field()
+        x : Sub = zdc.field()
+
+        def __bind__(self):
+            return {self.x.i: self.m1.o, self.m2.o: self.x.i}
+
+    g = ConnectivityGraph.build(Top)
+    p = g.indexPath
+    # Mid's binds are applied for each instance
+    assert g.driversOf(p(("m1", "o"))) == [p(("m1", "s", "o"))]
+    assert g.driversOf(p(("m2", "o"))) == [p(("m2", "s", "o"))]
+
+    multi = g.multipleDrivers()
+    assert list(multi.keys()) == [p(("x", "i"))]
+    assert sorted(multi[p(("x", "i"))]) == sorted([p(("m1", "o")), p(("m2", "o"))])
+
+def test_direction_conflict():
+
+    @zdc.dataclass
+    class Sub(zdc.Component):
+        i : zdc.Bit = zdc.input()
+        o : zdc.Bit = zdc.output()
+
+    @zdc.dataclass
+    class Top(zdc.Component):
+        a : Sub = zdc.field()
+        b : Sub = zdc.field()
+
+    g = ConnectivityGraph.build(Top, binds=lambda t: (
+        (lambda s: {s.a.o: s.b.o}) if t is Top else None))
+    assert len(g.errors) == 1
+    assert "two drivers" in g.errors[0]
@@ -0,0 +1,50 @@
+import pytest
+import zuspec.dataclasses as zdc
+import zuspec.dm as dm
+from zuspec.fe.py import Context, TransformToDm
+
+def _mkC(width):
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        a : zdc.Bit[width] = zdc.input()
+
+    return MyC
+
+def test_fork():
+    Lib, T1, T2 = _mkC(8), _mkC(16), _mkC(32)
+
+    base = Context(ctxt=dm.impl.Context())
+    lib_dm = TransformToDm(ctxt=base).transform(Lib)
+    base.snapshot()
+
+    with pytest.raises(RuntimeError):
+        TransformToDm(ctxt=base).transform(T1)
+    # Lookups of already-lowered types are still fine
+    assert TransformToDm(ctxt=base).transform(Lib) is lib_dm
+
+    f1 = base.fork()
+    f2 = base.fork()
+
+    # Base types are shared, not re-lowered
+    assert TransformToDm(ctxt=f1).transform(Lib) is lib_dm
+    assert f1().findDataTypeStruct(Lib.__qualname__) is lib_dm
+
+    t1_dm = TransformToDm(ctxt=f1).transform(T1)
+    t2_dm = TransformToDm(ctxt=f2).transform(T2)
+
+    # Naming accounts for the base
+    assert t1_dm.name == T1.__qualname__ + "#2"
+    assert t2_dm.name == T2.__qualname__ + "#2"
+
+    # Forks don't see each other's types, and the base is unchanged
+    assert f1.findComponentType(T1) is t1_dm
+    assert f2.findComponentType(T1) is None
+    assert base.findComponentType(T1) is None
+    assert base().findDataTypeStruct(t1_dm.name) is None
+    assert f1().local.findDataTypeStruct(t1_dm.name) is t1_dm
+
+    # Forks of forks see both levels
+    f3 = f1.fork()
+    assert f3.findComponentType(Lib) is lib_dm
+    assert f3.findComponentType(T1) is t1_dm
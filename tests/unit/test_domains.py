@@ -0,0 +1,79 @@
+import zuspec.dataclasses as zdc
+from zuspec.fe.py.analysis import Analyzer
+from zuspec.fe.py.domains import DomainMap
+
+def _mkSub():
+
+    @zdc.dataclass
+    class Sub(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        clock2 : zdc.Bit = zdc.input()
+        a : zdc.Bit[8] = zdc.output()
+        b : zdc.Bit[8] = zdc.output()
+        c : zdc.Bit[8] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def _a(self):
+            self.a += 1
+
+        @zdc.sync(clock=lambda s:s.clock2, reset=lambda s:s.reset)
+        def _c(self):
+            self.c += 1
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def _b(self):
+            self.b += 1
+
+    return Sub
+
+def test_component_domains():
+    Sub = _mkSub()
+    info = Analyzer().analyze(Sub)
+    assert len(info.domains) == 2
+    assert info.domains[0].clock.names == ("clock",)
+    assert [s.name for s in info.domains[0].syncs] == ["_a", "_b"]
+    assert [s.name for s in info.domains[1].syncs] == ["_c"]
+
+def test_hierarchy_domains():
+    Sub = _mkSub()
+
+    @zdc.dataclass
+    class Top(zdc.Component):
+        s1 : Sub = zdc.field()
+        s2 : Sub = zdc.field()
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        x : zdc.Bit[8] = zdc.output()
+
+        def __bind__(self):
+            return {
+                self.s1.clock: self.clock,
+                self.s1.reset: self.reset,
+                self.s2.clock: self.clock,
+                self.s2.reset: self.reset,
+                # Second clock of s2 is the shared one too
+                self.s2.clock2: self.clock,
+            }
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def _x(self):
+            self.x += 1
+
+    dm = DomainMap.build(Top)
+    p = dm.graph.indexPath
+    assert len(dm.domains) == 2
+
+    main = dm.domainOf((), "_x")
+    assert main.clock == p(("clock",))
+    assert main.reset == p(("reset",))
+    assert sorted((path, s.name) for path, s in main.syncs) == sorted([
+        ((), "_x"),
+        (p(("s1",)), "_a"), (p(("s1",)), "_b"),
+        (p(("s2",)), "_a"), (p(("s2",)), "_b"), (p(("s2",)), "_c")])
+
+    # s1.clock2 is unbound, so is its own source
+    other = dm.domainOf(p(("s1",)), "_c")
+    assert other is not main
+    assert other.clock == p(("s1", "clock2"))
+    assert dm.domainsOf(p(("s2", "clock"))) == [main]
@@ -0,0 +1,39 @@
+import zuspec.dataclasses as zdc
+import zuspec.dm as dm
+from zuspec.fe.py import Context, TransformToDm
+from zuspec.fe.py.analysis import Analyzer, FieldKind
+from zuspec.fe.py.emitter import CountingEmitter
+
+def test_shared_analysis():
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        count : zdc.Bit[32] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            if self.reset:
+                self.count = 0
+            else:
+                self.count += 1
+
+    analyzer = Analyzer()
+    info = analyzer.analyze(MyC)
+    assert analyzer.analyze(MyC) is info
+    assert [f.kind for f in info.fields] == [
+        FieldKind.Input, FieldKind.Input, FieldKind.Output]
+    assert info.field("count").width == 32
+    assert len(info.syncs) == 1
+    assert info.syncs[0].clock.names == ("clock",)
+    assert info.syncs[0].reset.indices == (1,)
+
+    counts = CountingEmitter().emit(info)
+    assert counts["fields"] == 3
+    assert counts["syncs"] == 1
+    assert counts["statements"] == 3
+
+    ctxt = Context(ctxt=dm.impl.Context())
+    comp_dm = TransformToDm(ctxt=ctxt, analyzer=analyzer).transform(MyC)
+    assert comp_dm.numExecs == 1
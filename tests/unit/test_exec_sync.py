@@ -37,6 +37,56 @@ def test_smoke():
 #    body = exec.getBody()
 #    assert len(body.getStatements()) == 1
 
+def test_reset_split_fallback():
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        count : zdc.Bit[32] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            if self.reset:
+                self.count = 0
+            else:
+                self.count += 1
+
+    class SingleBodyExec(object):
+        def __init__(self, *args, **kwargs):
+            self.body = None
+        def setBody(self, body):
+            self.body = body
+
+    class SingleBodyContext(dm.impl.Context):
+        def mkExecSync(self, *args, **kwargs):
+            return SingleBodyExec(*args, **kwargs)
+
+    ctxt = Context(ctxt=SingleBodyContext())
+    comp_dm = TransformToDm(ctxt=ctxt).transform(MyC)
+
+    # Without reset-body setters, the whole body is lowered as one block
+    exec = comp_dm.getExec(0)
+    assert isinstance(exec, SingleBodyExec)
+    assert exec.body is not None
+
+    @zdc.dataclass
+    class MyC2(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        rst_n : zdc.Bit = zdc.input()
+        count : zdc.Bit[32] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.rst_n)
+        def abc(self):
+            if not self.rst_n:
+                self.count = 0
+            else:
+                self.count += 1
+
+    # The active-low test is rebuilt without 'not', so it still lowers
+    comp_dm = TransformToDm(ctxt=ctxt).transform(MyC2)
+    assert comp_dm.getExec(0).body is not None
+
 def test_visit_type_exec_proc():
     from zsp_arl_dm.core import VisitorBase, Factory, ExecKindT
     from zuspec.fe.py.transform_to_arl_dm import TransformToArlDm
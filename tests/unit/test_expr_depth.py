@@ -0,0 +1,67 @@
+import ast
+import sys
+import zuspec.dm as dm
+from zuspec.fe.py import Context
+from zuspec.fe.py.analysis import ComponentInfo, FieldInfo, FieldKind
+from zuspec.fe.py.context import StructScope
+from zuspec.fe.py.expr_factory import ExprFactory
+from zuspec.fe.py.stmt_factory import StmtFactory
+
+def _mkCtxt():
+    info = ComponentInfo(
+        name="MyC",
+        fields=(FieldInfo(name="a", index=0, kind=FieldKind.Data, type=int),))
+    ctxt = Context(ctxt=dm.impl.Context())
+    ctxt.push_scope(StructScope(scope=info, type=None))
+    return ctxt
+
+def _ref():
+    return ast.Attribute(value=ast.Name(id="self"), attr="a")
+
+def test_deep_binop():
+    depth = 4*sys.getrecursionlimit()
+    e = _ref()
+    for _ in range(depth):
+        e = ast.BinOp(left=e, op=ast.Add(), right=_ref())
+
+    expr = ExprFactory(_mkCtxt()).build(e)
+    assert expr is not None
+
+def test_long_elif():
+    depth = 4*sys.getrecursionlimit()
+    s = ast.If(test=_ref(), body=[ast.Pass()], orelse=[])
+    for _ in range(depth):
+        s = ast.If(test=_ref(), body=[ast.Pass()], orelse=[s])
+
+    stmt = StmtFactory(_mkCtxt()).build(s)
+    assert stmt is not None
+
+def test_unary():
+    import pytest
+    ctxt = _mkCtxt()
+    expr = ExprFactory(ctxt).build(ast.UnaryOp(op=ast.UAdd(), operand=_ref()))
+    assert expr is not None
+
+    # Other unary operators have no dm lowering, and are reported as
+    # the scanner reports them
+    for op in (ast.Not(), ast.Invert(), ast.USub()):
+        e = ast.UnaryOp(op=op, operand=_ref())
+        assert ExprFactory.unsupported(e)[0] == "operator"
+        with pytest.raises(NotImplementedError):
+            ExprFactory(ctxt).build(e)
+
+    with pytest.raises(NotImplementedError):
+        ExprFactory(ctxt).build(ast.Name(id="t"))
+
+def test_assign():
+    import pytest
+    ctxt = _mkCtxt()
+    f = StmtFactory(ctxt)
+    assert f.build(ast.Assign(targets=[_ref()], value=ast.Constant(value=0))) is not None
+    assert f.build(ast.AugAssign(target=_ref(), op=ast.Add(), value=ast.Constant(value=1))) is not None
+    assert f.build(ast.Pass()) is None
+
+    with pytest.raises(NotImplementedError):
+        f.build(ast.Assign(targets=[ast.Name(id="t", lineno=1)], value=_ref(), lineno=1))
+    with pytest.raises(NotImplementedError):
+        f.build(ast.While(test=_ref(), body=[ast.Pass()], orelse=[], lineno=1))
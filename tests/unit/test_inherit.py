@@ -0,0 +1,69 @@
+import zuspec.dataclasses as zdc
+import zuspec.dm as dm
+from zuspec.fe.py import Context, TransformToDm
+from zuspec.fe.py.analysis import Analyzer
+
+def test_inherited_sync_shared():
+
+    @zdc.dataclass
+    class Base(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        count : zdc.Bit[32] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            if self.reset:
+                self.count = 0
+            else:
+                self.count += 1
+
+    @zdc.dataclass
+    class Sub1(Base):
+        pass
+
+    @zdc.dataclass
+    class Sub2(Base):
+        extra : zdc.Bit[8] = zdc.output()
+
+    analyzer = Analyzer()
+    b_info = analyzer.analyze(Base)
+    s1_info = analyzer.analyze(Sub1)
+    s2_info = analyzer.analyze(Sub2)
+
+    # Method is lowered once, at the defining class
+    assert s1_info.syncs[0] is b_info.syncs[0]
+    assert s2_info.syncs[0] is b_info.syncs[0]
+
+    # Inherited fields are shared
+    assert s1_info.fields is b_info.fields
+    assert len(s2_info.fields) == 4
+    assert all(a is b for a,b in zip(s2_info.fields, b_info.fields))
+
+    ctxt = Context(ctxt=dm.impl.Context())
+    xf = TransformToDm(ctxt=ctxt, analyzer=analyzer)
+    assert xf.transform(Sub2).numExecs == 1
+
+def test_overridden_sync():
+
+    @zdc.dataclass
+    class Base(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            pass
+
+    @zdc.dataclass
+    class Sub(Base):
+        @zdc.sync(clock=lambda s:s.reset, reset=lambda s:s.clock)
+        def abc(self):
+            pass
+
+    analyzer = Analyzer()
+    b_info = analyzer.analyze(Base)
+    s_info = analyzer.analyze(Sub)
+    assert len(s_info.syncs) == 1
+    assert s_info.syncs[0] is not b_info.syncs[0]
+    assert s_info.syncs[0].clock.names == ("reset",)
@@ -0,0 +1,149 @@
+import os
+import zuspec.dataclasses as zdc
+from zuspec.fe.py.analysis import Analyzer, FieldKind
+from zuspec.fe.py.ir_export import IrExporter, IrKind, IrReader, IrSyncFlags
+
+def test_export_roundtrip(tmp_path):
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        count : zdc.Bit[32] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            if self.reset:
+                self.count = 0
+            else:
+                self.count += 1
+
+    path = os.path.join(str(tmp_path), "myc.zsir")
+    IrExporter(analyzer=Analyzer()).export([MyC], path)
+
+    with IrReader(path) as r:
+        comps = r.components
+        assert len(comps) == 1
+        comp = comps[0]
+        assert comp.kind == IrKind.Component
+        assert comp.name == MyC.__qualname__
+
+        fields = [c for c in comp.children if c.kind == IrKind.Field]
+        assert [f.name for f in fields] == ["clock", "reset", "count"]
+        assert fields[2].tag == FieldKind.Output.value
+        assert fields[2].aux == 32
+
+        sync = next(c for c in comp.children if c.kind == IrKind.Sync)
+        assert sync.name == "abc"
+        assert sync.tag & IrSyncFlags.ResetSplit
+        assert sync.file == MyC.abc.method.__code__.co_filename
+        clock, reset, body, reset_body, update_body = sync.children
+        assert clock.kind == IrKind.Path and clock.indices == (0,)
+        assert reset.name == "reset" and reset.indices == (1,)
+
+        if_s = body.child(0)
+        assert if_s.kind == IrKind.If
+        assert if_s.child(0).kind == IrKind.Attribute
+        assert if_s.child(0).name == "reset"
+        assert if_s.line == MyC.abc.method.__code__.co_firstlineno + 2
+
+        inc = update_body.child(0)
+        assert inc.kind == IrKind.AugAssign and inc.op == "Add"
+        target, value = inc.children
+        assert target.name == "count"
+        assert value.kind == IrKind.Constant and value.value == 1
+        assert reset_body.child(0).child(1).value == 0
+        assert target.width == 32 and not target.signed
+        assert value.width == 32
+
+def test_export_hierarchy(tmp_path):
+
+    @zdc.dataclass
+    class Leaf(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        count : zdc.Bit[8] = zdc.output()
+
+    @zdc.dataclass
+    class Top(zdc.Component):
+        l1 : Leaf = zdc.field()
+        l2 : Leaf = zdc.field()
+        n : int = zdc.field()
+        clock : zdc.Bit = zdc.input()
+        count : zdc.Bit[16] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.clock)
+        def abc(self):
+            self.count += 1
+
+    exporter = IrExporter(analyzer=Analyzer())
+    data = exporter.toBytes([Top])
+    # Each call produces the same, self-contained image
+    assert exporter.toBytes([Top]) == data
+
+    path = os.path.join(str(tmp_path), "top.zsir")
+    with open(path, "wb") as fp:
+        fp.write(data)
+
+    with IrReader(path) as r:
+        comps = r.components
+        assert len(comps) == 1
+        top = comps[0]
+        fields = [c for c in top.children if c.kind == IrKind.Field]
+        assert [f.name for f in fields] == ["l1", "l2", "n", "clock", "count"]
+        l1, l2, n = fields[0].type, fields[1].type, fields[2].type
+        assert l1.kind == IrKind.Component and l1.name == Leaf.__qualname__
+        assert l1.index == l2.index
+        assert [c.name for c in l1.children] == ["clock", "count"]
+        assert l1.children[1].aux == 8
+        assert n.kind == IrKind.Type and n.name == "int"
+
+        # Columns are source columns, not those of the dedented body
+        sync = next(c for c in top.children if c.kind == IrKind.Sync)
+        inc = sync.children[2].child(0)
+        assert inc.col == 12
+
+def test_export_match(tmp_path):
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        op : zdc.Bit[2] = zdc.input()
+        out : zdc.Bit[8] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            match self.op:
+                case 0:
+                    self.out = 1
+                case 1 | 2:
+                    self.out = 2
+                case _:
+                    self.out = 3
+            match self.op:
+                case 0 if self.reset:
+                    pass
+
+    path = os.path.join(str(tmp_path), "myc.zsir")
+    IrExporter(analyzer=Analyzer()).export([MyC], path)
+
+    with IrReader(path) as r:
+        sync = next(c for c in r.components[0].children if c.kind == IrKind.Sync)
+        body = sync.children[2]
+
+        switch = body.child(0)
+        assert switch.kind == IrKind.Switch
+        assert switch.tag == 1 and switch.aux == 2
+        subject, c0, c1, default = switch.children
+        assert subject.kind == IrKind.Attribute and subject.name == "op"
+        assert c0.kind == IrKind.Case and c0.aux == 1
+        assert c0.child(0).value == 0
+        assert c1.aux == 2 and [k.value for k in c1.children[:2]] == [1, 2]
+        assert c1.line == MyC.abc.method.__code__.co_firstlineno + 5
+        assert c1.child(2).kind == IrKind.Block
+        assert c1.child(2).child(0).kind == IrKind.Assign
+        assert default.kind == IrKind.Block
+
+        # Guarded cases aren't a switch
+        unsupported = body.child(1)
+        assert unsupported.kind == IrKind.Unsupported and unsupported.name == "Match"
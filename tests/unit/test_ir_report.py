@@ -0,0 +1,98 @@
+import zuspec.dataclasses as zdc
+import zuspec.dm as dm
+from zuspec.fe.py import Context
+from zuspec.fe.py.ir_report import IrReporter
+
+def test_report_counts():
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        count : zdc.Bit[32] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            if self.reset:
+                self.count = 0
+            else:
+                self.count += 1
+
+    ctxt = Context(ctxt=dm.impl.Context())
+    comp_dm, report = IrReporter(ctxt).transform(MyC)
+
+    assert comp_dm is not None
+    assert report.name == MyC.__qualname__
+    assert report.counts["fields"] == 3
+    assert report.counts["execs"] == 1
+    assert report.total_size > 0
+    assert report.peak_alloc > 0
+
+    assert len(report.methods) == 1
+    m = report.methods[0]
+    assert m.name.endswith("abc")
+    assert m.counts["execs"] == 1
+    assert m.counts["fields"] == 0
+
+def test_report_repeat():
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        count : zdc.Bit[32] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            self.count += 1
+
+    ctxt = Context(ctxt=dm.impl.Context())
+    comp1, report1 = IrReporter(ctxt).transform(MyC)
+    # Reused from the context's type registry, but measured the same
+    comp2, report2 = IrReporter(ctxt).transform(MyC)
+    assert comp1 is comp2
+    assert report2.counts == report1.counts
+    assert report2.methods[0].counts == report1.methods[0].counts
+
+def test_report_keeps_caller_peak():
+    import tracemalloc
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+
+    tracemalloc.start()
+    try:
+        big = bytearray(1 << 20)
+        del big
+        IrReporter(Context(ctxt=dm.impl.Context())).transform(MyC)
+        assert tracemalloc.get_traced_memory()[1] >= (1 << 20)
+    finally:
+        tracemalloc.stop()
+
+def test_report_opaque():
+    from zuspec.fe.py.ir_report import FootprintStats, _measure
+
+    class ExecStmtScope(object):
+        def __init__(self, stmts):
+            self.stmts = stmts
+        def numStmts(self):
+            return len(self.stmts)
+        def getStmt(self, i):
+            return self.stmts[i]
+
+    class ExecStmtOther(object):
+        # Children held in an accessor the walker doesn't know
+        def __init__(self, stmt):
+            self.stmt = stmt
+        def inner(self):
+            return self.stmt
+
+    class ExecStmtAssign(object):
+        pass
+
+    stats = FootprintStats()
+    _measure(ExecStmtScope([ExecStmtAssign(), ExecStmtOther(ExecStmtAssign())]), stats)
+    assert stats.counts["statements"] == 3
+    assert stats.opaque == {"ExecStmtAssign", "ExecStmtOther"}
@@ -0,0 +1,71 @@
+import zuspec.dataclasses as zdc
+import zuspec.dm as dm
+from zuspec.fe.py import Context, TransformToDm
+from zuspec.fe.py.member_catalog import MemberCatalog
+
+def test_catalog_cached():
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            pass
+
+    c1 = MemberCatalog.get(MyC)
+    c2 = MemberCatalog.get(MyC)
+    assert c1 is c2
+    assert [f.name for f in c1.fields] == ["clock", "reset"]
+    assert c1.field_index["reset"] == 1
+
+def test_catalog_inherited_sync_once():
+
+    @zdc.dataclass
+    class Base(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            pass
+
+    @zdc.dataclass
+    class Sub(Base):
+        pass
+
+    catalog = MemberCatalog.get(Sub)
+    assert len(catalog.execs) + len(catalog.sync_methods) == 1
+
+    ctxt = Context(ctxt=dm.impl.Context())
+    comp_dm = TransformToDm(ctxt=ctxt).transform(Sub)
+    assert comp_dm.numExecs == 1
+
+def test_annotated_sync_method():
+    from zuspec.dataclasses.annotation import AnnotationSync
+    from zuspec.fe.py.analysis import Analyzer
+
+    class _Sync(AnnotationSync):
+        def __init__(self, clock, reset):
+            self.clock = clock
+            self.reset = reset
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+
+        def abc(self):
+            pass
+        abc.__zsp_annotation__ = _Sync(lambda s:s.clock, lambda s:s.reset)
+
+    assert [n for n, _ in MemberCatalog.get(MyC).sync_methods] == ["abc"]
+    info = Analyzer().analyze(MyC)
+    assert [s.name for s in info.syncs] == ["abc"]
+    assert info.execs == []
+    assert info.syncs[0].clock.names == ("clock",)
+
+    ctxt = Context(ctxt=dm.impl.Context())
+    comp_dm = TransformToDm(ctxt=ctxt).transform(MyC)
+    assert comp_dm.numExecs == 1
@@ -0,0 +1,67 @@
+import zuspec.dataclasses as zdc
+from zuspec.fe.py.analysis import Analyzer
+from zuspec.fe.py.next_state import NextState, NsKind
+
+def test_counter():
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        count : zdc.Bit[32] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            if self.reset:
+                self.count = 0
+            else:
+                self.count += 1
+
+    info = Analyzer().analyze(MyC)
+    ns = NextState.get(info)
+    assert NextState.get(info) is ns
+
+    b = ns.block("abc")
+    assert list(b.next_m.keys()) == ["count"]
+    assert ns.format(b.next_m["count"]) == "(reset ? 0 : Add(count, 1))"
+    n = ns.node(b.next_m["count"])
+    assert n.kind == NsKind.Mux and n.width == 32
+
+def test_merge_and_share():
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        a : zdc.Bit[8] = zdc.input()
+        b : zdc.Bit[8] = zdc.input()
+        sel : zdc.Bit[2] = zdc.input()
+        x : zdc.Bit[8] = zdc.output()
+        y : zdc.Bit[8] = zdc.output()
+        z : zdc.Bit[8] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            t = self.a + self.b
+            self.x = t
+            if self.sel == 1:
+                self.y = self.a + self.b
+                self.z = t
+            elif self.sel == 2:
+                self.y = 0
+                self.z = t
+            # Non-blocking: reads the pre-edge value
+            self.x = self.x + t
+
+    ns = NextState.get(Analyzer().analyze(MyC))
+    b = ns.block("abc")
+
+    # Last write wins
+    assert ns.format(b.next_m["x"]) == "Add(x, Add(a, b))"
+    # Unwritten paths hold the field's value
+    assert ns.format(b.next_m["y"]) == "(Eq(sel, 1) ? Add(a, b) : (Eq(sel, 2) ? 0 : y))"
+    # Common sub-expression 'a + b' is a single node
+    add = ns.node(b.next_m["x"]).args[1]
+    assert ns.node(b.next_m["y"]).args[1] == add
+    # Both taken branches write 't': only the fall-through path differs
+    assert ns.format(b.next_m["z"]) == "(Eq(sel, 1) ? Add(a, b) : (Eq(sel, 2) ? Add(a, b) : z))"
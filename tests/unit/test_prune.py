@@ -0,0 +1,95 @@
+import zuspec.dataclasses as zdc
+import zuspec.dm as dm
+from zuspec.fe.py import Context, TransformToDm
+from zuspec.fe.py.analysis import Analyzer
+from zuspec.fe.py.prune import Pruner
+
+def _mkC():
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        count : zdc.Bit[32] = zdc.output()
+        dbg : zdc.Bit[32] = zdc.field(default=0)
+        acc : zdc.Bit[32] = zdc.field(default=0)
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def a_count(self):
+            self.count = self.acc
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def b_acc(self):
+            self.acc += 1
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def c_dbg(self):
+            self.dbg = self.count
+
+    return MyC
+
+def test_prune():
+    analyzer = Analyzer()
+    info = analyzer.analyze(_mkC())
+    info.fingerprint
+    pruned, report = Pruner.prune(info)
+
+    assert report.removed_fields == ["dbg"]
+    assert report.removed_syncs == ["c_dbg"]
+    assert [f.name for f in pruned.fields] == ["clock", "reset", "count", "acc"]
+    assert pruned.fieldIndex("acc") == 3
+    assert report.index_m[4] == 3
+    assert [s.name for s in pruned.syncs] == ["a_count", "b_acc"]
+    # Produced by the same analyzer. Derived state is recomputed
+    assert pruned._analyzer is analyzer
+    assert pruned.fingerprint != info.fingerprint
+
+    # Fields named in 'keep' are observable
+    pruned, report = Pruner.prune(info, keep=("dbg",))
+    assert report.empty
+    assert pruned is info
+
+def test_transform_prune():
+    ctxt = Context(ctxt=dm.impl.Context())
+    t = TransformToDm(ctxt=ctxt, prune=True)
+    comp_dm = t.transform(_mkC())
+    assert comp_dm.numExecs == 2
+    assert t.prune_reports[0].removed_fields == ["dbg"]
+
+def test_prune_keeps_written():
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        count : zdc.Bit[32] = zdc.output()
+        dbg : zdc.Bit[32] = zdc.field(default=0)
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            self.dbg = self.count
+            self.count += 1
+
+    # 'dbg' isn't read, but the live block that writes it is kept
+    pruned, report = Pruner.prune(Analyzer().analyze(MyC))
+    assert report.empty
+    assert [f.name for f in pruned.fields] == ["clock", "reset", "count", "dbg"]
+
+def test_remap_path():
+    import pytest
+    MyC = _mkC()
+
+    @zdc.dataclass
+    class Top(zdc.Component):
+        c : MyC = zdc.field()
+
+    ctxt = Context(ctxt=dm.impl.Context())
+    t = TransformToDm(ctxt=ctxt, prune=True)
+    t.transform(MyC)
+    assert ctxt.fieldIndexMap(MyC) == t.prune_reports[0].index_m
+
+    # Paths computed on the unpruned classes (eg c.acc) map to the lowered indices
+    assert t.remapPath(Top, (0, 4)) == (0, 3)
+    assert t.remapPath(Top, (0, 2)) == (0, 2)
+    with pytest.raises(KeyError):
+        t.remapPath(Top, (0, 3))
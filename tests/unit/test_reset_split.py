@@ -0,0 +1,63 @@
+import ast
+import zuspec.dataclasses as zdc
+from zuspec.fe.py.analysis import Analyzer
+from zuspec.fe.py.reset_split import ResetSplitter
+
+def _split(src, reset=("reset",)):
+    return ResetSplitter.split(ast.parse(src).body, reset)
+
+def test_active_high():
+    sp = _split("if self.reset:\n    self.count = 0\nelse:\n    self.count += 1\n")
+    assert sp is not None
+    assert not sp.active_low
+    assert isinstance(sp.reset_body[0], ast.Assign)
+    assert isinstance(sp.update_body[0], ast.AugAssign)
+
+def test_active_low():
+    sp = _split("if not self.rst_n:\n    self.count = 0\nelse:\n    self.count += 1\n", ("rst_n",))
+    assert sp.active_low
+    assert isinstance(sp.reset_body[0], ast.Assign)
+
+    sp = _split("if self.rst_n == 0:\n    self.count = 0\nelse:\n    self.count += 1\n", ("rst_n",))
+    assert sp.active_low
+
+def test_join():
+    sp = _split("if not self.rst_n:\n    self.count = 0\nelse:\n    self.count += 1\n", ("rst_n",))
+    s = ResetSplitter.join(sp, ("rst_n",), ast.parse("pass").body[0])
+    assert ast.unparse(s) == "if self.rst_n == 0:\n    self.count = 0\nelse:\n    self.count += 1"
+    assert s.test.lineno == 1
+
+    sp = _split("if self.reset:\n    self.count = 0\nelse:\n    self.count += 1\n")
+    s = ResetSplitter.join(sp, ("reset",), ast.parse("pass").body[0])
+    assert ast.unparse(s.test) == "self.reset"
+
+def test_inverted_branches():
+    sp = _split("if not self.reset:\n    self.count += 1\nelse:\n    self.count = 0\n")
+    assert not sp.active_low
+    assert isinstance(sp.reset_body[0], ast.Assign)
+    assert isinstance(sp.update_body[0], ast.AugAssign)
+
+def test_no_match():
+    assert _split("if self.en:\n    self.count = 0\n") is None
+    assert _split("self.count += 1\n") is None
+    assert _split("if self.reset:\n    self.count = 0\nself.x = 1\n") is None
+
+def test_sync_info_split():
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        count : zdc.Bit[32] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            if self.reset:
+                self.count = 0
+            else:
+                self.count += 1
+
+    info = Analyzer().analyze(MyC)
+    sp = info.syncs[0].reset_split
+    assert sp is not None
+    assert len(sp.reset_body) == 1 and len(sp.update_body) == 1
@@ -0,0 +1,147 @@
+import zuspec.dataclasses as zdc
+from zuspec.fe.py.analysis import Analyzer
+from zuspec.fe.py.support_scan import SupportScanner
+
+def _mkC():
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        count : zdc.Bit[32] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            if self.reset:
+                self.count = 0
+            else:
+                for i in range(4):
+                    self.count += i
+                self.count = self.cnt ** 2
+                self.count = self.count.bit_length()
+
+    return MyC
+
+def test_scan():
+    MyC = _mkC()
+    analyzer = Analyzer()
+    findings = SupportScanner(analyzer=analyzer).scan(MyC)
+
+    # All problems are reported, not just the first
+    assert [f.construct for f in findings] == ["statement", "operator", "expression", "attribute"]
+    assert all(f.component == MyC.__qualname__ and f.member == "abc" for f in findings)
+    assert "For" in findings[0].message
+    assert "'cnt'" in findings[3].message
+
+    # Locations are in the original source
+    line = MyC.abc.method.__code__.co_firstlineno
+    assert findings[0].line == line + 5
+    assert findings[0].col == 16
+    assert findings[3].line == line + 7
+
+def test_scan_cached():
+    C1, C2 = _mkC(), _mkC()
+    analyzer = Analyzer()
+    n_cached = len(SupportScanner._scan_m)
+
+    f1 = SupportScanner(analyzer=analyzer).scan(C1)
+    # Same source, so the second class reuses the first's scan
+    f2 = SupportScanner(analyzer=analyzer).scan(C2)
+    assert len(SupportScanner._scan_m) <= n_cached + 1
+    assert [(f.line, f.message) for f in f1] == [(f.line, f.message) for f in f2]
+
+def test_scan_clean_lowers():
+    import zuspec.dm as dm
+    from zuspec.fe.py import Context, TransformToDm
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        en : zdc.Bit = zdc.input()
+        mode : zdc.Bit[2] = zdc.input()
+        count : zdc.Bit[32] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            """Counter"""
+            if self.reset:
+                self.count = 0
+            elif self.mode == 1 and self.en == 0:
+                self.count = self.count - 1
+            else:
+                match self.mode:
+                    case 0:
+                        self.count += 1
+                    case _:
+                        self.count = +self.count ^ 3
+
+    @zdc.dataclass
+    class MyC2(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        rst_n : zdc.Bit = zdc.input()
+        count : zdc.Bit[32] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.rst_n)
+        def abc(self):
+            # The reset test is not lowered as written
+            if not self.rst_n:
+                self.count = 0
+            else:
+                self.count += 1
+
+    analyzer = Analyzer()
+    for t in (MyC, MyC2):
+        assert SupportScanner(analyzer=analyzer).scan(t) == []
+        ctxt = Context(ctxt=dm.impl.Context())
+        assert TransformToDm(ctxt=ctxt, analyzer=analyzer).transform(t) is not None
+
+def test_scan_agrees_with_lowering():
+    import ast
+    import textwrap
+    import zuspec.dm as dm
+    from zuspec.fe.py import Context
+    from zuspec.fe.py.analysis import ComponentInfo, FieldInfo, FieldKind
+    from zuspec.fe.py.context import StructScope
+    from zuspec.fe.py.stmt_factory import StmtFactory
+    from zuspec.fe.py.support_scan import _BodyChecker, _BodyScan
+
+    info = ComponentInfo(
+        name="MyC",
+        fields=tuple(FieldInfo(name=n, index=i, kind=FieldKind.Data, type=int)
+                     for i, n in enumerate(("a", "b", "c"))))
+    ctxt = Context(ctxt=dm.impl.Context())
+    ctxt.push_scope(StructScope(scope=info, type=None))
+
+    snippets = (
+        # Supported
+        "self.a = 5",
+        "self.a += self.b",
+        "self.a = +self.b",
+        "if self.a == 5:\n    self.b = 1",
+        "match self.a:\n    case 1:\n        pass",
+        "pass",
+        # Not supported
+        "self.a = t",
+        "t = self.a",
+        "self.a = self.b = 1",
+        "self.a **= 2",
+        "self.a = self.b if self.c else 0",
+        "self.a = 1.5",
+        "self.a = not self.b",
+        "self.a = ~self.b",
+        "self.a = self.b < self.c < 1",
+        "self.a = self.b.c",
+        "for i in range(2):\n    pass",
+        "match self.a:\n    case 0 if self.b:\n        pass",
+    )
+    for src in snippets:
+        body = ast.parse(textwrap.dedent(src)).body
+        scan = _BodyScan()
+        _BodyChecker(scan).check(body)
+        try:
+            StmtFactory(ctxt).build(body[0])
+            lowered = True
+        except NotImplementedError:
+            lowered = False
+        assert lowered == (len(scan.findings) == 0), src
@@ -0,0 +1,115 @@
+import zuspec.dataclasses as zdc
+import zuspec.dm as dm
+from zuspec.fe.py import Context, TransformToDm
+from zuspec.fe.py.analysis import Analyzer
+
+def _mkC(width):
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        a : zdc.Bit[width] = zdc.input()
+
+    return MyC
+
+def test_repeat_transform():
+    MyC = _mkC(8)
+
+    ctxt = Context(ctxt=dm.impl.Context())
+    comp_dm = TransformToDm(ctxt=ctxt).transform(MyC)
+    assert ctxt.findComponentType(MyC) is comp_dm
+
+    # Same class, different transform instance: no re-lowering
+    assert TransformToDm(ctxt=ctxt).transform(MyC) is comp_dm
+    assert TransformToDm(ctxt=ctxt).transform(MyC()) is comp_dm
+
+def test_same_qualname():
+    C1 = _mkC(8)
+    C2 = _mkC(16)
+    assert C1.__qualname__ == C2.__qualname__
+
+    ctxt = Context(ctxt=dm.impl.Context())
+    c1_dm = TransformToDm(ctxt=ctxt).transform(C1)
+    c2_dm = TransformToDm(ctxt=ctxt).transform(C2)
+
+    assert c1_dm is not c2_dm
+    assert c1_dm.name == C1.__qualname__
+    assert c2_dm.name == C2.__qualname__ + "#2"
+    assert ctxt.findDataTypeStruct(C1.__qualname__) is c1_dm
+    assert ctxt.findDataTypeStruct(C2.__qualname__ + "#2") is c2_dm
+
+def test_fingerprint_dedupe():
+    C8a, C8b, C16 = _mkC(8), _mkC(8), _mkC(16)
+
+    analyzer = Analyzer()
+    fp = analyzer.analyze(C8a).fingerprint
+    assert analyzer.analyze(C8b).fingerprint == fp
+    assert analyzer.analyze(C16).fingerprint != fp
+
+    ctxt = Context(ctxt=dm.impl.Context())
+    c8a_dm = TransformToDm(ctxt=ctxt, dedupe=True).transform(C8a)
+    c8b_dm = TransformToDm(ctxt=ctxt, dedupe=True).transform(C8b)
+    c16_dm = TransformToDm(ctxt=ctxt, dedupe=True).transform(C16)
+
+    assert c8b_dm is c8a_dm
+    assert c16_dm is not c8a_dm
+    assert ctxt.fingerprint(c8a_dm) == fp
+    assert ctxt.aliases(c8a_dm) == [C8b.__qualname__ + "#2"]
+    assert ctxt.findDataTypeStruct(C8b.__qualname__ + "#2") is c8a_dm
+
+def _mkInc(step):
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        count : zdc.Bit[8] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.clock)
+        def abc(self):
+            self.count += step
+
+    return MyC
+
+def test_fingerprint_closure():
+    analyzer = Analyzer()
+    fp = analyzer.analyze(_mkInc(1)).fingerprint
+    assert fp is not None
+    assert analyzer.analyze(_mkInc(1)).fingerprint == fp
+    assert analyzer.analyze(_mkInc(2)).fingerprint != fp
+
+    # A closure value that can't be keyed by content has no fingerprint
+    assert analyzer.analyze(_mkInc(object())).fingerprint is None
+
+def _mkTop(width):
+    Leaf = _mkC(width)
+
+    @zdc.dataclass
+    class Top(zdc.Component):
+        leaf : Leaf = zdc.field()
+
+    return Top
+
+def test_fingerprint_subcomponent():
+    analyzer = Analyzer()
+    fp = analyzer.analyze(_mkTop(8)).fingerprint
+    assert fp is not None
+    assert analyzer.analyze(_mkTop(8)).fingerprint == fp
+    assert analyzer.analyze(_mkTop(16)).fingerprint != fp
+
+def test_fingerprint_default():
+
+    def _mk(v):
+        @zdc.dataclass
+        class MyC(zdc.Component):
+            a : zdc.Bit[8] = zdc.field(default=v)
+        return MyC
+
+    analyzer = Analyzer()
+    assert analyzer.analyze(_mk(1)).fingerprint == analyzer.analyze(_mk(1)).fingerprint
+    assert analyzer.analyze(_mk(1)).fingerprint != analyzer.analyze(_mk(2)).fingerprint
+
+    # Nor can this default, so the classes aren't deduplicated
+    C1, C2 = _mk(object()), _mk(object())
+    assert analyzer.analyze(C1).fingerprint is None
+    ctxt = Context(ctxt=dm.impl.Context())
+    assert TransformToDm(ctxt=ctxt, dedupe=True).transform(C1) is not \
+        TransformToDm(ctxt=ctxt, dedupe=True).transform(C2)
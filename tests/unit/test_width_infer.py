@@ -0,0 +1,46 @@
+import ast
+import zuspec.dataclasses as zdc
+from zuspec.fe.py.analysis import Analyzer
+from zuspec.fe.py.width_infer import ExprWidth, WidthInference
+
+def test_widths():
+
+    @zdc.dataclass
+    class MyC(zdc.Component):
+        clock : zdc.Bit = zdc.input()
+        reset : zdc.Bit = zdc.input()
+        a : zdc.Bit[8] = zdc.input()
+        b : zdc.Bit[16] = zdc.input()
+        c : zdc.Bit[16] = zdc.output()
+
+        @zdc.sync(clock=lambda s:s.clock, reset=lambda s:s.reset)
+        def abc(self):
+            if self.reset:
+                self.c = 0
+            elif self.a == 3:
+                self.c = (self.a + self.b) << 1
+            else:
+                self.c += -1
+
+    info = Analyzer().analyze(MyC)
+    widths = WidthInference.get(info)
+    assert WidthInference.get(info) is widths
+
+    if_s = info.syncs[0].body[0]
+    # Constant sized to the assignment target
+    assert widths[if_s.body[0].value] == ExprWidth(16, False)
+    assert widths[if_s.test] == ExprWidth(1, False)
+
+    elif_s = if_s.orelse[0]
+    # Compare is 1 bit. The constant takes the other operand's width
+    assert widths[elif_s.test] == ExprWidth(1, False)
+    assert widths[elif_s.test.comparators[0]] == ExprWidth(8, False)
+
+    shift = elif_s.body[0].value
+    assert widths[shift] == ExprWidth(16, False)
+    assert widths[shift.left] == ExprWidth(16, False)
+    assert widths[shift.right] == ExprWidth(1, False)
+
+    neg = elif_s.orelse[0].value
+    assert isinstance(neg, ast.UnaryOp)
+    assert widths[neg] == ExprWidth(16, True)